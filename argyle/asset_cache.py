@@ -0,0 +1,314 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "assets")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Static front-end resources, the documents and api calls are never cached
+CACHED_TYPES = ("script", "stylesheet", "font", "image")
+# Bundles with a content hash in the name, like /_nuxt/app.3f2a9c1b.js or
+# /_nuxt/3f2a9c1b.js, never change. The hash has a letter, so dated or numbered
+# names like /photos/20231015.jpg are not taken for one
+HASHED_NAME = re.compile(r"[/.\-_~](?=[0-9]*[a-f])[0-9a-f]{8,}\."
+                         r"(?:m?js|css|woff2?|ttf|svg|png|jpe?g|gif|webp)(?:\?|$)", re.I)
+MAX_AGE = re.compile(r"max-age=(\d+)")
+# Not valid for a body served from the cache, the body is stored decoded
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie",
+                   "connection", "keep-alive"}
+
+
+class CachedAsset(NamedTuple):
+    url: str
+    status: int
+    headers: dict
+    body: bytes
+    stored_at: float
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, now: float = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def validators(self) -> dict:
+        """
+        Headers of the conditional request that revalidates the asset.
+        """
+        headers = {}
+        if self.etag:
+            headers["if-none-match"] = self.etag
+        if self.last_modified:
+            headers["if-modified-since"] = self.last_modified
+        return headers
+
+
+def expiry(url: str, headers: dict, now: float) -> Optional[float]:
+    """
+    Until when a response can be served without asking the server, None when it must
+    not be cached at all. Hashed file names and immutable responses never expire,
+    responses with only validators are revalidated every time.
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if HASHED_NAME.search(url) or "immutable" in cache_control:
+        return float("inf")
+    max_age = MAX_AGE.search(cache_control)
+    if max_age and "no-cache" not in cache_control and int(max_age.group(1)) > 0:
+        return now + int(max_age.group(1))
+    if headers.get("etag") or headers.get("last-modified"):
+        return now
+    return None
+
+
+class AssetCache:
+    """
+    On-disk cache of static assets shared by every context and process, one file per
+    url holding a json header line and the body. Files are written to a temporary
+    name and renamed, so readers only see whole entries. The mtime of a file is its
+    last use, the least recently used files are evicted past max_bytes.
+    The size of the cache is tracked from the entries written by the process, the
+    directory is only scanned again when it goes past max_bytes and every
+    scan_every writes, for the entries the other processes wrote.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 scan_every: int = 100) -> None:
+        self.path = path or os.getenv("ASSET_CACHE_DIR", DEFAULT_PATH)
+        self.max_bytes = max_bytes
+        self.scan_every = scan_every
+        self.lock_path = os.path.join(self.path, ".lock")
+        # Bytes in the cache as of the last scan plus the writes since, None
+        # until the first scan
+        self.size = None
+        self.writes = 0
+        self.size_lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def path_for(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.asset")
+
+    def get(self, url: str) -> Optional[CachedAsset]:
+        """
+        Method to read the entry of the url and mark it as used.
+        """
+        path = self.path_for(url)
+        try:
+            with open(path, "rb") as infile:
+                meta = json.loads(infile.readline())
+                body = infile.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or len(body) != meta.get("size"):
+            return None
+        return CachedAsset(url, meta["status"], meta["headers"], body, meta["stored_at"],
+                           meta["expires_at"], meta.get("etag"), meta.get("last_modified"))
+
+    def put(self, url: str, status: int, headers: dict, body: bytes,
+            now: float = None) -> Optional[CachedAsset]:
+        """
+        Method to store a response if it is cacheable, returns the stored entry.
+        """
+        now = time.time() if now is None else now
+        headers = {name.lower(): value for name, value in headers.items()}
+        expires_at = expiry(url, headers, now)
+        if status != 200 or expires_at is None:
+            return None
+        headers = {name: value for name, value in headers.items()
+                   if name not in DROPPED_HEADERS}
+        asset = CachedAsset(url, status, headers, body, now, expires_at,
+                            headers.get("etag"), headers.get("last-modified"))
+        meta = json.dumps({"url": url, "status": status, "headers": headers,
+                           "size": len(body), "stored_at": now, "expires_at": expires_at,
+                           "etag": asset.etag, "last_modified": asset.last_modified})
+        data = meta.encode("utf-8") + b"\n" + body
+        path = self.path_for(url)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as outfile:
+            outfile.write(data)
+        os.replace(tmp_path, path)
+        self.track(len(data) - replaced)
+        return asset
+
+    def refresh(self, asset: CachedAsset, headers: dict, now: float = None) -> CachedAsset:
+        """
+        Method to store an entry again after the server answered 304 Not Modified.
+        """
+        headers = dict(asset.headers, **{name.lower(): value for name, value in headers.items()
+                                         if name.lower() not in DROPPED_HEADERS})
+        return self.put(asset.url, asset.status, headers, asset.body, now) or asset
+
+    def track(self, written: int):
+        """
+        Method to add the bytes of a write to the size of the cache, and evict when it
+        went past max_bytes or a scan is due.
+        """
+        with self.size_lock:
+            self.writes += 1
+            if self.size is not None:
+                self.size += written
+            due = (self.size is None or self.size > self.max_bytes or
+                   self.writes % self.scan_every == 0)
+        if due:
+            self.evict()
+
+    def evict(self):
+        """
+        Method to delete the least recently used entries until the cache is back under
+        90% of max_bytes. Processes evict one at a time under a file lock.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".asset"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        with self.size_lock:
+            self.size = total
+        if total <= self.max_bytes:
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                with self.size_lock:
+                    self.size = total
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class AssetRouter:
+    """
+    Route handler of one browser context that serves the static assets from the
+    cache. Fresh entries are served without a request, stale ones are revalidated
+    with their ETag/Last-Modified and a 304 serves the cached body. The misses are
+    fetched and stored (without route.fetch, they go to the network and are stored
+    from their response event). The other requests fall through untouched.
+    It must be attached before the resource filter, so the blocked requests never
+    get here (the handlers registered last run first).
+    """
+
+    def __init__(self, cache: AssetCache) -> None:
+        self.cache = cache
+        self.counts = Counter()
+        # Misses that went to the network, stored from their response event
+        self.passed = set()
+        self.bytes_saved = 0
+        self.bytes_stored = 0
+
+    @staticmethod
+    def is_cacheable(request) -> bool:
+        return request.method == "GET" and request.resource_type in CACHED_TYPES
+
+    async def handle(self, route):
+        """
+        Serve the asset from the cache, revalidate it or let the request through.
+        """
+        request = route.request
+        if not self.is_cacheable(request):
+            return await route.fallback()
+        loop = asyncio.get_event_loop()
+        asset = await loop.run_in_executor(None, self.cache.get, request.url)
+        if asset and asset.is_fresh():
+            self.counts["hits"] += 1
+            self.bytes_saved += len(asset.body)
+            return await self.fulfill(route, asset)
+        # Playwright 1.28 has no route.fetch, the response event stores the misses then
+        if not hasattr(route, "fetch"):
+            self.counts["misses"] += 1
+            self.passed.add(request.url)
+            return await route.fallback()
+        try:
+            response = await route.fetch(headers=dict(request.headers,
+                                                      **asset.validators()) if asset else None)
+        except Exception as err:
+            print(f"Failed to fetch the asset {request.url}. Got err: {err}")
+            self.counts["errors"] += 1
+            return await route.fallback()
+        if asset and response.status == 304:
+            self.counts["revalidated"] += 1
+            self.bytes_saved += len(asset.body)
+            asset = await loop.run_in_executor(None, self.cache.refresh, asset,
+                                               response.headers)
+            return await self.fulfill(route, asset)
+        self.counts["misses"] += 1
+        body = await response.body()
+        await self.store(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    async def fulfill(self, route, asset: CachedAsset):
+        await route.fulfill(status=asset.status, headers=asset.headers, body=asset.body)
+
+    async def store(self, url: str, status: int, headers: dict, body: bytes):
+        """
+        Method to write a response to the cache, off the event loop.
+        """
+        try:
+            stored = await asyncio.get_event_loop().run_in_executor(
+                None, self.cache.put, url, status, headers, body)
+        except OSError as err:
+            print(f"Failed to cache the asset {url}. Got err: {err}")
+            return
+        if stored:
+            self.counts["stored"] += 1
+            self.bytes_stored += len(body)
+
+    async def on_response(self, response):
+        """
+        Store the misses that went to the network, when there is no route.fetch.
+        """
+        url = response.request.url
+        if url not in self.passed:
+            return
+        self.passed.discard(url)
+        if response.status != 200:
+            return
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        await self.store(url, response.status, response.headers, body)
+
+    async def attach(self, context):
+        """
+        Install the cache on every page of the context.
+        """
+        await context.route("**/*", self.handle)
+        context.on("response", self.on_response)
+
+    def stats(self) -> dict:
+        served = self.counts["hits"] + self.counts["revalidated"]
+        requests = served + self.counts["misses"] + self.counts["errors"]
+        return {
+            "hits": self.counts["hits"],
+            "revalidated": self.counts["revalidated"],
+            "misses": self.counts["misses"],
+            "stored": self.counts["stored"],
+            "hit_rate": round(served / requests, 3) if requests else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_stored": self.bytes_stored,
+        }
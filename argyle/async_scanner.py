@@ -0,0 +1,872 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+from parsel import Selector
+from asset_cache import AssetCache, AssetRouter
+from browser_extraction import extract_in_page, probe_page
+from checkpoint import DEFAULT_RETRY_POLICIES, CheckpointStore, RetryPolicy
+from config import configure
+from field_spec import css_to_xpath
+from fingerprint import FingerprintStore, fingerprint
+from http_fetch import HttpFetcher
+from metrics import METRICS, instrument_page, span
+from output_sink import OutputSink, open_sink
+from parse_pool import ParseRecord, ParseStage
+from rate_control import RateController, pace_page
+from resource_filter import ResourceFilter
+from session_store import SessionStore
+from snapshot_archive import SnapshotArchive
+from upwork_parser import (UpworkParser, HOMEPAGE_PLAN, PROFILE_PLAN,
+                           CONTACT_INFO_PLAN)
+from user_data_profile import user_data, data_dict
+
+BASE_URL = "https://www.upwork.com"
+LOGIN_PATH = "/ab/account-security/login"
+LOGIN_PORTAL = f"{BASE_URL}{LOGIN_PATH}"
+HOME_PATH = "/nx/find-work/"
+CONTACT_INFO_PATH = "/freelancers/settings/contactInfo"
+POPUP_SELECTOR = 'button[data-cy="close-button"] > div > svg'
+POPUP_XPATH = css_to_xpath(POPUP_SELECTOR)
+SCAN_STEPS = ["scan_homepage", "scan_profile_page", "scan_contact_info_page"]
+# Step that captured each page handed to the parse stage
+PAGE_STEPS = {"parse_homepage": "scan_homepage", "parse_profile_data": "scan_profile_page"}
+
+
+class Credentials(NamedTuple):
+    username: str
+    password: str
+    secret: Optional[str] = None
+
+
+class ScanResult(NamedTuple):
+    username: str
+    data: Optional[dict]
+    error: Optional[str] = None
+    stats: Optional[dict] = None
+
+
+class BrowserPool:
+    """
+    Keeps one or more browser processes alive and hands out isolated contexts.
+    The contexts opened on every browser are counted, so a long-lived owner can
+    replace a browser with a fresh process after it served enough of them.
+    """
+
+    def __init__(self, size: int = 1, headless: bool = True, slow_mo: int = 0) -> None:
+        self.size = size
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.pw = None
+        self.browsers = []
+        self.retired = []
+        self.jobs = {}
+
+    async def start(self):
+        """
+        Start playwright and launch the browser processes. Playwright is imported
+        here so the parsing-only entry points never load it.
+        """
+        from playwright.async_api import async_playwright
+        with span("argyle_browser_launch_seconds"):
+            self.pw = await async_playwright().start()
+            for _ in range(self.size):
+                self.browsers.append(await self.launch())
+
+    async def launch(self):
+        """
+        Method to launch one browser process.
+        """
+        browser = await self.pw.chromium.launch(headless=self.headless, slow_mo=self.slow_mo)
+        self.jobs[browser] = 0
+        return browser
+
+    async def new_context(self, **kwargs):
+        """
+        Create a new context on the browser with the fewest open contexts.
+        """
+        browser = min(self.browsers, key=lambda item: len(item.contexts))
+        self.jobs[browser] = self.jobs.get(browser, 0) + 1
+        return await browser.new_context(**kwargs)
+
+    async def restart(self, browser):
+        """
+        Method to replace a browser with a fresh process. The new contexts go to the
+        new browser, the old one is closed once its open contexts are done.
+        """
+        with span("argyle_browser_launch_seconds"):
+            self.browsers[self.browsers.index(browser)] = await self.launch()
+        self.jobs.pop(browser, None)
+        self.retired.append(browser)
+        await self.close_retired()
+
+    async def close_retired(self):
+        """
+        Method to close the replaced browsers that have no open contexts left.
+        """
+        for browser in list(self.retired):
+            if not browser.contexts or not browser.is_connected():
+                self.retired.remove(browser)
+                try:
+                    await browser.close()
+                except Exception as err:
+                    print(f"Failed to close a retired browser. Got err: {err}")
+
+    async def stop(self):
+        """
+        Close the browsers and stop playwright.
+        """
+        for browser in self.browsers + self.retired:
+            await browser.close()
+        self.browsers = []
+        self.retired = []
+        self.jobs = {}
+        if self.pw:
+            await self.pw.stop()
+            self.pw = None
+
+
+class ScanOptions(NamedTuple):
+    """
+    Optional collaborators and settings of the scans, shared by all the accounts of
+    a run: the same options go to the scanner, scan_accounts, the daemon and the
+    queue workers.
+    With a session store, the saved cookies are reused and the login is skipped
+    while the session is still valid. With block_resources, the requests the
+    parser does not need are blocked for the whole context of every account.
+    The "browser" extraction mode runs the parser field plans inside the page and
+    only ships the values back, the "html" mode ships the whole body to the parser.
+    In fetch mode, the profile and contact info pages are read over http with the
+    cookies of the browser session and parsed like the browser pages, the browser
+    is only used when that fails.
+    With a parse stage, the captured bodies are parsed in worker processes while
+    the browser moves on to the next page, the records are merged at the end.
+    The steps of the pages that failed to parse there run again, parsed in place.
+    With an archive, every body handed to the parser is also stored in it.
+    With a fingerprint store, pages whose regions did not change since the last
+    successful scan are not parsed again, an "unchanged" event is written instead.
+    With a checkpoint store, the finished steps are saved and a later scan of the
+    account resumes at the step that failed.
+    With an asset cache, the static scripts and stylesheets are served from disk.
+    With a rate controller, the navigations are paced by it and the navigations
+    and selector waits get its adaptive timeouts.
+    """
+    base_url: Optional[str] = None
+    session_store: Optional[SessionStore] = None
+    block_resources: bool = True
+    extraction: str = "html"
+    fetch_mode: bool = False
+    parse_stage: Optional[ParseStage] = None
+    archive: Optional[SnapshotArchive] = None
+    fingerprints: Optional[FingerprintStore] = None
+    checkpoints: Optional[CheckpointStore] = None
+    retry_policies: Optional[dict] = None
+    asset_cache: Optional[AssetCache] = None
+    rate_controller: Optional[RateController] = None
+
+
+def add_scan_arguments(args: argparse.ArgumentParser):
+    """
+    Add the command line flags of the ScanOptions every entry point shares.
+    """
+    args.add_argument("--base-url", help="Scan another host, like the local replay server "
+                                         "(default: UPWORK_BASE_URL or upwork.com)")
+    args.add_argument("--no-session-cache", action="store_true",
+                      help="Always login instead of reusing the saved sessions")
+    args.add_argument("--no-block-resources", action="store_true",
+                      help="Download images, fonts, media and trackers too")
+    args.add_argument("--resume", action="store_true",
+                      help="Save the finished steps and resume failed scans at the failed step")
+    args.add_argument("--no-asset-cache", action="store_true",
+                      help="Download the static scripts and stylesheets on every scan")
+    args.add_argument("--rate", type=float, default=2.0,
+                      help="Initial page loads per second per host, adapted to the responses")
+    args.add_argument("--no-rate-control", action="store_true",
+                      help="Do not pace the navigations and selector waits")
+
+
+def scan_options(options: argparse.Namespace, concurrency: int, **fields) -> ScanOptions:
+    """
+    ScanOptions of the flags added by add_scan_arguments, the other fields are
+    given as they are.
+    """
+    return ScanOptions(
+        base_url=options.base_url,
+        session_store=None if options.no_session_cache else SessionStore(),
+        block_resources=not options.no_block_resources,
+        checkpoints=CheckpointStore() if options.resume else None,
+        asset_cache=None if options.no_asset_cache else AssetCache(),
+        rate_controller=None if options.no_rate_control else RateController(
+            rate=options.rate, concurrency=concurrency),
+        **fields)
+
+
+class AsyncUpworkScanner:
+    """
+    Scans one account in its own browser context, with the collaborators of its
+    ScanOptions. The data is collected in copies of the templates from
+    user_data_profile so accounts never share state. Every step is retried on its
+    own with backoff, on a fresh page of the same context.
+    """
+
+    def __init__(self, parser: UpworkParser, credentials: Credentials,
+                 pool: BrowserPool, options: ScanOptions = None,
+                 login_portal: str = None) -> None:
+        options = options or ScanOptions()
+        self.parser = parser
+        if parser.account is None:
+            parser.account = credentials.username
+        self.credentials = credentials
+        self.pool = pool
+        self.options = options
+        # UPWORK_BASE_URL points the scanner to another host, like the replay server
+        self.base_url = options.base_url or os.getenv("UPWORK_BASE_URL", BASE_URL)
+        self.login_portal = login_portal or f"{self.base_url}{LOGIN_PATH}"
+        self.session_store = options.session_store
+        # The filter counts the requests of its context, every scan has its own
+        self.resource_filter = ResourceFilter() if options.block_resources else None
+        self.extraction = options.extraction
+        self.fetch_mode = options.fetch_mode
+        self.parse_stage = options.parse_stage
+        self.archive = options.archive
+        self.fingerprints = options.fingerprints
+        self.checkpoints = options.checkpoints
+        self.retry_policies = options.retry_policies or DEFAULT_RETRY_POLICIES
+        self.asset_router = AssetRouter(options.asset_cache) if options.asset_cache else None
+        self.rate_controller = options.rate_controller
+        self.step_retries = {}
+        self.retrying = False
+        self.page_fingerprints = {}
+        self.unchanged_pages = set()
+        self.deferred_profile = None
+        self.pending = {}
+        self.failed_parses = []
+        self.restored_session = False
+        self.data_dict = copy.deepcopy(data_dict)
+        self.user_data = copy.deepcopy(user_data)
+        self.context = None
+        self.page = None
+        self.error = None
+
+    async def start(self):
+        """
+        Open the isolated context and the page for the account.
+        """
+        state = None
+        if self.session_store:
+            state = self.session_store.load(self.credentials.username)
+        if state:
+            self.context = await self.pool.new_context(storage_state=state)
+            self.restored_session = True
+        else:
+            self.context = await self.pool.new_context()
+        # The handlers attached last run first, the blocked requests never reach the cache
+        if self.asset_router:
+            await self.asset_router.attach(self.context)
+        if self.resource_filter:
+            await self.resource_filter.attach(self.context)
+        self.page = await self.new_page()
+
+    async def new_page(self):
+        """
+        Method to open a page of the context, timed and paced when enabled.
+        """
+        return pace_page(instrument_page(await self.context.new_page()), self.rate_controller)
+
+    async def close(self):
+        """
+        Close the context of the account, the browser stays alive for the others.
+        """
+        if self.context:
+            await self.context.close()
+            self.context = None
+
+    async def run(self) -> ScanResult:
+        """
+        Run the whole login -> homepage -> profile -> contact info flow.
+        """
+        try:
+            await self.start()
+            result = await self.run_steps()
+            if result and self.fingerprints:
+                self.fingerprints.record_scan(
+                    self.credentials.username, self.page_fingerprints,
+                    changed=len(self.unchanged_pages) < len(self.page_fingerprints))
+        except Exception as err:
+            self.error = f"run: {err}"
+            result = None
+        finally:
+            await self.close()
+        return ScanResult(self.credentials.username, result, self.error,
+                          self.stats())
+
+    async def run_steps(self):
+        """
+        Run the login -> homepage -> profile -> contact info steps in order. Steps saved
+        in the checkpoint of an earlier scan are skipped.
+        """
+        completed = self.restore_checkpoint()
+        if not await self.run_step("login"):
+            return None
+        # After a resume the page is not where the next step would expect it
+        self.retrying = bool(completed)
+        result = None
+        for step in SCAN_STEPS:
+            if step in completed:
+                continue
+            if step == "scan_profile_page" and self.fetch_mode:
+                result = await self.scan_with_http()
+                if result is not None:
+                    break
+                # Pages that failed in the parse stage are scanned again in the browser
+                if self.failed_parses:
+                    if not await self.rescan_failed(step):
+                        return None
+                    completed.append(step)
+                    continue
+            result = await self.run_step(step)
+            if not result and self.failed_parses:
+                result = await self.rescan_failed(step)
+            if not result:
+                return None
+            completed.append(step)
+            if step != SCAN_STEPS[-1]:
+                self.save_checkpoint(completed)
+        if self.checkpoints:
+            self.checkpoints.clear(self.credentials.username)
+        return result
+
+    async def run_step(self, step: str):
+        """
+        Method to run a step until it succeeds or its retry budget is spent. A retried
+        step gets a fresh page of the same context and navigates to its page itself.
+        """
+        policy = self.retry_policies.get(step, RetryPolicy())
+        result = None
+        for attempt in range(policy.retries + 1):
+            if attempt:
+                delay = policy.delay(attempt - 1)
+                print(f"Step {step} failed. Re-trying in {delay:.1f}s.... Attempt // {attempt}")
+                self.step_retries[step] = attempt
+                await asyncio.sleep(delay)
+                if self.page is None or self.page.is_closed():
+                    self.page = await self.new_page()
+                self.retrying = True
+            with span("argyle_scan_step_seconds", step=step):
+                result = await getattr(self, step)()
+            # Retrying does not help a step whose earlier pages failed to parse
+            if result or self.failed_parses:
+                break
+            if attempt < policy.retries:
+                METRICS.count("argyle_scan_steps_total", step=step, outcome="retry")
+        METRICS.count("argyle_scan_steps_total", step=step,
+                      outcome="success" if result else "failure")
+        self.retrying = False
+        if result:
+            self.error = None
+        return result
+
+    async def rescan_failed(self, step: str):
+        """
+        Method to run again the steps whose page failed in the parse stage, parsed in
+        place this time, then the step that merged them.
+        """
+        steps = [PAGE_STEPS[method] for method in self.failed_parses]
+        steps += [step] if step not in steps else []
+        self.failed_parses = []
+        print(f"Parsing failed in the parse stage, scanning again: {', '.join(steps)}")
+        parse_stage, self.parse_stage = self.parse_stage, None
+        result = None
+        try:
+            for name in steps:
+                self.retrying = True
+                result = await self.run_step(name)
+                if not result:
+                    return None
+        finally:
+            self.parse_stage = parse_stage
+        return result
+
+    def restore_checkpoint(self) -> list:
+        """
+        Method to load the data collected by the finished steps of an earlier scan.
+        """
+        state = self.checkpoints.load(self.credentials.username) if self.checkpoints else None
+        if not state:
+            return []
+        print(f"Resuming the scan after {', '.join(state['completed'])}.")
+        self.data_dict = state["data_dict"]
+        self.user_data = state["user_data"]
+        self.page_fingerprints = state["page_fingerprints"]
+        self.unchanged_pages = set(state["unchanged_pages"])
+        return list(state["completed"])
+
+    def save_checkpoint(self, completed: list):
+        """
+        Method to save the finished steps with their data. Pages still in the parse
+        stage or held back by the fingerprints have no data yet, their steps run again.
+        """
+        if not self.checkpoints or self.pending or self.deferred_profile is not None:
+            return
+        self.checkpoints.save(self.credentials.username, {
+            "completed": completed,
+            "data_dict": self.data_dict,
+            "user_data": self.user_data,
+            "page_fingerprints": self.page_fingerprints,
+            "unchanged_pages": sorted(self.unchanged_pages),
+        })
+
+    def stats(self) -> dict:
+        """
+        Method to collect the counters of the scan.
+        """
+        stats = {}
+        if self.resource_filter:
+            stats["resources"] = self.resource_filter.stats()
+        if self.asset_router:
+            stats["assets"] = self.asset_router.stats()
+        if self.rate_controller:
+            stats["rate"] = self.rate_controller.stats()
+        if self.step_retries:
+            stats["retries"] = dict(self.step_retries)
+        return stats
+
+    async def login(self):
+        """
+        Logins into the website using the username, password and occasionally the secret question.
+        A restored session that is still valid skips the login flow.
+        """
+        try:
+            if self.restored_session:
+                if await self.is_logged_in():
+                    print("Session restored, skipping login.")
+                    return True
+                print("Saved session expired, logging in again.")
+                self.session_store.delete(self.credentials.username)
+                await self.context.clear_cookies()
+                self.restored_session = False
+
+            await self.page.goto(self.login_portal)
+            self.page.once("load", lambda: print("Page loaded!"))
+
+            # Wait for the username field, populate it and continue
+            await self.page.wait_for_selector('#login_username', timeout=10000)
+            await self.page.fill('#login_username', self.credentials.username)
+            await self.page.click('#login_password_continue')
+
+            # Wait for password field, populate it and continue
+            await self.page.wait_for_selector('#login_password', timeout=10000)
+            await self.page.fill('#login_password', self.credentials.password)
+            await self.page.click('#login_control_continue')
+
+            # If it asks for secret, populate it, else continue without it
+            try:
+                await self.page.wait_for_selector('#login_answer', timeout=10000)
+                await self.page.fill('#login_answer', self.credentials.secret)
+                await self.page.click('#login_control_continue')
+            except Exception:
+                print("Continuing without secret.")
+
+            # The cookies are only those of the logged in session once the homepage shows
+            await self.page.wait_for_selector('a[class="profile-title"]')
+            print("Login has been done succesfully!")
+            if self.session_store:
+                self.session_store.save(self.credentials.username,
+                                        await self.context.storage_state())
+            return True
+
+        except Exception as err:
+            await self.handle_error(err, "login")
+
+    async def is_logged_in(self) -> bool:
+        """
+        Cheap probe of the session: open the homepage and check the profile is shown.
+        """
+        try:
+            await self.page.goto(f"{self.base_url}{HOME_PATH}")
+            await self.page.wait_for_selector('a[class="profile-title"]', timeout=5000)
+            return True
+        except Exception:
+            return False
+
+    async def scan_homepage(self):
+        """
+        Scan the homepage of the website for valuable data.
+        """
+        try:
+            self.page.once("load", lambda: print("Scanning the homepage.."))
+            if self.retrying:
+                await self.page.goto(f"{self.base_url}{HOME_PATH}")
+            # Close the pop-up page
+            await self.close_popup()
+
+            # Check the data has been loaded into the page and scrape important elements
+            await self.page.wait_for_selector('a[class="profile-title"]')
+
+            # Parse the data
+            return await self.parse("parse_homepage", await self.capture(HOMEPAGE_PLAN),
+                                    self.data_dict)
+
+        except Exception as err:
+            await self.handle_error(err, "scan_homepage")
+
+    async def scan_profile_page(self):
+        """
+        Scan the profile page for the user profile data.
+        """
+        try:
+            self.page.once("load", lambda: print("Scanning profile page..."))
+            if self.retrying:
+                await self.page.goto(f"{self.base_url}{HOME_PATH}")
+            # Close the pop-up page if it appears
+            await self.close_popup()
+
+            # Check if the elements have been loaded properly then go to the profile page
+            await self.page.wait_for_selector('a.profile-title')
+            await self.page.click('a.profile-title')
+
+            # Check if the next page has been loaded
+            await self.page.wait_for_selector(
+                'section.up-card-section > div > ul > li > div > div > h4[role="presentation"]')
+
+            # Parse the data
+            return await self.parse("parse_profile_data",
+                                    await self.capture(PROFILE_PLAN), self.user_data)
+
+        except Exception as err:
+            await self.handle_error(err, "scan_profile_page")
+
+    async def scan_contact_info_page(self):
+        """
+        Scan contact info page for the user profile data.
+        """
+        try:
+            self.page.once("load",
+                           lambda: print("Scanning contact info page..."))
+            # Check for the popup window and close it if it appears
+            await self.close_popup()
+
+            # Get the contact info url from the page and go to it, a retried step
+            # may not be on a page with the menu
+            if self.retrying:
+                contact_info_url = CONTACT_INFO_PATH
+            else:
+                contact_info_url = await self.page.get_attribute(
+                    "ul[data-cy='dropdown-menu'] > li:nth-child(4) > ul > li > a",
+                    "href")
+            await self.page.goto(f"{self.base_url}{contact_info_url}")
+
+            # Check if the secret is needed, if not, wait for the page to load up
+            try:
+                await self.page.wait_for_selector('input[id="deviceAuth_answer"]')
+                await self.page.fill('input[id="deviceAuth_answer"]',
+                                     self.credentials.secret)
+                await self.page.click('button[id="control_save"]')
+                await self.page.wait_for_selector('div[data-test="userId"]')
+            except Exception:
+                await self.page.wait_for_selector('div[data-test="userId"]')
+
+            # Parse and return the data
+            return await self.parse_contact_info(await self.capture(CONTACT_INFO_PLAN))
+
+        except Exception as err:
+            await self.handle_error(err, "scan_contact_info_page")
+
+    async def parse_contact_info(self, body):
+        """
+        Method to finish the scan with the contact info page, validated against the
+        whole profile: parsed in place, or merged with the records of the parse stage.
+        """
+        unchanged = self.is_unchanged("parse_contact_info_data", body)
+        if self.deferred_profile is not None:
+            if unchanged:
+                # The homepage may still be in the parse stage
+                if self.pending and not await self.collect_parsed():
+                    return None
+                self.report_unchanged("parse_profile_data")
+                self.report_unchanged("parse_contact_info_data")
+                return {"account": self.credentials.username, "status": "unchanged"}
+            # The contact info changed, it is validated against the whole profile
+            profile_body, self.deferred_profile = self.deferred_profile, None
+            self.unchanged_pages.discard("parse_profile_data")
+            if self.parser.parse_profile_data(profile_body, self.user_data) is None:
+                return None
+        if self.parse_stage is None:
+            return self.parser.parse_contact_info_data(body, self.user_data)
+        return await self.merge_parsed(body)
+
+    async def parse(self, method: str, body, data: dict):
+        """
+        Method to parse the body in place, or hand it to the parse stage and continue.
+        Unchanged pages are skipped, the profile is kept aside until the contact info
+        page shows whether the whole record changed.
+        """
+        if self.is_unchanged(method, body):
+            if method == "parse_profile_data":
+                self.deferred_profile = body
+            else:
+                self.report_unchanged(method)
+            return True
+        if self.parse_stage is None:
+            return getattr(self.parser, method)(body, data)
+        self.pending[method] = await self.parse_stage.submit_async(
+            method, body, data, account=self.credentials.username)
+        return True
+
+    def is_unchanged(self, page_type: str, body) -> bool:
+        """
+        Method to fingerprint the page and compare it with the last successful scan.
+        """
+        if self.fingerprints is None:
+            return False
+        value = fingerprint(body, page_type)
+        if value is None:
+            return False
+        self.page_fingerprints[page_type] = value
+        if self.fingerprints.matches(self.credentials.username, page_type, value):
+            self.unchanged_pages.add(page_type)
+            return True
+        return False
+
+    def report_unchanged(self, page_type: str):
+        """
+        Method to write the cheap "unchanged" event in place of the parsed record.
+        """
+        print(f"No changes on {page_type}, skipping the parse.")
+        self.parser.sink.write("unchanged", {
+            "account": self.credentials.username,
+            "page_type": page_type,
+            "fingerprint": self.page_fingerprints[page_type],
+            "checked_at": datetime.now(timezone.utc).isoformat()
+        }, account=self.credentials.username)
+
+    async def merge_parsed(self, contact_info_body):
+        """
+        Method to collect the records parsed by the stage and finish with the contact
+        info page, which is validated against the whole profile.
+        """
+        if not await self.collect_parsed():
+            return None
+        try:
+            record = await (await self.parse_stage.submit_async(
+                "parse_contact_info_data", contact_info_body, self.user_data,
+                account=self.credentials.username))
+        except Exception as err:
+            record = ParseRecord("parse_contact_info_data", None, f"worker: {err}")
+        if record.error or record.data is None:
+            self.error = record.error or "parse_contact_info_data: no data"
+            return None
+        self.user_data = record.data
+        return record.data
+
+    async def collect_parsed(self) -> bool:
+        """
+        Method to wait for the pages in the parse stage and merge their records into
+        the data of the account. The failed ones are kept in failed_parses.
+        """
+        records = {}
+        for method, future in self.pending.items():
+            try:
+                records[method] = await future
+            except Exception as err:
+                records[method] = ParseRecord(method, None, f"worker: {err}")
+        self.pending = {}
+        # Their steps run again, the pages may have been captured before they were loaded
+        self.failed_parses = [method for method, record in records.items()
+                              if record.error or (method == "parse_profile_data" and
+                                                  record.data is None)]
+        if self.failed_parses:
+            self.error = "; ".join(records[method].error or f"{method}: no data"
+                                   for method in self.failed_parses)
+            return False
+        if "parse_homepage" in records and records["parse_homepage"].data:
+            self.data_dict = records["parse_homepage"].data
+        if "parse_profile_data" in records:
+            self.user_data = records["parse_profile_data"].data
+        return True
+
+    async def scan_with_http(self):
+        """
+        Fetch the profile and contact info pages over http with the cookies of the browser session.
+        """
+        try:
+            print("Fetching profile and contact info pages...")
+            profile_path = await self.page.get_attribute('a.profile-title', 'href')
+            fetcher = HttpFetcher(self.base_url, await self.context.cookies(),
+                                  await self.page.evaluate("navigator.userAgent"))
+            loop = asyncio.get_event_loop()
+            try:
+                profile_body, contact_info_body = await asyncio.gather(
+                    loop.run_in_executor(None, fetcher.fetch, profile_path),
+                    loop.run_in_executor(None, fetcher.fetch, CONTACT_INFO_PATH))
+            finally:
+                fetcher.close()
+            await self.archive_body(profile_body, "parse_profile_data")
+            await self.archive_body(contact_info_body, "parse_contact_info_data")
+
+            # Parsed like the pages of the browser steps, fingerprinted and in the
+            # parse stage when there is one
+            if not await self.parse("parse_profile_data", profile_body, self.user_data):
+                return None
+            return await self.parse_contact_info(contact_info_body)
+
+        except Exception as err:
+            print(f"Failed to fetch in method scan_with_http. Got err: {err}. Using the browser")
+
+    async def capture(self, plan):
+        """
+        Method to get the page data for the parser: the fields extracted in the page
+        in browser mode, the html body otherwise or when the in-page extraction fails.
+        """
+        if self.extraction == "browser":
+            try:
+                result, _ = await extract_in_page(self.page, plan)
+                return result
+            except Exception as err:
+                print(f"In-page extraction failed, using the html body. Got err: {err}")
+        body = await self.page.inner_html('body')
+        await self.archive_body(body, plan.page)
+        return body
+
+    async def archive_body(self, body: str, page_type: str):
+        """
+        Method to store the body in the snapshot archive, off the event loop.
+        """
+        if self.archive is None:
+            return
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self.archive.put, body, self.credentials.username, page_type)
+        except Exception as err:
+            print(f"Failed to archive the {page_type} body. Got err: {err}")
+
+    async def close_popup(self):
+        """
+        Method to close the pop-up page if it appears, without shipping the body in browser mode.
+        """
+        if self.extraction == "browser":
+            try:
+                if (await probe_page(self.page, {"popup": POPUP_XPATH}))["popup"]:
+                    await self.page.click(POPUP_SELECTOR)
+                return
+            except Exception as err:
+                print(f"In-page popup check failed, using the html body. Got err: {err}")
+        await self.check_popup(await self.page.inner_html('body'))
+
+    async def check_popup(self, page):
+        """
+        Method to check if the pop-up page appears. If it appears, it closes it.
+        """
+        check_popup = Selector(text=page)
+        if check_popup.css(POPUP_SELECTOR):
+            await self.page.click(POPUP_SELECTOR)
+
+    async def handle_error(self, err, method_name: str):
+        """
+        Method to handle errors that may appear.
+        """
+        self.error = f"{method_name}: {err}"
+        if self.page is None or self.page.is_closed():
+            print(f"Page already closed in {method_name} due to a prior error.")
+        else:
+            print(
+                f"Failed to scan in method {method_name}. Got err: {err}. Closing the page")
+            await self.page.close()
+
+
+async def scan_accounts(credentials: List[Credentials], concurrency: int = 4,
+                        browsers: int = 1, headless: bool = True,
+                        slow_mo: int = 0, sink: OutputSink = None,
+                        parse_workers: int = 0,
+                        options: ScanOptions = None) -> List[ScanResult]:
+    """
+    Scan many accounts concurrently on a shared pool of browsers.
+    Returns one result per account, in the order of the credentials.
+    All the accounts write their records to the same sink and share the options.
+    With parse workers, the bodies are parsed in a shared pool of processes. With a
+    fingerprint store, the accounts that are not due for a re-scan are skipped.
+    """
+    options = options or ScanOptions()
+    pool = BrowserPool(size=browsers, headless=headless, slow_mo=slow_mo)
+    parse_stage = ParseStage(workers=parse_workers, sink=sink) if parse_workers else None
+    if parse_stage:
+        options = options._replace(parse_stage=parse_stage)
+    fingerprints = options.fingerprints
+    limit = asyncio.Semaphore(concurrency)
+
+    async def scan(account: Credentials) -> ScanResult:
+        if fingerprints and not fingerprints.is_due(account.username):
+            return ScanResult(account.username, None, None, {"skipped": "not due"})
+        async with limit:
+            return await AsyncUpworkScanner(UpworkParser(sink), account, pool, options).run()
+
+    await pool.start()
+    try:
+        return await asyncio.gather(*(scan(account) for account in credentials))
+    finally:
+        await pool.stop()
+        if parse_stage:
+            parse_stage.close()
+        if sink:
+            sink.flush()
+
+
+def load_credentials(path: str) -> List[Credentials]:
+    """
+    Read the accounts from a json file holding a list of
+    {"username": ..., "password": ..., "secret": ...} objects.
+    """
+    with open(path) as infile:
+        return [Credentials(**account) for account in json.load(infile)]
+
+
+def main(argv: list = None):
+    args = argparse.ArgumentParser(description="Scan many Upwork accounts concurrently.")
+    args.add_argument("accounts", help="Json file with the account credentials")
+    args.add_argument("--concurrency", type=int, default=4)
+    args.add_argument("--browsers", type=int, default=1)
+    args.add_argument("--headed", action="store_true")
+    args.add_argument("--extraction", choices=["html", "browser"], default="html",
+                      help="Parse the html body in python or extract the fields in the page")
+    args.add_argument("--fetch", action="store_true",
+                      help="Read the profile and contact info pages over http after login")
+    args.add_argument("--output", default="scan_results.jsonl",
+                      help="JSON Lines file the records are appended to, or a .db "
+                           "SQLite result store they are upserted into")
+    args.add_argument("--parse-workers", type=int, default=0,
+                      help="Parse the pages in this many worker processes")
+    args.add_argument("--archive", help="Directory of the snapshot archive of the pages")
+    args.add_argument("--incremental", action="store_true",
+                      help="Skip unchanged pages and accounts that are not due for a re-scan")
+    add_scan_arguments(args)
+    options = args.parse_args(argv)
+
+    configure()
+    sink = open_sink(options.output)
+    scan = scan_options(
+        options, options.concurrency, extraction=options.extraction, fetch_mode=options.fetch,
+        archive=SnapshotArchive(options.archive) if options.archive else None,
+        fingerprints=FingerprintStore() if options.incremental else None)
+    results = asyncio.run(scan_accounts(load_credentials(options.accounts),
+                                        concurrency=options.concurrency,
+                                        browsers=options.browsers,
+                                        headless=not options.headed,
+                                        sink=sink,
+                                        parse_workers=options.parse_workers,
+                                        options=scan))
+    sink.close()
+    for path in METRICS.export():
+        print(f"Metrics written to {path}")
+    for result in results:
+        status = "ok" if result.data else f"failed ({result.error})"
+        if result.stats.get("skipped"):
+            status = "skipped"
+        print(f"{result.username}: {status} {json.dumps(result.stats)}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
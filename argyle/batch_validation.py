@@ -0,0 +1,223 @@
+import argparse
+import json
+import sys
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+from pydantic import ValidationError
+from data_model import (MISSING, Address, CountryFormatError, InvalidPhoneNumber,
+                        InvalidUUID, UpworkUser, is_uuid)
+from normalization import is_e164, is_iso2
+
+USER_FIELDS = list(UpworkUser.__fields__)
+STR_FIELDS = [name for name, field in UpworkUser.__fields__.items() if field.type_ is str]
+ADDRESS_FIELDS = list(Address.__fields__)
+UUID_FIELDS = ["id", "account"]
+_STR_VALUES = itemgetter(*STR_FIELDS)
+_ADDRESS_VALUES = itemgetter(*ADDRESS_FIELDS)
+
+
+class RecordError(NamedTuple):
+    index: int
+    field: str
+    value: object
+    message: str
+
+
+class BatchResult:
+    """
+    Result of the validation of a batch: the validated models in input order (None
+    for the invalid records) and the errors of every invalid record.
+    """
+
+    def __init__(self, offset: int, models: list, errors: List[RecordError]) -> None:
+        self.offset = offset
+        self.models = models
+        self.errors = errors
+
+    @property
+    def valid(self) -> list:
+        return [model for model in self.models if model is not None]
+
+    @property
+    def invalid_indexes(self) -> list:
+        return sorted({error.index for error in self.errors})
+
+    def summary(self) -> dict:
+        return {
+            "records": len(self.models),
+            "valid": len(self.valid),
+            "invalid": len(self.invalid_indexes),
+            "errors_by_field": dict(Counter(error.field for error in self.errors)),
+        }
+
+
+def check_column(values: list, check) -> list:
+    """
+    Run the check once per distinct value of the column.
+    """
+    results = {value: check(value) for value in set(values)}
+    return [results[value] for value in values]
+
+
+def is_well_formed(record) -> bool:
+    """
+    Check the record has every field with the plain type, so the columnar checks
+    cover everything pydantic would check on it.
+    """
+    if type(record) is not dict or type(record.get("address")) is not dict:
+        return False
+    try:
+        types = set(map(type, _STR_VALUES(record)))
+        types.update(map(type, _ADDRESS_VALUES(record["address"])))
+    except KeyError:
+        return False
+    metadata = record.get("metadata")
+    return types == {str} and (metadata is None or type(metadata) is dict)
+
+
+def validate_record(index: int, record) -> (Optional[UpworkUser], List[RecordError]):
+    """
+    Validate a single record with pydantic, for the records the fast path can not take.
+    """
+    try:
+        return UpworkUser.parse_obj(record), []
+    except ValidationError as err:
+        return None, [RecordError(index, ".".join(str(loc) for loc in error["loc"]),
+                                  None, error["msg"]) for error in err.errors()]
+    except CountryFormatError as err:
+        return None, [RecordError(index, "address.country", err.value, err.message)]
+    except InvalidPhoneNumber as err:
+        return None, [RecordError(index, "phone_number", err.value, err.message)]
+    except InvalidUUID as err:
+        field = "id" if str(record.get("id")) == err.value else "account"
+        return None, [RecordError(index, field, err.value, err.message)]
+
+
+def is_uuid_or_missing(value) -> bool:
+    """
+    The id/account check of the model, the placeholder of the missing ids passes.
+    """
+    return value == MISSING or is_uuid(value)
+
+
+def validate_batch(records: list, strict_uuid: bool = False, offset: int = 0) -> BatchResult:
+    """
+    Validate a batch of user dicts without stopping at the first bad record.
+    The phone, country and id/account checks run column by column over the well
+    formed records, and their models are built without going through pydantic
+    again. The other records are validated one by one. With strict_uuid the ids
+    missing from the pages are reported too.
+    """
+    models = [None] * len(records)
+    errors = []
+    fast = [index for index, record in enumerate(records) if is_well_formed(record)]
+    fast_set = set(fast)
+    for index, record in enumerate(records):
+        if index not in fast_set:
+            models[index], record_errors = validate_record(offset + index, record)
+            errors.extend(record_errors)
+
+    columns = [("phone_number", [records[index]["phone_number"] for index in fast], is_e164,
+                "Phone number is not in E.164 format"),
+               ("address.country", [records[index]["address"]["country"] for index in fast],
+                is_iso2, "Invalid value format for field Country")]
+    uuid_check = is_uuid if strict_uuid else is_uuid_or_missing
+    columns += [(name, [records[index][name] for index in fast], uuid_check, "Invalid UUID")
+                for name in UUID_FIELDS]
+    failed = set()
+    for field, values, check, message in columns:
+        for index, value, passed in zip(fast, values, check_column(values, check)):
+            if not passed:
+                errors.append(RecordError(offset + index, field, value, message))
+                failed.add(index)
+
+    for index in fast:
+        if index in failed:
+            continue
+        record = records[index]
+        values = {name: record[name] for name in USER_FIELDS if name in record}
+        values["address"] = Address.construct(
+            **{name: record["address"][name] for name in ADDRESS_FIELDS})
+        models[index] = UpworkUser.construct(**values)
+
+    errors.sort(key=lambda error: error.index)
+    return BatchResult(offset, models, errors)
+
+
+def validate_stream(records: Iterable, chunk_size: int = 1000,
+                    strict_uuid: bool = False) -> Iterator[BatchResult]:
+    """
+    Validate a stream of records in chunks, the indexes in the errors count from
+    the start of the stream.
+    """
+    records = iter(records)
+    offset = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield validate_batch(chunk, strict_uuid, offset)
+        offset += len(chunk)
+
+
+def read_entries(path: str, kind: str = "level_2") -> Iterator[tuple]:
+    """
+    Read the (account, record) of the records of the kind from a JSON Lines output
+    file, or of every record of a plain json list/object file. The account is the
+    username the record was scanned with, None when the file does not tell.
+    """
+    with open(path) as infile:
+        if path.endswith(".jsonl"):
+            for line in infile:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("kind") == kind:
+                        yield entry.get("account"), entry["record"]
+        else:
+            data = json.load(infile)
+            for record in data if isinstance(data, list) else [data]:
+                yield None, record
+
+
+def read_records(path: str, kind: str = "level_2") -> Iterator[dict]:
+    """
+    Read the records of the kind from a JSON Lines output file, or every record
+    of a plain json list/object file.
+    """
+    for _, record in read_entries(path, kind):
+        yield record
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Validate parsed user records in batches.")
+    args.add_argument("paths", nargs="+", help="JSON Lines output files or json files")
+    args.add_argument("--chunk-size", type=int, default=1000)
+    args.add_argument("--strict-uuid", action="store_true",
+                      help="Report ids and accounts that are not UUIDs")
+    args.add_argument("--show", type=int, default=20, help="Number of errors to print")
+    options = args.parse_args(argv)
+
+    def records():
+        for path in options.paths:
+            yield from read_records(path)
+
+    totals = Counter()
+    by_field = Counter()
+    shown = 0
+    for result in validate_stream(records(), options.chunk_size, options.strict_uuid):
+        summary = result.summary()
+        totals.update(records=summary["records"], valid=summary["valid"],
+                      invalid=summary["invalid"])
+        by_field.update(summary["errors_by_field"])
+        for error in result.errors[:max(options.show - shown, 0)]:
+            print(f"Record {error.index}: {error.field} {error.message} ({error.value!r})")
+            shown += 1
+    print(f"Validated {totals['records']} records, {totals['valid']} valid, "
+          f"{totals['invalid']} invalid. Errors by field: {dict(by_field)}")
+    return 1 if totals["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+from user_data_profile import user_data, data_dict
+
+METHODS = ["parse_homepage", "parse_profile_data", "parse_contact_info_data"]
+
+
+def inflate_body(html_body: str, factor: int) -> str:
+    """
+    Grow the DOM of a recorded body by appending copies of it, the original stays
+    first so the parser still finds the same fields.
+    """
+    copies = "".join(f'<div class="bench-copy">{html_body}</div>'
+                     for _ in range(factor - 1))
+    return f"{html_body}{copies}"
+
+
+def template_for(method: str, parser: UpworkParser) -> dict:
+    """
+    Build the data dict the method expects. The contact info page is validated
+    against the whole profile, so the profile page is parsed first.
+    """
+    if method == "parse_homepage":
+        return copy.deepcopy(data_dict)
+    profile = copy.deepcopy(user_data)
+    if method == "parse_contact_info_data":
+        parser.parse_profile_data(map_html_body["parse_profile_data"], profile)
+    return profile
+
+
+def bench_method(method: str, html_body: str, iterations: int, backend: str = None) -> dict:
+    """
+    Replay the body through the parser method and time every call.
+    """
+    parser = UpworkParser(backend=backend)
+    template = template_for(method, parser)
+    parse = getattr(parser, method)
+    timings = []
+    for _ in range(iterations):
+        data = copy.deepcopy(template)
+        start = time.perf_counter()
+        parse(html_body, data)
+        timings.append(time.perf_counter() - start)
+
+    total = sum(timings)
+    percentiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return {
+        "method": method,
+        "backend": parser.backend.name,
+        "iterations": iterations,
+        "body_bytes": len(html_body),
+        "complete": parser.extraction_results[method].complete,
+        "total_s": round(total, 6),
+        "pages_per_s": round(iterations / total, 2),
+        "p50_ms": round(percentiles[49] * 1000, 4),
+        "p99_ms": round(percentiles[98] * 1000, 4),
+    }
+
+
+def _bench_worker(method: str, factor: int, iterations: int, backend: str, queue) -> None:
+    """
+    Run one benchmark in a fresh process so the peak RSS belongs to that method only.
+    """
+    # The parser writes its output to "../level_*.json" and prints progress
+    sys.stdout = open(os.devnull, "w")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="argyle-bench-") as tmp:
+        workdir = os.path.join(tmp, "run")
+        os.makedirs(workdir)
+        os.chdir(workdir)
+        try:
+            result = bench_method(method, inflate_body(map_html_body[method], factor),
+                                  iterations, backend)
+        finally:
+            os.chdir(cwd)
+    result["inflate"] = factor
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_kb"] = peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+    queue.put(result)
+
+
+def run_benchmarks(methods: list, factors: list, iterations: int,
+                   backends: list = (None,)) -> list:
+    """
+    Run every method at every inflation factor with every html backend, each one in
+    its own process. Larger pages get proportionally fewer iterations.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for backend, method, factor in [(backend, method, factor) for backend in backends
+                                    for method in methods for factor in factors]:
+        queue = ctx.Queue()
+        worker = ctx.Process(target=_bench_worker,
+                             args=(method, factor,
+                                   max(iterations // factor, 5), backend, queue))
+        worker.start()
+        result = queue.get()
+        worker.join()
+        print(f"{method} x{factor} ({result['backend']}): {result['pages_per_s']} pages/s, "
+              f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"peak RSS {result['peak_rss_kb']} KB")
+        results.append(result)
+    return results
+
+
+def find_regressions(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    Compare the p50 latency of every run with the baseline file.
+    """
+    previous = {(r["method"], r["inflate"], r.get("backend")): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["method"], result["inflate"], result.get("backend")))
+        if before and result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{result['method']} x{result['inflate']} "
+                               f"({result.get('backend')}): "
+                               f"p50 {before['p50_ms']} ms -> {result['p50_ms']} ms")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Benchmark the UpworkParser on the recorded pages.")
+    args.add_argument("--iterations", type=int, default=1000)
+    args.add_argument("--inflate", default="1,10,100",
+                      help="Comma separated DOM size multipliers")
+    args.add_argument("--methods", default=",".join(METHODS))
+    args.add_argument("--backends", default="",
+                      help="Comma separated html backends, the default backend when empty")
+    args.add_argument("--output", default="bench_results.json")
+    args.add_argument("--baseline", help="Previous results file to compare with")
+    args.add_argument("--tolerance", type=float, default=0.10,
+                      help="Allowed p50 slowdown against the baseline")
+    options = args.parse_args(argv)
+
+    results = run_benchmarks(options.methods.split(","),
+                             [int(x) for x in options.inflate.split(",")],
+                             options.iterations,
+                             options.backends.split(",") if options.backends else [None])
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    with open(options.output, "w") as outfile:
+        outfile.write(json.dumps(report, indent=2))
+
+    if options.baseline:
+        with open(options.baseline) as infile:
+            regressions = find_regressions(results, json.load(infile),
+                                           options.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from field_spec import ExtractionPlan, ExtractionResult
+
+# Evaluates a compiled ExtractionPlan inside the page with document.evaluate and
+# returns only the raw matches, plus which of the probe xpaths are present
+EXTRACT_SCRIPT = """
+({anchors, fields, probes}) => {
+    const snapshot = (xpath, context) => {
+        const result = document.evaluate(
+            xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) {
+            nodes.push(result.snapshotItem(i));
+        }
+        return nodes;
+    };
+    const scopes = {};
+    for (const [name, xpath] of Object.entries(anchors)) {
+        scopes[name] = snapshot(xpath, document.body);
+    }
+    const values = {};
+    for (const field of fields) {
+        const contexts = field.anchor ? scopes[field.anchor] : [document.body];
+        const matches = [];
+        for (const context of contexts) {
+            for (const node of snapshot(field.xpath, context)) {
+                matches.push(node.nodeValue !== null ? node.nodeValue : node.outerHTML);
+                if (!field.many) break;
+            }
+            if (!field.many && matches.length) break;
+        }
+        values[field.name] = matches;
+    }
+    const found = {};
+    for (const [name, xpath] of Object.entries(probes)) {
+        found[name] = snapshot(xpath, document.body).length > 0;
+    }
+    return {values, probes: found};
+}
+"""
+
+
+async def probe_page(page, probes: dict) -> dict:
+    """
+    Check which of the probe xpaths are present in the page, in one round trip.
+    """
+    spec = {"anchors": {}, "fields": [], "probes": probes}
+    return (await page.evaluate(EXTRACT_SCRIPT, spec))["probes"]
+
+
+async def extract_in_page(page, plan: ExtractionPlan, probes: dict = None):
+    """
+    Run the extraction plan inside the page, in one round trip. The raw values go
+    through the same post-processing as the html path.
+    """
+    spec = dict(plan.browser_spec(), probes=probes or {})
+    raw = await page.evaluate(EXTRACT_SCRIPT, spec)
+    result: ExtractionResult = plan.build(raw["values"])
+    return result, raw["probes"]
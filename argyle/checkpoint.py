@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import random
+import time
+from typing import NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "checkpoints")
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Retry budget of a scan step, with exponential backoff and full jitter.
+    """
+    retries: int = 2
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+DEFAULT_RETRY_POLICIES = {
+    "login": RetryPolicy(retries=1, base_delay=2.0),
+    "scan_homepage": RetryPolicy(),
+    "scan_profile_page": RetryPolicy(),
+    "scan_contact_info_page": RetryPolicy(),
+}
+
+
+class CheckpointStore:
+    """
+    Steps an account already finished, with the data they collected, so a failed
+    scan resumes at the step that failed. The files hold parsed profile data and
+    are only readable by the owner. Checkpoints older than max_age are ignored,
+    the pages may have changed since.
+    """
+
+    def __init__(self, path: str = None, max_age: float = 3600) -> None:
+        self.path = path or os.getenv("CHECKPOINT_DIR", DEFAULT_PATH)
+        self.max_age = max_age
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+
+    def path_for(self, account: str) -> str:
+        digest = hashlib.sha256(account.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+    def load(self, account: str) -> Optional[dict]:
+        """
+        Method to get the checkpoint of the account, if there is a recent one.
+        """
+        try:
+            with open(self.path_for(account)) as infile:
+                state = json.load(infile)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - state.get("saved_at", 0) > self.max_age:
+            self.clear(account)
+            return None
+        return state
+
+    def save(self, account: str, state: dict):
+        """
+        Method to replace the checkpoint of the account atomically.
+        """
+        state = dict(state, saved_at=time.time())
+        tmp_path = f"{self.path_for(account)}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as outfile:
+            outfile.write(json.dumps(state))
+        os.replace(tmp_path, self.path_for(account))
+
+    def clear(self, account: str):
+        try:
+            os.remove(self.path_for(account))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,21 @@
+import pytest
+from output_sink import NullSink
+
+
+class MemorySink(NullSink):
+    """
+    Sink that keeps the records written and the accounts they belong to.
+    """
+
+    def __init__(self) -> None:
+        self.records = []
+        self.accounts = []
+
+    def write(self, kind: str, record: dict, account: str = None):
+        self.records.append((kind, record))
+        self.accounts.append(account)
+
+
+@pytest.fixture
+def memory_sink() -> MemorySink:
+    return MemorySink()
@@ -0,0 +1,959 @@
+"""
+Country name -> ISO 3166-1 alpha-2 table generated by generate_country_table.py
+from country_converter 0.8.0. Do not edit by hand.
+"""
+
+COUNTRY_ISO2 = {
+    'ABW': 'AW',
+    'AD': 'AD',
+    'AE': 'AE',
+    'AF': 'AF',
+    'AFG': 'AF',
+    'AG': 'AG',
+    'AGO': 'AO',
+    'AI': 'AI',
+    'AIA': 'AI',
+    'AL': 'AL',
+    'ALA': 'AX',
+    'ALB': 'AL',
+    'AM': 'AM',
+    'AND': 'AD',
+    'AO': 'AO',
+    'AQ': 'AQ',
+    'AR': 'AR',
+    'ARE': 'AE',
+    'ARG': 'AR',
+    'ARM': 'AM',
+    'AS': 'AS',
+    'ASM': 'AS',
+    'AT': 'AT',
+    'ATA': 'AQ',
+    'ATF': 'TF',
+    'ATG': 'AG',
+    'AU': 'AU',
+    'AUS': 'AU',
+    'AUT': 'AT',
+    'AW': 'AW',
+    'AX': 'AX',
+    'AZ': 'AZ',
+    'AZE': 'AZ',
+    'Afghanistan': 'AF',
+    'Aland Islands': 'AX',
+    'Albania': 'AL',
+    'Algeria': 'DZ',
+    'American Samoa': 'AS',
+    'Andorra': 'AD',
+    'Angola': 'AO',
+    'Anguilla': 'AI',
+    'Antarctica': 'AQ',
+    'Antigua and Barbuda': 'AG',
+    'Arab Republic of Egypt': 'EG',
+    'Argentina': 'AR',
+    'Argentine Republic': 'AR',
+    'Armenia': 'AM',
+    'Aruba': 'AW',
+    'Australia': 'AU',
+    'Austria': 'AT',
+    'Azerbaijan': 'AZ',
+    'BA': 'BA',
+    'BB': 'BB',
+    'BD': 'BD',
+    'BDI': 'BI',
+    'BE': 'BE',
+    'BEL': 'BE',
+    'BEN': 'BJ',
+    'BES': 'BQ',
+    'BF': 'BF',
+    'BFA': 'BF',
+    'BG': 'BG',
+    'BGD': 'BD',
+    'BGR': 'BG',
+    'BH': 'BH',
+    'BHR': 'BH',
+    'BHS': 'BS',
+    'BI': 'BI',
+    'BIH': 'BA',
+    'BJ': 'BJ',
+    'BL': 'BL',
+    'BLM': 'BL',
+    'BLR': 'BY',
+    'BLZ': 'BZ',
+    'BM': 'BM',
+    'BMU': 'BM',
+    'BN': 'BN',
+    'BO': 'BO',
+    'BOL': 'BO',
+    'BQ': 'BQ',
+    'BR': 'BR',
+    'BRA': 'BR',
+    'BRB': 'BB',
+    'BRN': 'BN',
+    'BS': 'BS',
+    'BT': 'BT',
+    'BTN': 'BT',
+    'BV': 'BV',
+    'BVT': 'BV',
+    'BW': 'BW',
+    'BWA': 'BW',
+    'BY': 'BY',
+    'BZ': 'BZ',
+    'Bahamas': 'BS',
+    'Bahrain': 'BH',
+    'Bangladesh': 'BD',
+    'Barbados': 'BB',
+    'Belarus': 'BY',
+    'Belgium': 'BE',
+    'Belize': 'BZ',
+    'Benin': 'BJ',
+    'Bermuda': 'BM',
+    'Bhutan': 'BT',
+    'Bolivarian Republic of Venezuela': 'VE',
+    'Bolivia': 'BO',
+    'Bonaire, Saint Eustatius and Saba': 'BQ',
+    'Bosnia and Herzegovina': 'BA',
+    'Botswana': 'BW',
+    'Bouvet Island': 'BV',
+    'Brazil': 'BR',
+    'British Indian Ocean Territory': 'IO',
+    'British Virgin Islands': 'VG',
+    'Brunei Darussalam': 'BN',
+    'Bulgaria': 'BG',
+    'Burkina Faso': 'BF',
+    'Burundi': 'BI',
+    'CA': 'CA',
+    'CAF': 'CF',
+    'CAN': 'CA',
+    'CC': 'CC',
+    'CCK': 'CC',
+    'CD': 'CD',
+    'CF': 'CF',
+    'CG': 'CG',
+    'CH': 'CH',
+    'CHE': 'CH',
+    'CHL': 'CL',
+    'CHN': 'CN',
+    'CI': 'CI',
+    'CIV': 'CI',
+    'CK': 'CK',
+    'CL': 'CL',
+    'CM': 'CM',
+    'CMR': 'CM',
+    'CN': 'CN',
+    'CO': 'CO',
+    'COD': 'CD',
+    'COG': 'CG',
+    'COK': 'CK',
+    'COL': 'CO',
+    'COM': 'KM',
+    'CPV': 'CV',
+    'CR': 'CR',
+    'CRI': 'CR',
+    'CU': 'CU',
+    'CUB': 'CU',
+    'CUW': 'CW',
+    'CV': 'CV',
+    'CW': 'CW',
+    'CX': 'CX',
+    'CXR': 'CX',
+    'CY': 'CY',
+    'CYM': 'KY',
+    'CYP': 'CY',
+    'CZ': 'CZ',
+    'CZE': 'CZ',
+    'Cabo Verde': 'CV',
+    'Cambodia': 'KH',
+    'Cameroon': 'CM',
+    'Canada': 'CA',
+    'Cape Verde': 'CV',
+    'Cayman Islands': 'KY',
+    'Central African Republic': 'CF',
+    'Chad': 'TD',
+    'Chile': 'CL',
+    'China': 'CN',
+    'Christmas Island': 'CX',
+    'Co-operative Republic of Guyana': 'GY',
+    'Cocos (Keeling) Islands': 'CC',
+    'Colombia': 'CO',
+    'Commonwealth of Australia': 'AU',
+    'Commonwealth of Dominica': 'DM',
+    'Commonwealth of the Bahamas': 'BS',
+    'Comoros': 'KM',
+    'Congo': 'CG',
+    'Congo Republic': 'CG',
+    'Congo, the Democratic Republic of the': 'CD',
+    'Cook Islands': 'CK',
+    'Costa Rica': 'CR',
+    "Cote d'Ivoire": 'CI',
+    'Country of Curaçao': 'CW',
+    'Croatia': 'HR',
+    'Cuba': 'CU',
+    'Curacao': 'CW',
+    'Cyprus': 'CY',
+    'Czech Republic': 'CZ',
+    'DE': 'DE',
+    'DEU': 'DE',
+    'DJ': 'DJ',
+    'DJI': 'DJ',
+    'DK': 'DK',
+    'DM': 'DM',
+    'DMA': 'DM',
+    'DNK': 'DK',
+    'DO': 'DO',
+    'DOM': 'DO',
+    'DR Congo': 'CD',
+    'DZ': 'DZ',
+    'DZA': 'DZ',
+    "Democratic People's Republic of Korea": 'KP',
+    'Democratic Republic of São Tomé and Príncipe': 'ST',
+    'Democratic Republic of Timor-Leste': 'TL',
+    'Democratic Republic of the Congo': 'CD',
+    'Democratic Socialist Republic of Sri Lanka': 'LK',
+    'Denmark': 'DK',
+    'Djibouti': 'DJ',
+    'Dominica': 'DM',
+    'Dominican Republic': 'DO',
+    'EC': 'EC',
+    'ECU': 'EC',
+    'EE': 'EE',
+    'EG': 'EG',
+    'EGY': 'EG',
+    'EH': 'EH',
+    'ER': 'ER',
+    'ERI': 'ER',
+    'ES': 'ES',
+    'ESH': 'EH',
+    'ESP': 'ES',
+    'EST': 'EE',
+    'ET': 'ET',
+    'ETH': 'ET',
+    'Ecuador': 'EC',
+    'Egypt': 'EG',
+    'El Salvador': 'SV',
+    'Equatorial Guinea': 'GQ',
+    'Eritrea': 'ER',
+    'Estonia': 'EE',
+    'Eswatini': 'SZ',
+    'Ethiopia': 'ET',
+    'FI': 'FI',
+    'FIN': 'FI',
+    'FJ': 'FJ',
+    'FJI': 'FJ',
+    'FK': 'FK',
+    'FLK': 'FK',
+    'FM': 'FM',
+    'FO': 'FO',
+    'FR': 'FR',
+    'FRA': 'FR',
+    'FRO': 'FO',
+    'FSM': 'FM',
+    'Faeroe Islands': 'FO',
+    'Falkland Islands': 'FK',
+    'Falkland Islands (Malvinas)': 'FK',
+    'Federal Democratic Republic of Ethiopia': 'ET',
+    'Federal Democratic Republic of Nepal': 'NP',
+    'Federal Republic of Germany': 'DE',
+    'Federal Republic of Nigeria': 'NG',
+    'Federal Republic of Somalia': 'SO',
+    'Federated States of Micronesia': 'FM',
+    'Federative Republic of Brazil': 'BR',
+    'Fiji': 'FJ',
+    'Finland': 'FI',
+    'France': 'FR',
+    'French Guiana': 'GF',
+    'French Polynesia': 'PF',
+    'French Republic': 'FR',
+    'French Southern Territories': 'TF',
+    'GA': 'GA',
+    'GAB': 'GA',
+    'GB': 'GB',
+    'GBR': 'GB',
+    'GD': 'GD',
+    'GE': 'GE',
+    'GEO': 'GE',
+    'GF': 'GF',
+    'GG': 'GG',
+    'GGY': 'GG',
+    'GH': 'GH',
+    'GHA': 'GH',
+    'GI': 'GI',
+    'GIB': 'GI',
+    'GIN': 'GN',
+    'GL': 'GL',
+    'GLP': 'GP',
+    'GM': 'GM',
+    'GMB': 'GM',
+    'GN': 'GN',
+    'GNB': 'GW',
+    'GNQ': 'GQ',
+    'GP': 'GP',
+    'GQ': 'GQ',
+    'GR': 'GR',
+    'GRC': 'GR',
+    'GRD': 'GD',
+    'GRL': 'GL',
+    'GS': 'GS',
+    'GT': 'GT',
+    'GTM': 'GT',
+    'GU': 'GU',
+    'GUF': 'GF',
+    'GUM': 'GU',
+    'GUY': 'GY',
+    'GW': 'GW',
+    'GY': 'GY',
+    'Gabon': 'GA',
+    'Gabonese Republic': 'GA',
+    'Gambia': 'GM',
+    'Georgia': 'GE',
+    'Germany': 'DE',
+    'Ghana': 'GH',
+    'Gibraltar': 'GI',
+    'Grand Duchy of Luxembourg': 'LU',
+    'Greece': 'GR',
+    'Greenland': 'GL',
+    'Grenada': 'GD',
+    'Guadeloupe': 'GP',
+    'Guam': 'GU',
+    'Guatemala': 'GT',
+    'Guernsey': 'GG',
+    'Guiana': 'GF',
+    'Guinea': 'GN',
+    'Guinea-Bissau': 'GW',
+    'Guyana': 'GY',
+    'HK': 'HK',
+    'HKG': 'HK',
+    'HM': 'HM',
+    'HMD': 'HM',
+    'HN': 'HN',
+    'HND': 'HN',
+    'HR': 'HR',
+    'HRV': 'HR',
+    'HT': 'HT',
+    'HTI': 'HT',
+    'HU': 'HU',
+    'HUN': 'HU',
+    'Haiti': 'HT',
+    'Hashemite Kingdom of Jordan': 'JO',
+    'Heard and McDonald Islands': 'HM',
+    'Hellenic Republic': 'GR',
+    'Honduras': 'HN',
+    'Hong Kong': 'HK',
+    'Hong Kong SAR': 'HK',
+    'Hungary': 'HU',
+    'ID': 'ID',
+    'IDN': 'ID',
+    'IE': 'IE',
+    'IL': 'IL',
+    'IM': 'IM',
+    'IMN': 'IM',
+    'IN': 'IN',
+    'IND': 'IN',
+    'IO': 'IO',
+    'IOT': 'IO',
+    'IQ': 'IQ',
+    'IR': 'IR',
+    'IRL': 'IE',
+    'IRN': 'IR',
+    'IRQ': 'IQ',
+    'IS': 'IS',
+    'ISL': 'IS',
+    'ISR': 'IL',
+    'IT': 'IT',
+    'ITA': 'IT',
+    'Iceland': 'IS',
+    'Independent State of Papua New Guinea': 'PG',
+    'Independent State of Samoa': 'WS',
+    'India': 'IN',
+    'Indonesia': 'ID',
+    'Iran': 'IR',
+    'Iraq': 'IQ',
+    'Ireland': 'IE',
+    'Islamic Republic of Afghanistan': 'AF',
+    'Islamic Republic of Iran': 'IR',
+    'Islamic Republic of Mauritania': 'MR',
+    'Islamic Republic of Pakistan': 'PK',
+    'Isle of Man': 'IM',
+    'Israel': 'IL',
+    'Italian Republic': 'IT',
+    'Italy': 'IT',
+    'JAM': 'JM',
+    'JE': 'JE',
+    'JEY': 'JE',
+    'JM': 'JM',
+    'JO': 'JO',
+    'JOR': 'JO',
+    'JP': 'JP',
+    'JPN': 'JP',
+    'Jamaica': 'JM',
+    'Japan': 'JP',
+    'Jersey': 'JE',
+    'Jordan': 'JO',
+    'KAZ': 'KZ',
+    'KE': 'KE',
+    'KEN': 'KE',
+    'KG': 'KG',
+    'KGZ': 'KG',
+    'KH': 'KH',
+    'KHM': 'KH',
+    'KI': 'KI',
+    'KIR': 'KI',
+    'KM': 'KM',
+    'KN': 'KN',
+    'KNA': 'KN',
+    'KOR': 'KR',
+    'KP': 'KP',
+    'KR': 'KR',
+    'KW': 'KW',
+    'KWT': 'KW',
+    'KY': 'KY',
+    'KZ': 'KZ',
+    'Kazakhstan': 'KZ',
+    'Kenya': 'KE',
+    'Kingdom of Bahrain': 'BH',
+    'Kingdom of Belgium': 'BE',
+    'Kingdom of Bhutan': 'BT',
+    'Kingdom of Cambodia': 'KH',
+    'Kingdom of Denmark': 'DK',
+    'Kingdom of Eswatini': 'SZ',
+    'Kingdom of Lesotho': 'LS',
+    'Kingdom of Morocco': 'MA',
+    'Kingdom of Norway': 'NO',
+    'Kingdom of Saudi Arabia': 'SA',
+    'Kingdom of Spain': 'ES',
+    'Kingdom of Sweden': 'SE',
+    'Kingdom of Thailand': 'TH',
+    'Kingdom of Tonga': 'TO',
+    'Kingdom of the Netherlands': 'NL',
+    'Kiribati': 'KI',
+    'Korea, Republic of': 'KR',
+    'Kosovo': 'XK',
+    'Kuwait': 'KW',
+    'Kyrgyz Republic': 'KG',
+    'LA': 'LA',
+    'LAO': 'LA',
+    'LB': 'LB',
+    'LBN': 'LB',
+    'LBR': 'LR',
+    'LBY': 'LY',
+    'LC': 'LC',
+    'LCA': 'LC',
+    'LI': 'LI',
+    'LIE': 'LI',
+    'LK': 'LK',
+    'LKA': 'LK',
+    'LR': 'LR',
+    'LS': 'LS',
+    'LSO': 'LS',
+    'LT': 'LT',
+    'LTU': 'LT',
+    'LU': 'LU',
+    'LUX': 'LU',
+    'LV': 'LV',
+    'LVA': 'LV',
+    'LY': 'LY',
+    "Lao People's Democratic Republic": 'LA',
+    'Laos': 'LA',
+    'Latvia': 'LV',
+    'Lebanese Republic': 'LB',
+    'Lebanon': 'LB',
+    'Lesotho': 'LS',
+    'Liberia': 'LR',
+    'Libya': 'LY',
+    'Liechtenstein': 'LI',
+    'Lithuania': 'LT',
+    'Luxembourg': 'LU',
+    'MA': 'MA',
+    'MAC': 'MO',
+    'MAF': 'MF',
+    'MAR': 'MA',
+    'MC': 'MC',
+    'MCO': 'MC',
+    'MD': 'MD',
+    'MDA': 'MD',
+    'MDG': 'MG',
+    'MDV': 'MV',
+    'ME': 'ME',
+    'MEX': 'MX',
+    'MF': 'MF',
+    'MG': 'MG',
+    'MH': 'MH',
+    'MHL': 'MH',
+    'MK': 'MK',
+    'MKD': 'MK',
+    'ML': 'ML',
+    'MLI': 'ML',
+    'MLT': 'MT',
+    'MM': 'MM',
+    'MMR': 'MM',
+    'MN': 'MN',
+    'MNE': 'ME',
+    'MNG': 'MN',
+    'MNP': 'MP',
+    'MO': 'MO',
+    'MOZ': 'MZ',
+    'MP': 'MP',
+    'MQ': 'MQ',
+    'MR': 'MR',
+    'MRT': 'MR',
+    'MS': 'MS',
+    'MSR': 'MS',
+    'MT': 'MT',
+    'MTQ': 'MQ',
+    'MU': 'MU',
+    'MUS': 'MU',
+    'MV': 'MV',
+    'MW': 'MW',
+    'MWI': 'MW',
+    'MX': 'MX',
+    'MY': 'MY',
+    'MYS': 'MY',
+    'MYT': 'YT',
+    'MZ': 'MZ',
+    'Macau': 'MO',
+    'Macau SAR': 'MO',
+    'Macedonia': 'MK',
+    'Madagascar': 'MG',
+    'Malawi': 'MW',
+    'Malaysia': 'MY',
+    'Maldives': 'MV',
+    'Mali': 'ML',
+    'Malta': 'MT',
+    'Marshall Islands': 'MH',
+    'Martinique': 'MQ',
+    'Mauritania': 'MR',
+    'Mauritius': 'MU',
+    'Mayotte': 'YT',
+    'Mexico': 'MX',
+    'Micronesia, Fed. Sts.': 'FM',
+    'Moldova': 'MD',
+    'Moldova, Republic of': 'MD',
+    'Monaco': 'MC',
+    'Mongolia': 'MN',
+    'Montenegro': 'ME',
+    'Montserrat': 'MS',
+    'Morocco': 'MA',
+    'Mozambique': 'MZ',
+    'Myanmar': 'MM',
+    'NA': 'NA',
+    'NAM': 'NA',
+    'NC': 'NC',
+    'NCL': 'NC',
+    'NE': 'NE',
+    'NER': 'NE',
+    'NF': 'NF',
+    'NFK': 'NF',
+    'NG': 'NG',
+    'NGA': 'NG',
+    'NI': 'NI',
+    'NIC': 'NI',
+    'NIU': 'NU',
+    'NL': 'NL',
+    'NLD': 'NL',
+    'NO': 'NO',
+    'NOR': 'NO',
+    'NP': 'NP',
+    'NPL': 'NP',
+    'NR': 'NR',
+    'NRU': 'NR',
+    'NU': 'NU',
+    'NZ': 'NZ',
+    'NZL': 'NZ',
+    'Namibia': 'NA',
+    'Nation of Brunei, Abode of Peace': 'BN',
+    'Nauru': 'NR',
+    'Nepal': 'NP',
+    'Netherlands': 'NL',
+    'New Caledonia': 'NC',
+    'New Zealand': 'NZ',
+    'Nicaragua': 'NI',
+    'Niger': 'NE',
+    'Nigeria': 'NG',
+    'Niue': 'NU',
+    'Norfolk Island': 'NF',
+    'North Korea': 'KP',
+    'North Macedonia': 'MK',
+    'Northern Mariana Islands': 'MP',
+    'Norway': 'NO',
+    'OM': 'OM',
+    'OMN': 'OM',
+    'Oman': 'OM',
+    'Oriental Republic of Uruguay': 'UY',
+    'PA': 'PA',
+    'PAK': 'PK',
+    'PAN': 'PA',
+    'PCN': 'PN',
+    'PE': 'PE',
+    'PER': 'PE',
+    'PF': 'PF',
+    'PG': 'PG',
+    'PH': 'PH',
+    'PHL': 'PH',
+    'PK': 'PK',
+    'PL': 'PL',
+    'PLW': 'PW',
+    'PM': 'PM',
+    'PN': 'PN',
+    'PNG': 'PG',
+    'POL': 'PL',
+    'PR': 'PR',
+    'PRI': 'PR',
+    'PRK': 'KP',
+    'PRT': 'PT',
+    'PRY': 'PY',
+    'PS': 'PS',
+    'PSE': 'PS',
+    'PT': 'PT',
+    'PW': 'PW',
+    'PY': 'PY',
+    'PYF': 'PF',
+    'Pakistan': 'PK',
+    'Palau': 'PW',
+    'Palestine': 'PS',
+    'Palestinian Territories': 'PS',
+    'Panama': 'PA',
+    'Papua New Guinea': 'PG',
+    'Paraguay': 'PY',
+    "People's Democratic Republic of Algeria": 'DZ',
+    "People's Republic of Bangladesh": 'BD',
+    "People's Republic of China": 'CN',
+    'Peru': 'PE',
+    'Philippines': 'PH',
+    'Pitcairn': 'PN',
+    'Plurinational State of Bolivia': 'BO',
+    'Poland': 'PL',
+    'Portugal': 'PT',
+    'Portuguese Republic': 'PT',
+    'Principality of Andorra': 'AD',
+    'Principality of Liechtenstein': 'LI',
+    'Principality of Monaco': 'MC',
+    'Puerto Rico': 'PR',
+    'QA': 'QA',
+    'QAT': 'QA',
+    'Qatar': 'QA',
+    'RE': 'RE',
+    'REU': 'RE',
+    'RO': 'RO',
+    'ROU': 'RO',
+    'RS': 'RS',
+    'RU': 'RU',
+    'RUS': 'RU',
+    'RW': 'RW',
+    'RWA': 'RW',
+    'Republic of Albania': 'AL',
+    'Republic of Angola': 'AO',
+    'Republic of Armenia': 'AM',
+    'Republic of Austria': 'AT',
+    'Republic of Azerbaijan': 'AZ',
+    'Republic of Belarus': 'BY',
+    'Republic of Benin': 'BJ',
+    'Republic of Botswana': 'BW',
+    'Republic of Bulgaria': 'BG',
+    'Republic of Burundi': 'BI',
+    'Republic of Cabo Verde': 'CV',
+    'Republic of Cameroon': 'CM',
+    'Republic of Chad': 'TD',
+    'Republic of Chile': 'CL',
+    'Republic of China': 'TW',
+    'Republic of Colombia': 'CO',
+    'Republic of Costa Rica': 'CR',
+    'Republic of Croatia': 'HR',
+    'Republic of Cuba': 'CU',
+    'Republic of Cyprus': 'CY',
+    "Republic of Côte d'Ivoire": 'CI',
+    'Republic of Djibouti': 'DJ',
+    'Republic of Ecuador': 'EC',
+    'Republic of El Salvador': 'SV',
+    'Republic of Equatorial Guinea': 'GQ',
+    'Republic of Estonia': 'EE',
+    'Republic of Fiji': 'FJ',
+    'Republic of Finland': 'FI',
+    'Republic of Ghana': 'GH',
+    'Republic of Guatemala': 'GT',
+    'Republic of Guinea': 'GN',
+    'Republic of Guinea-Bissau': 'GW',
+    'Republic of Haiti': 'HT',
+    'Republic of Honduras': 'HN',
+    'Republic of Hungary': 'HU',
+    'Republic of Iceland': 'IS',
+    'Republic of India': 'IN',
+    'Republic of Indonesia': 'ID',
+    'Republic of Iraq': 'IQ',
+    'Republic of Kazakhstan': 'KZ',
+    'Republic of Kenya': 'KE',
+    'Republic of Kiribati': 'KI',
+    'Republic of Korea': 'KR',
+    'Republic of Kosovo': 'XK',
+    'Republic of Latvia': 'LV',
+    'Republic of Liberia': 'LR',
+    'Republic of Lithuania': 'LT',
+    'Republic of Madagascar': 'MG',
+    'Republic of Malawi': 'MW',
+    'Republic of Maldives': 'MV',
+    'Republic of Mali': 'ML',
+    'Republic of Malta': 'MT',
+    'Republic of Mauritius': 'MU',
+    'Republic of Moldova': 'MD',
+    'Republic of Mozambique': 'MZ',
+    'Republic of Namibia': 'NA',
+    'Republic of Nauru': 'NR',
+    'Republic of Nicaragua': 'NI',
+    'Republic of Niger': 'NE',
+    'Republic of North Macedonia': 'MK',
+    'Republic of Palau': 'PW',
+    'Republic of Panama': 'PA',
+    'Republic of Paraguay': 'PY',
+    'Republic of Peru': 'PE',
+    'Republic of Poland': 'PL',
+    'Republic of Rwanda': 'RW',
+    'Republic of San Marino': 'SM',
+    'Republic of Senegal': 'SN',
+    'Republic of Serbia': 'RS',
+    'Republic of Seychelles': 'SC',
+    'Republic of Sierra Leone': 'SL',
+    'Republic of Singapore': 'SG',
+    'Republic of Slovenia': 'SI',
+    'Republic of South Africa': 'ZA',
+    'Republic of South Sudan': 'SS',
+    'Republic of Suriname': 'SR',
+    'Republic of Tajikistan': 'TJ',
+    'Republic of Trinidad and Tobago': 'TT',
+    'Republic of Tunisia': 'TN',
+    'Republic of Türkiye': 'TR',
+    'Republic of Uganda': 'UG',
+    'Republic of Uzbekistan': 'UZ',
+    'Republic of Vanuatu': 'VU',
+    'Republic of Yemen': 'YE',
+    'Republic of Zambia': 'ZM',
+    'Republic of Zimbabwe': 'ZW',
+    'Republic of the Congo': 'CG',
+    'Republic of the Gambia': 'GM',
+    'Republic of the Marshall Islands': 'MH',
+    'Republic of the Philippines': 'PH',
+    'Republic of the Sudan': 'SD',
+    'Republic of the Union of Myanmar': 'MM',
+    'Reunion': 'RE',
+    'Romania': 'RO',
+    'Russia': 'RU',
+    'Russian Federation': 'RU',
+    'Rwanda': 'RW',
+    'SA': 'SA',
+    'SAU': 'SA',
+    'SB': 'SB',
+    'SC': 'SC',
+    'SD': 'SD',
+    'SDN': 'SD',
+    'SE': 'SE',
+    'SEN': 'SN',
+    'SG': 'SG',
+    'SGP': 'SG',
+    'SGS': 'GS',
+    'SH': 'SH',
+    'SHN': 'SH',
+    'SI': 'SI',
+    'SJ': 'SJ',
+    'SJM': 'SJ',
+    'SK': 'SK',
+    'SL': 'SL',
+    'SLB': 'SB',
+    'SLE': 'SL',
+    'SLV': 'SV',
+    'SM': 'SM',
+    'SMR': 'SM',
+    'SN': 'SN',
+    'SO': 'SO',
+    'SOM': 'SO',
+    'SPM': 'PM',
+    'SR': 'SR',
+    'SRB': 'RS',
+    'SS': 'SS',
+    'SSD': 'SS',
+    'ST': 'ST',
+    'STP': 'ST',
+    'SUR': 'SR',
+    'SV': 'SV',
+    'SVK': 'SK',
+    'SVN': 'SI',
+    'SWE': 'SE',
+    'SWZ': 'SZ',
+    'SX': 'SX',
+    'SXM': 'SX',
+    'SY': 'SY',
+    'SYC': 'SC',
+    'SYR': 'SY',
+    'SZ': 'SZ',
+    'Saint Helena, Ascension and Tristan da Cunha': 'SH',
+    'Saint Kitts and Nevis': 'KN',
+    'Saint Lucia': 'LC',
+    'Saint Pierre and Miquelon': 'PM',
+    'Saint Vincent and the Grenadines': 'VC',
+    'Saint-Martin': 'MF',
+    'Saint-Martin (French part)': 'MF',
+    'Samoa': 'WS',
+    'San Marino': 'SM',
+    'Sao Tome and Principe': 'ST',
+    'Saudi Arabia': 'SA',
+    'Senegal': 'SN',
+    'Serbia': 'RS',
+    'Seychelles': 'SC',
+    'Sierra Leone': 'SL',
+    'Singapore': 'SG',
+    'Sint Maarten': 'SX',
+    'Sint Maarten (Dutch part)': 'SX',
+    'Slovak Republic': 'SK',
+    'Slovakia': 'SK',
+    'Slovenia': 'SI',
+    'Socialist Republic of Vietnam': 'VN',
+    'Solomon Islands': 'SB',
+    'Somalia': 'SO',
+    'South Africa': 'ZA',
+    'South Georgia and South Sandwich Is.': 'GS',
+    'South Georgia and The South Sandwich Islands': 'GS',
+    'South Korea': 'KR',
+    'South Sudan': 'SS',
+    'Spain': 'ES',
+    'Sri Lanka': 'LK',
+    'St. Barths': 'BL',
+    'St. Helena': 'SH',
+    'St. Kitts and Nevis': 'KN',
+    'St. Lucia': 'LC',
+    'St. Pierre and Miquelon': 'PM',
+    'St. Vincent and the Grenadines': 'VC',
+    'State of Eritrea': 'ER',
+    'State of Israel': 'IL',
+    'State of Kuwait': 'KW',
+    'State of Libya': 'LY',
+    'State of Palestine': 'PS',
+    'State of Qatar': 'QA',
+    'Sudan': 'SD',
+    'Sultanate of Oman': 'OM',
+    'Suriname': 'SR',
+    'Svalbard and Jan Mayen Islands': 'SJ',
+    'Sweden': 'SE',
+    'Swiss Confederation': 'CH',
+    'Switzerland': 'CH',
+    'Syria': 'SY',
+    'Syrian Arab Republic': 'SY',
+    'TC': 'TC',
+    'TCA': 'TC',
+    'TCD': 'TD',
+    'TD': 'TD',
+    'TF': 'TF',
+    'TG': 'TG',
+    'TGO': 'TG',
+    'TH': 'TH',
+    'THA': 'TH',
+    'TJ': 'TJ',
+    'TJK': 'TJ',
+    'TK': 'TK',
+    'TKL': 'TK',
+    'TKM': 'TM',
+    'TL': 'TL',
+    'TLS': 'TL',
+    'TM': 'TM',
+    'TN': 'TN',
+    'TO': 'TO',
+    'TON': 'TO',
+    'TR': 'TR',
+    'TT': 'TT',
+    'TTO': 'TT',
+    'TUN': 'TN',
+    'TUR': 'TR',
+    'TUV': 'TV',
+    'TV': 'TV',
+    'TW': 'TW',
+    'TWN': 'TW',
+    'TZ': 'TZ',
+    'TZA': 'TZ',
+    'Taiwan': 'TW',
+    'Tajikistan': 'TJ',
+    'Tanzania': 'TZ',
+    'Territorial collectivity of Saint-Barthélemy': 'BL',
+    'Territory of Heard Island and McDonald Islands': 'HM',
+    'Territory of the Cocos (Keeling) Islands': 'CC',
+    'Territory of the French Southern and Antarctic Lands': 'TF',
+    'Thailand': 'TH',
+    'Timor-Leste': 'TL',
+    'Togo': 'TG',
+    'Togolese Republic': 'TG',
+    'Tokelau': 'TK',
+    'Tonga': 'TO',
+    'Trinidad and Tobago': 'TT',
+    'Tunisia': 'TN',
+    'Turkey': 'TR',
+    'Turkmenistan': 'TM',
+    'Turks and Caicos Islands': 'TC',
+    'Tuvalu': 'TV',
+    'Türkiye': 'TR',
+    'UA': 'UA',
+    'UG': 'UG',
+    'UGA': 'UG',
+    'UK': 'GB',
+    'UKR': 'UA',
+    'UM': 'UM',
+    'UMI': 'UM',
+    'URY': 'UY',
+    'US': 'US',
+    'USA': 'US',
+    'UY': 'UY',
+    'UZ': 'UZ',
+    'UZB': 'UZ',
+    'Uganda': 'UG',
+    'Ukraine': 'UA',
+    'Union of the Comoros': 'KM',
+    'United Arab Emirates': 'AE',
+    'United Kingdom': 'GB',
+    'United Kingdom of Great Britain and Northern Ireland': 'GB',
+    'United Mexican States': 'MX',
+    'United Republic of Tanzania': 'TZ',
+    'United States': 'US',
+    'United States Minor Outlying Islands': 'UM',
+    'United States Virgin Islands': 'VI',
+    'United States of America': 'US',
+    'Uruguay': 'UY',
+    'Uzbekistan': 'UZ',
+    'VA': 'VA',
+    'VAT': 'VA',
+    'VC': 'VC',
+    'VCT': 'VC',
+    'VE': 'VE',
+    'VEN': 'VE',
+    'VG': 'VG',
+    'VGB': 'VG',
+    'VI': 'VI',
+    'VIR': 'VI',
+    'VN': 'VN',
+    'VNM': 'VN',
+    'VU': 'VU',
+    'VUT': 'VU',
+    'Vanuatu': 'VU',
+    'Vatican': 'VA',
+    'Vatican City State': 'VA',
+    'Venezuela': 'VE',
+    'Viet Nam': 'VN',
+    'Vietnam': 'VN',
+    'Virgin Islands of the United States': 'VI',
+    'Virgin Islands, British': 'VG',
+    'Virgin Islands, U.S.': 'VI',
+    'WF': 'WF',
+    'WLF': 'WF',
+    'WS': 'WS',
+    'WSM': 'WS',
+    'Wallis and Futuna Islands': 'WF',
+    'Western Sahara': 'EH',
+    'XK': 'XK',
+    'XKX': 'XK',
+    'YE': 'YE',
+    'YEM': 'YE',
+    'YT': 'YT',
+    'Yemen': 'YE',
+    'ZA': 'ZA',
+    'ZAF': 'ZA',
+    'ZM': 'ZM',
+    'ZMB': 'ZM',
+    'ZW': 'ZW',
+    'ZWE': 'ZW',
+    'Zambia': 'ZM',
+    'Zimbabwe': 'ZW',
+    'Åland Islands': 'AX',
+}
+
+ISO2_CODES = frozenset(COUNTRY_ISO2.values())
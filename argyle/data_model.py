@@ -1,7 +1,12 @@
 from pydantic import BaseModel, validator
-import uuid
 import re
+import uuid
 from typing import Optional
+from normalization import is_e164, is_iso2
+
+UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+# Value the parser fills the fields it did not find with
+MISSING = "No available information."
 
 
 class CountryFormatError(Exception):
@@ -15,6 +20,17 @@ class CountryFormatError(Exception):
         super().__init__(message)
 
 
+class InvalidUUID(Exception):
+    """
+    Custom error raised when the id or account is not a UUID
+    """
+
+    def __init__(self, value: str, message: str) -> None:
+        self.value = value
+        self.message = message
+        super().__init__(message)
+
+
 class InvalidPhoneNumber(Exception):
     """
     Custom error raised when the phone number is not in E.164 format
@@ -26,6 +42,20 @@ class InvalidPhoneNumber(Exception):
         super().__init__(message)
 
 
+def is_uuid(value) -> bool:
+    """
+    Check the value is a UUID. The canonical form is matched with a regex,
+    anything else goes through uuid.UUID, which also takes braces and urn prefixes.
+    """
+    if isinstance(value, str) and UUID_PATTERN.match(value):
+        return True
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
 class Address(BaseModel):
     line1: str
     line2: str
@@ -35,14 +65,14 @@ class Address(BaseModel):
     country: str
 
     @validator("country")
-    def valid_country_name_format(cls, value: str) -> bool:
+    def valid_country_name_format(cls, value: str) -> str:
         """
         Validator that checks if country value is in ISO 3166-1 alpha-2 format
         """
-        if len(value) > 2:
+        if not is_iso2(value):
             raise CountryFormatError(value=value,
                                      message="Invalid value format for field Country")
-        return True
+        return value
 
 
 class UpworkUser(BaseModel):
@@ -65,19 +95,19 @@ class UpworkUser(BaseModel):
     updated_at: str
 
     @validator('id', 'account')
-    def is_valid_uuid(cls, value: str) -> bool:
+    def is_valid_uuid(cls, value: str) -> str:
         """
-        Validator that checks if the value is a valid UUID.
+        Validator that checks if the value is a valid UUID. The parser fills the ids
+        missing from the pages with the MISSING placeholder, which is let through
+        (batch_validation reports it with strict_uuid).
         """
-        try:
-            uuid.UUID(str(value))
-            return True
-        except ValueError:
-            return False
+        if value != MISSING and not is_uuid(value):
+            raise InvalidUUID(value=value, message="Invalid UUID")
+        return value
 
     @validator('phone_number')
-    def is_phone_number_valid(cls, value: str) -> bool:
-        if not re.search(r"^\+[1-9]\d{1,14}$", value):
+    def is_phone_number_valid(cls, value: str) -> str:
+        if not is_e164(value):
             raise InvalidPhoneNumber(value=value,
                                      message="Phone number is not in E.164 format")
-        return True
+        return value
@@ -0,0 +1,163 @@
+from parsel.csstranslator import HTMLTranslator
+from parsel import Selector
+
+_translator = HTMLTranslator()
+
+
+def css_to_xpath(css: str, prefix: str = "descendant-or-self::") -> str:
+    """
+    Translate a CSS selector, with the ::text and ::attr() extensions, to XPath.
+    """
+    return _translator.css_to_xpath(css, prefix=prefix)
+
+
+def strip_text(value: str) -> str:
+    """
+    Default post-processing step, strips the whitespace around the value.
+    """
+    return value.strip()
+
+
+def strip_all(values: list) -> list:
+    """
+    Post-processing step for fields that collect more than one value.
+    """
+    return [value.strip() for value in values]
+
+
+def keep_raw(value: str) -> str:
+    """
+    Post-processing step that leaves the value untouched.
+    """
+    return value
+
+
+class MissingFieldsError(Exception):
+    """
+    Custom error raised when required fields could not be found on the page
+    """
+
+    def __init__(self, value: list, message: str) -> None:
+        self.value = value
+        self.message = message
+        super().__init__(message)
+
+
+class FieldSpec:
+    """
+    Describes a single field of a page: the CSS selector that finds it, the anchor
+    it is relative to and the post-processing step applied to the raw value.
+    The selector is translated to XPath once, when the spec is created.
+    """
+
+    def __init__(self, name: str, css: str, post=strip_text, anchor: str = None,
+                 many: bool = False, required: bool = True) -> None:
+        self.name = name
+        self.css = css
+        self.post = post
+        self.anchor = anchor
+        self.many = many
+        self.required = required
+        # Fields under an anchor are direct children of the anchor nodes
+        prefix = "child::" if anchor else "descendant-or-self::"
+        self.xpath = css_to_xpath(css, prefix=prefix)
+
+
+class ExtractionResult:
+    """
+    Values extracted from a page together with the fields that were found or missing.
+    """
+
+    def __init__(self, page: str, values: dict, extracted: list, missing: list) -> None:
+        self.page = page
+        self.values = values
+        self.extracted = extracted
+        self.missing = missing
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def raise_for_missing(self, required: list) -> None:
+        """
+        Method to raise an error if any of the required fields are missing.
+        """
+        missing = [name for name in self.missing if name in required]
+        if missing:
+            raise MissingFieldsError(value=missing,
+                                     message=f"Missing fields on {self.page}: {', '.join(missing)}")
+
+    def as_dict(self) -> dict:
+        return {
+            "page": self.page,
+            "extracted": self.extracted,
+            "missing": self.missing
+        }
+
+
+class ExtractionPlan:
+    """
+    Table of field specs for one page. Anchors are shared subtrees that are located
+    once per page, fields declared under them are only searched inside those nodes.
+    """
+
+    def __init__(self, page: str, fields: list, anchors: dict = None) -> None:
+        self.page = page
+        self.fields = fields
+        self.anchor_css = anchors or {}
+        self.anchors = {name: css_to_xpath(css)
+                        for name, css in self.anchor_css.items()}
+        self.required = [field.name for field in fields if field.required]
+
+    def browser_spec(self) -> dict:
+        """
+        The compiled plan as plain data, to evaluate it inside the browser page.
+        """
+        return {
+            "anchors": self.anchors,
+            "fields": [{"name": field.name, "xpath": field.xpath,
+                        "anchor": field.anchor, "many": field.many}
+                       for field in self.fields]
+        }
+
+    def extract(self, html_body: str, backend=None) -> ExtractionResult:
+        """
+        Method to run every field of the plan over the html body in a single pass,
+        with parsel or with one of the html_backends.
+        """
+        if backend is None:
+            return self.build(self.raw_values(Selector(text=html_body)))
+        return self.build(backend.raw_values(self, html_body))
+
+    def raw_values(self, selector: Selector) -> dict:
+        """
+        Method to collect the raw matches of every field, before post-processing.
+        """
+        scopes = {name: selector.xpath(xpath) for name, xpath in self.anchors.items()}
+        raw = {}
+        for field in self.fields:
+            scope = scopes[field.anchor] if field.anchor else selector
+            matches = scope.xpath(field.xpath)
+            if field.many:
+                raw[field.name] = matches.getall()
+            else:
+                first = matches.get()
+                raw[field.name] = [first] if first is not None else []
+        return raw
+
+    def build(self, raw: dict) -> ExtractionResult:
+        """
+        Method to apply the post-processing steps to the raw matches.
+        """
+        values = {}
+        extracted = []
+        missing = []
+        for field in self.fields:
+            matches = raw.get(field.name) or []
+            if not matches:
+                values[field.name] = [] if field.many else None
+                missing.append(field.name)
+                continue
+            values[field.name] = field.post(matches if field.many else matches[0])
+            extracted.append(field.name)
+        return ExtractionResult(self.page, values, extracted, missing)
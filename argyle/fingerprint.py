@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+from field_spec import ExtractionResult, css_to_xpath
+from parsel import Selector
+
+# DOM regions that hold every field the parser reads on each page
+REGIONS = {
+    "parse_homepage": 'div[data-test="sidebar"]',
+    "parse_profile_data": 'div[data-qa-profile-viewer-uid]',
+    "parse_contact_info_data": 'main',
+}
+_REGION_XPATHS = {page_type: css_to_xpath(css) for page_type, css in REGIONS.items()}
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "fingerprints")
+
+
+def fingerprint(html_body, page_type: str) -> Optional[str]:
+    """
+    Hash of the text and image sources of the page region. In browser extraction
+    mode there is no body and the extracted values are hashed instead.
+    Returns None when the region is not on the page.
+    """
+    if isinstance(html_body, ExtractionResult):
+        content = json.dumps(html_body.values, sort_keys=True)
+    else:
+        region = Selector(text=html_body).xpath(_REGION_XPATHS[page_type])
+        if not region:
+            return None
+        texts = [" ".join(text.split()) for text in region.xpath(".//text()").getall()]
+        sources = region.xpath(".//img/@src").getall()
+        content = "\n".join(text for text in texts + sources if text)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Last fingerprints of the pages of every account, with the re-scan schedule:
+    the interval doubles every time nothing changed and goes back to the minimum
+    when something did.
+    """
+
+    def __init__(self, path: str = None, min_interval: float = 3600,
+                 max_interval: float = 7 * 24 * 3600) -> None:
+        self.path = path or DEFAULT_PATH
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        os.makedirs(self.path, exist_ok=True)
+
+    def path_for(self, account: str) -> str:
+        digest = hashlib.sha256(account.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+    def load(self, account: str) -> dict:
+        try:
+            with open(self.path_for(account)) as infile:
+                return json.load(infile)
+        except (FileNotFoundError, ValueError):
+            return {"fingerprints": {}, "interval": self.min_interval, "next_due": 0}
+
+    def matches(self, account: str, page_type: str, value: Optional[str]) -> bool:
+        """
+        Method to check if the page is the same as on the last successful scan.
+        """
+        return value is not None and self.load(account)["fingerprints"].get(page_type) == value
+
+    def is_due(self, account: str, now: float = None) -> bool:
+        return (time.time() if now is None else now) >= self.load(account)["next_due"]
+
+    def record_scan(self, account: str, fingerprints: dict, changed: bool,
+                    now: float = None) -> dict:
+        """
+        Method to save the fingerprints of a successful scan and schedule the next one.
+        """
+        state = self.load(account)
+        state["fingerprints"].update(fingerprints)
+        if changed:
+            state["interval"] = self.min_interval
+        else:
+            state["interval"] = min(state["interval"] * 2, self.max_interval)
+        state["next_due"] = (time.time() if now is None else now) + state["interval"]
+        tmp_path = f"{self.path_for(account)}.tmp"
+        with open(tmp_path, "w") as outfile:
+            outfile.write(json.dumps(state))
+        os.replace(tmp_path, self.path_for(account))
+        return state
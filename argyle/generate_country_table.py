@@ -0,0 +1,59 @@
+"""
+Build time script that generates country_table.py from country_converter.
+Every name is run through coco.convert and only kept when it converts to a single
+ISO2 code, so the table returns exactly what country_converter returns.
+
+    python generate_country_table.py
+"""
+import country_converter as coco
+
+# Country names as shown on Upwork profiles that are not a short/official name in coco
+ALIASES = [
+    "Bolivia", "Bosnia and Herzegovina", "Brunei Darussalam", "Cape Verde",
+    "Congo", "Congo, the Democratic Republic of the", "Cote d'Ivoire", "Czech Republic",
+    "Hong Kong", "Iran", "Korea, Republic of", "Lao People's Democratic Republic",
+    "Macedonia", "Moldova, Republic of", "Palestinian Territories", "Russia",
+    "Russian Federation", "Syria", "Taiwan", "Tanzania", "Turkey", "Türkiye",
+    "United Kingdom", "United States", "United States Minor Outlying Islands",
+    "Venezuela", "Viet Nam", "Vietnam", "Virgin Islands, British",
+    "Virgin Islands, U.S.",
+]
+
+HEADER = '''"""
+Country name -> ISO 3166-1 alpha-2 table generated by generate_country_table.py
+from country_converter {version}. Do not edit by hand.
+"""
+
+'''
+
+
+def build_table() -> dict:
+    converter = coco.CountryConverter()
+    candidates = set(ALIASES)
+    for column in ["name_short", "name_official", "ISO2", "ISO3"]:
+        for value in converter.data[column]:
+            # A few codes are stored as regexes, like "^GB$|^UK$"
+            candidates.update(part.strip("^$") for part in str(value).split("|")
+                              if str(value) != "nan")
+
+    table = {}
+    for name in sorted(candidates):
+        iso2 = coco.convert(names=name, to="ISO2")
+        if isinstance(iso2, str) and iso2 != "not found":
+            table[name] = iso2
+    return table
+
+
+def main(path: str = "country_table.py"):
+    table = build_table()
+    with open(path, "w", encoding="utf-8") as outfile:
+        outfile.write(HEADER.format(version=getattr(coco, "__version__", "")))
+        outfile.write("COUNTRY_ISO2 = {\n")
+        for name, iso2 in sorted(table.items()):
+            outfile.write(f"    {name!r}: {iso2!r},\n")
+        outfile.write("}\n\nISO2_CODES = frozenset(COUNTRY_ISO2.values())\n")
+    print(f"Wrote {len(table)} names to {path}")
+
+
+if __name__ == "__main__":
+    main()
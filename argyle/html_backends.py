@@ -0,0 +1,200 @@
+"""
+HTML backends the extraction plans run on. Every backend returns the raw matches
+of every field of a plan (before post-processing), the same way for all of them:
+
+- "parsel": parsel Selector, the selector library Scrapy is built on.
+- "scrapy": scrapy.Selector, only if Scrapy is installed.
+- "lxml": lxml tree with the plan XPaths compiled once per thread.
+- "selectolax": selectolax (Lexbor) CSS engine, only if selectolax is installed.
+"""
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+
+# "::text" and "::attr(name)" CSS extensions, as translated by parsel
+PSEUDO_PATTERN = re.compile(r"^(?P<css>.*?)(?:::(?P<text>text)|::attr\((?P<attr>[^)]+)\))?$")
+
+
+class HtmlBackend(ABC):
+    """
+    Runs the fields of an extraction plan over an html body.
+    """
+    name = None
+
+    @abstractmethod
+    def raw_values(self, plan, html_body: str) -> dict:
+        """
+        Raw matches of every field of the plan, by field name.
+        """
+
+
+class ParselBackend(HtmlBackend):
+    name = "parsel"
+
+    def selector(self, html_body: str):
+        from parsel import Selector
+        return Selector(text=html_body)
+
+    def raw_values(self, plan, html_body: str) -> dict:
+        return plan.raw_values(self.selector(html_body))
+
+
+class ScrapyBackend(ParselBackend):
+    """
+    The original Scrapy Selector, kept to compare with. It loads Scrapy and Twisted.
+    """
+    name = "scrapy"
+
+    def __init__(self) -> None:
+        from scrapy import Selector
+        self.selector_cls = Selector
+
+    def selector(self, html_body: str):
+        return self.selector_cls(text=html_body)
+
+
+class LxmlBackend(HtmlBackend):
+    """
+    Plain lxml, parsed like parsel does it. The XPaths of a plan are compiled on its
+    first page, per thread since the lxml parsers are not shared between threads.
+    """
+    name = "lxml"
+
+    def __init__(self) -> None:
+        from lxml import etree, html
+        self.etree = etree
+        self.parser_cls = html.HTMLParser
+        self.local = threading.local()
+
+    def state(self):
+        if not hasattr(self.local, "plans"):
+            self.local.plans = {}
+            self.local.parser = self.parser_cls(recover=True, encoding="utf-8", huge_tree=True)
+        return self.local
+
+    def compile(self, plan) -> tuple:
+        compile_xpath = self.etree.XPath
+        anchors = {name: compile_xpath(xpath, smart_strings=False)
+                   for name, xpath in plan.anchors.items()}
+        fields = [(field, compile_xpath(field.xpath, smart_strings=False))
+                  for field in plan.fields]
+        return anchors, fields
+
+    def root(self, html_body: str, parser):
+        body = html_body.strip().replace("\x00", "").encode("utf-8") or b"<html/>"
+        root = self.etree.fromstring(body, parser=parser)
+        if root is None:
+            root = self.etree.fromstring(b"<html/>", parser=parser)
+        return root
+
+    def serialize(self, match) -> str:
+        if isinstance(match, str):
+            return str(match)
+        return self.etree.tostring(match, method="html", encoding="unicode", with_tail=False)
+
+    def raw_values(self, plan, html_body: str) -> dict:
+        state = self.state()
+        compiled = state.plans.get(plan)
+        if compiled is None:
+            compiled = state.plans[plan] = self.compile(plan)
+        anchors, fields = compiled
+        root = self.root(html_body, state.parser)
+        scopes = {name: xpath(root) for name, xpath in anchors.items()}
+        raw = {}
+        for field, xpath in fields:
+            if field.anchor:
+                matches = [match for node in scopes[field.anchor] for match in xpath(node)]
+            else:
+                matches = xpath(root)
+            if not field.many:
+                matches = matches[:1]
+            raw[field.name] = [self.serialize(match) for match in matches]
+        return raw
+
+
+class SelectolaxBackend(HtmlBackend):
+    """
+    Lexbor CSS engine. It has no XPath, so the plan CSS is used directly: the
+    ::text/::attr() extensions are applied to the matched nodes and anchored fields
+    are joined to their anchor with a child combinator.
+    """
+    name = "selectolax"
+
+    def __init__(self) -> None:
+        from selectolax.lexbor import LexborHTMLParser
+        self.parser_cls = LexborHTMLParser
+        self.plans = {}
+
+    @staticmethod
+    def field_css(field, anchors: dict) -> tuple:
+        parts = PSEUDO_PATTERN.match(field.css.strip())
+        css = parts.group("css")
+        if field.anchor:
+            css = ", ".join(f"{anchor.strip()} > {part.strip()}"
+                            for anchor in anchors[field.anchor].split(",")
+                            for part in css.split(","))
+        return css, "text" if parts.group("text") else parts.group("attr")
+
+    def compile(self, plan) -> list:
+        return [(field, *self.field_css(field, plan.anchor_css)) for field in plan.fields]
+
+    @staticmethod
+    def node_values(node, target) -> list:
+        if target is None:
+            return [node.html]
+        if target == "text":
+            return [child.text_content for child in node.iter(include_text=True)
+                    if child.tag == "-text"]
+        value = node.attributes.get(target)
+        return [] if value is None else [value]
+
+    def raw_values(self, plan, html_body: str) -> dict:
+        compiled = self.plans.get(plan)
+        if compiled is None:
+            compiled = self.plans[plan] = self.compile(plan)
+        tree = self.parser_cls(html_body)
+        raw = {}
+        for field, css, target in compiled:
+            matches = []
+            for node in tree.css(css):
+                matches.extend(self.node_values(node, target))
+                if matches and not field.many:
+                    break
+            raw[field.name] = matches if field.many else matches[:1]
+        return raw
+
+
+BACKENDS = {backend.name: backend for backend in
+            [ParselBackend, ScrapyBackend, LxmlBackend, SelectolaxBackend]}
+# lxml comes with parsel, selectolax is an optional dependency and opt-in
+DEFAULT_BACKEND = "lxml"
+_instances = {}
+
+
+def get_backend(name: str = None) -> HtmlBackend:
+    """
+    Shared instance of the backend named in the argument or in ARGYLE_HTML_BACKEND,
+    otherwise of DEFAULT_BACKEND. Raises ImportError when the library of the
+    backend is not installed.
+    """
+    name = name or os.getenv("ARGYLE_HTML_BACKEND") or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown html backend {name}, choose one of {', '.join(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def available_backends() -> list:
+    """
+    Names of the backends whose library is installed.
+    """
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
@@ -0,0 +1,54 @@
+from urllib.parse import urljoin
+
+
+class AuthenticationRequired(Exception):
+    """
+    Custom error raised when the session cookies are no longer accepted
+    """
+
+    def __init__(self, value: str, message: str) -> None:
+        self.value = value
+        self.message = message
+        super().__init__(message)
+
+
+class HttpFetcher:
+    """
+    Keep-alive http client that reuses the cookies of an authenticated browser session,
+    to read the pages without rendering them in the browser.
+    """
+
+    def __init__(self, base_url: str, cookies: list, user_agent: str = None,
+                 pool_size: int = 10, timeout: float = 10) -> None:
+        self.base_url = base_url
+        self.timeout = timeout
+        # requests is only loaded when a fetcher is created
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=2, backoff_factor=0.3,
+                                                status_forcelist=[502, 503, 504]))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"],
+                                     domain=cookie.get("domain", ""),
+                                     path=cookie.get("path", "/"))
+
+    def fetch(self, path: str) -> str:
+        """
+        Method to get the html of a page, fails if the session was sent back to the login.
+        """
+        response = self.session.get(urljoin(self.base_url, path), timeout=self.timeout)
+        response.raise_for_status()
+        if "/account-security/login" in response.url:
+            raise AuthenticationRequired(value=path,
+                                         message=f"Session cookies were rejected for {path}")
+        return response.text
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,462 @@
+"""
+Queue of account scans shared by worker processes, on one host or several.
+
+    python job_queue.py enqueue accounts.json [--queue jobs.db]
+    python job_queue.py work --worker-id host-a --shards 0,1 --concurrency 4
+    python job_queue.py status
+
+Every account maps to one of a fixed number of shards. A worker claims the jobs
+of its own shards with a lease it extends by heartbeats while it scans, so the
+sessions and caches of an account stay warm on the worker that owns its shard.
+Jobs of other shards are only taken once they waited steal_after seconds.
+A job whose lease expired (the worker crashed) is queued again, failed scans are
+retried with backoff, and an account is never queued twice at the same time.
+The credentials are encrypted with the session key (SESSION_KEY), the workers
+on other hosts need the same key.
+
+The queue is a SQLite file. Locally it runs in WAL mode, with shared storage
+(--shared-storage) it uses the rollback journal, which only needs working file
+locks on the shared filesystem.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import List, NamedTuple, Optional
+from async_scanner import (AsyncUpworkScanner, BrowserPool, Credentials, ScanOptions,
+                           ScanResult, add_scan_arguments, load_credentials, scan_options)
+from checkpoint import RetryPolicy
+from config import configure
+from metrics import METRICS
+from output_sink import OutputSink, open_sink
+from session_store import SessionStore
+from upwork_parser import UpworkParser
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "jobs.db")
+DEFAULT_SHARDS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    credentials BLOB NOT NULL,
+    shard INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    not_before REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    error TEXT,
+    stats TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_account ON jobs (username)
+    WHERE state IN ('queued', 'leased');
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, shard, not_before);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (state, lease_expires_at);
+"""
+
+
+class Job(NamedTuple):
+    id: int
+    credentials: Credentials
+    shard: int
+    attempts: int
+
+
+def shard_of(username: str, shards: int) -> int:
+    digest = hashlib.sha256(username.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def parse_shards(value: str) -> Optional[List[int]]:
+    """
+    Shards of a worker from "0,1,4-7", None for all of them.
+    """
+    if not value:
+        return None
+    shards = []
+    for part in value.split(","):
+        start, _, end = part.partition("-")
+        shards.extend(range(int(start), int(end or start) + 1))
+    return shards
+
+
+class JobQueue:
+    """
+    SQLite queue of scan jobs with leases. Every call is one short transaction, so
+    any number of workers (threads, processes or hosts) can share the file.
+    """
+
+    def __init__(self, path: str = None, shards: int = DEFAULT_SHARDS, lease: float = 300,
+                 max_attempts: int = 3, retry_policy: RetryPolicy = None,
+                 session_store: SessionStore = None, shared_storage: bool = False,
+                 timeout: float = 30.0) -> None:
+        self.path = path or os.getenv("JOB_QUEUE", DEFAULT_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_policy = retry_policy or RetryPolicy(base_delay=30.0, max_delay=900.0)
+        # The credentials are encrypted with the key of the saved sessions
+        self.fernet = (session_store or SessionStore()).fernet
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(self.path, timeout=timeout,
+                                          check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(f"PRAGMA journal_mode={'DELETE' if shared_storage else 'WAL'}")
+        self.connection.executescript(SCHEMA)
+        # The number of shards is fixed when the queue is created
+        self.connection.execute("INSERT OR IGNORE INTO queue_meta VALUES ('shards', ?)",
+                                (str(shards),))
+        self.shards = int(self.connection.execute(
+            "SELECT value FROM queue_meta WHERE name = 'shards'").fetchone()[0])
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def enqueue(self, accounts: List[Credentials], now: float = None) -> int:
+        """
+        Method to queue the accounts, the ones already queued or being scanned are
+        skipped. Returns how many were queued.
+        """
+        now = time.time() if now is None else now
+        queued = 0
+        with self.transaction() as connection:
+            for account in accounts:
+                token = self.fernet.encrypt(json.dumps(account._asdict()).encode("utf-8"))
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO jobs (username, credentials, shard, state, "
+                    "max_attempts, not_before, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                    (account.username, token, shard_of(account.username, self.shards),
+                     self.max_attempts, now, now, now))
+                queued += cursor.rowcount
+        return queued
+
+    def expire_leases(self, connection, now: float) -> int:
+        """
+        Method to queue again the jobs of the workers that stopped heartbeating, or fail
+        them when their attempts are spent.
+        """
+        connection.execute(
+            "UPDATE jobs SET state = 'failed', lease_owner = NULL, updated_at = ?, "
+            "error = 'lease expired' WHERE state = 'leased' AND lease_expires_at < ? "
+            "AND attempts >= max_attempts", (now, now))
+        return connection.execute(
+            "UPDATE jobs SET state = 'queued', lease_owner = NULL, updated_at = ?, "
+            "error = 'lease expired' WHERE state = 'leased' AND lease_expires_at < ?",
+            (now, now)).rowcount
+
+    def claim(self, owner: str, limit: int = 1, shards: List[int] = None,
+              steal_after: float = 60.0, now: float = None) -> List[Job]:
+        """
+        Method to lease up to limit jobs: the oldest due jobs of the worker's shards
+        first, then the ones of other shards that waited longer than steal_after.
+        """
+        now = time.time() if now is None else now
+        shards = list(range(self.shards)) if shards is None else list(shards)
+        with self.transaction() as connection:
+            self.expire_leases(connection, now)
+            in_shards = ", ".join("?" for _ in shards) or "NULL"
+            rows = connection.execute(
+                f"SELECT id FROM jobs WHERE state = 'queued' AND not_before <= ? "
+                f"AND shard IN ({in_shards}) ORDER BY not_before, id LIMIT ?",
+                (now, *shards, limit)).fetchall()
+            if len(rows) < limit:
+                rows += connection.execute(
+                    f"SELECT id FROM jobs WHERE state = 'queued' AND not_before <= ? "
+                    f"AND shard NOT IN ({in_shards}) ORDER BY not_before, id LIMIT ?",
+                    (now - steal_after, *shards, limit - len(rows))).fetchall()
+            jobs = []
+            for row in rows:
+                connection.execute(
+                    "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (owner, now + self.lease, now, row["id"]))
+                job = connection.execute("SELECT * FROM jobs WHERE id = ?",
+                                         (row["id"],)).fetchone()
+                credentials = Credentials(**json.loads(self.fernet.decrypt(job["credentials"])))
+                jobs.append(Job(job["id"], credentials, job["shard"], job["attempts"]))
+        return jobs
+
+    def heartbeat(self, job_id: int, owner: str, now: float = None) -> bool:
+        """
+        Method to extend the lease of a job. False when the worker lost it, another
+        worker may be scanning the account already.
+        """
+        now = time.time() if now is None else now
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? "
+                "AND state = 'leased' AND lease_owner = ?",
+                (now + self.lease, now, job_id, owner)).rowcount == 1
+
+    def complete(self, job_id: int, owner: str, stats: dict = None,
+                 now: float = None) -> bool:
+        now = time.time() if now is None else now
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET state = 'done', lease_owner = NULL, updated_at = ?, "
+                "error = NULL, stats = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (now, json.dumps(stats or {}), job_id, owner)).rowcount == 1
+
+    def fail(self, job_id: int, owner: str, error: str, stats: dict = None,
+             now: float = None) -> Optional[str]:
+        """
+        Method to queue a failed job again after its backoff, or fail it for good when
+        its attempts are spent. Returns the new state, None if the lease was lost.
+        """
+        now = time.time() if now is None else now
+        with self.transaction() as connection:
+            job = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND state = 'leased' "
+                "AND lease_owner = ?", (job_id, owner)).fetchone()
+            if job is None:
+                return None
+            state = "failed" if job["attempts"] >= job["max_attempts"] else "queued"
+            connection.execute(
+                "UPDATE jobs SET state = ?, lease_owner = NULL, not_before = ?, updated_at = ?, "
+                "error = ?, stats = ? WHERE id = ?",
+                (state, now + self.retry_policy.delay(job["attempts"] - 1), now, error,
+                 json.dumps(stats or {}), job_id))
+        return state
+
+    def release(self, job_id: int, owner: str, now: float = None) -> bool:
+        """
+        Method to give a job back without counting the attempt, when a worker stops.
+        """
+        now = time.time() if now is None else now
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET state = 'queued', lease_owner = NULL, updated_at = ?, "
+                "attempts = attempts - 1 WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (now, job_id, owner)).rowcount == 1
+
+    def status(self) -> dict:
+        """
+        Method to count the jobs by state, and the queued ones by shard.
+        """
+        with self.lock:
+            states = dict(self.connection.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            shards = dict(self.connection.execute(
+                "SELECT shard, COUNT(*) FROM jobs WHERE state = 'queued' "
+                "GROUP BY shard").fetchall())
+            leases = [dict(row) for row in self.connection.execute(
+                "SELECT id, username, lease_owner, lease_expires_at, attempts FROM jobs "
+                "WHERE state = 'leased' ORDER BY id")]
+        return {"shards": self.shards, "states": states, "queued_by_shard": shards,
+                "leased": leases}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT on the queue connection, ROLLBACK on errors. The write
+    lock is taken up front, two workers never claim the same job.
+    """
+
+    def __init__(self, queue: JobQueue) -> None:
+        self.queue = queue
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.queue.lock.acquire()
+        try:
+            self.queue.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.queue.lock.release()
+            raise
+        return self.queue.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            self.queue.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.queue.lock.release()
+
+
+class QueueWorker:
+    """
+    Claims jobs of its shards and scans them on a warm browser pool, at most
+    concurrency at a time. The lease of every running job is extended every third
+    of the lease, a scan whose lease was lost is cancelled. Every account is scanned
+    with the options, like in scan_accounts.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str, shards: List[int] = None,
+                 concurrency: int = 4, pool: BrowserPool = None, sink: OutputSink = None,
+                 options: ScanOptions = None, poll_interval: float = 2.0,
+                 steal_after: float = 60.0) -> None:
+        self.queue = queue
+        self.worker_id = worker_id
+        self.shards = shards
+        self.concurrency = concurrency
+        self.pool = pool or BrowserPool(headless=True)
+        self.sink = sink
+        self.options = options or ScanOptions()
+        self.poll_interval = poll_interval
+        self.steal_after = steal_after
+        self.running = {}
+        self.done = 0
+        self.failed = 0
+
+    async def call(self, method, *args):
+        """
+        Method to run a queue call off the event loop, the file may be locked a while.
+        """
+        return await asyncio.get_event_loop().run_in_executor(None, method, *args)
+
+    async def run(self, max_jobs: int = None, stop_when_idle: bool = False):
+        """
+        Claim and scan jobs until max_jobs were scanned, or the queue is empty with
+        stop_when_idle. The scans still running when it is cancelled are cancelled,
+        and their jobs released once they stopped.
+        """
+        await self.pool.start()
+        claimed = 0
+        try:
+            while max_jobs is None or claimed < max_jobs:
+                free = self.concurrency - len(self.running)
+                if max_jobs is not None:
+                    free = min(free, max_jobs - claimed)
+                jobs = await self.call(self.queue.claim, self.worker_id, free, self.shards,
+                                       self.steal_after) if free > 0 else []
+                for job in jobs:
+                    self.running[job.id] = asyncio.ensure_future(self.scan(job))
+                claimed += len(jobs)
+                if not jobs and not self.running and stop_when_idle:
+                    break
+                if self.running:
+                    await asyncio.wait(list(self.running.values()), timeout=self.poll_interval,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                elif not jobs:
+                    await asyncio.sleep(self.poll_interval)
+            if self.running:
+                await asyncio.wait(list(self.running.values()))
+        finally:
+            # The scans must have stopped before their jobs are given back, another
+            # worker could claim the accounts right away
+            running = list(self.running.items())
+            for _, task in running:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in running), return_exceptions=True)
+            for job_id, _ in running:
+                await self.call(self.queue.release, job_id, self.worker_id)
+            await self.pool.stop()
+            if self.sink:
+                self.sink.flush()
+
+    async def scan(self, job: Job):
+        """
+        Method to scan the account of a job while heartbeating its lease.
+        """
+        scan = asyncio.ensure_future(self.scan_account(job.credentials))
+        interval = self.queue.lease / 3
+        try:
+            while True:
+                done, _ = await asyncio.wait({scan}, timeout=interval)
+                if done:
+                    break
+                if not await self.call(self.queue.heartbeat, job.id, self.worker_id):
+                    print(f"Lost the lease of job {job.id}, cancelling the scan.")
+                    METRICS.count("argyle_queue_jobs_total", outcome="lease_lost")
+                    return
+            try:
+                result = scan.result()
+            except Exception as err:
+                result = ScanResult(job.credentials.username, None, f"worker: {err}")
+            if result.data:
+                self.done += 1
+                await self.call(self.queue.complete, job.id, self.worker_id, result.stats)
+                METRICS.count("argyle_queue_jobs_total", outcome="done")
+            else:
+                self.failed += 1
+                state = await self.call(self.queue.fail, job.id, self.worker_id,
+                                        result.error or "no data", result.stats)
+                METRICS.count("argyle_queue_jobs_total", outcome=state or "lease_lost")
+        finally:
+            # Cancelling this task does not reach the scan it waits on
+            if not scan.done():
+                scan.cancel()
+                await asyncio.gather(scan, return_exceptions=True)
+            self.running.pop(job.id, None)
+
+    async def scan_account(self, credentials: Credentials) -> ScanResult:
+        return await AsyncUpworkScanner(UpworkParser(self.sink), credentials, self.pool,
+                                        self.options).run()
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Distribute account scans between workers.")
+    args.add_argument("--queue", help="Queue file (default: JOB_QUEUE or ~/.cache/argyle/jobs.db)")
+    args.add_argument("--shards", type=int, default=DEFAULT_SHARDS,
+                      help="Number of shards, fixed when the queue is created")
+    args.add_argument("--shared-storage", action="store_true",
+                      help="The queue file is on storage shared between hosts")
+    commands = args.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="Queue the accounts of a json file")
+    enqueue.add_argument("accounts", help="Json file with the account credentials")
+    work = commands.add_parser("work", help="Scan the queued accounts")
+    work.add_argument("--worker-id", default=f"{os.uname().nodename}-{os.getpid()}")
+    work.add_argument("--worker-shards", help='Shards of this worker, like "0-3,8"')
+    work.add_argument("--concurrency", type=int, default=4)
+    work.add_argument("--browsers", type=int, default=1)
+    work.add_argument("--lease", type=float, default=300)
+    work.add_argument("--steal-after", type=float, default=60,
+                      help="Take jobs of other shards once they waited this long")
+    work.add_argument("--max-jobs", type=int)
+    work.add_argument("--until-empty", action="store_true", help="Stop when the queue is empty")
+    work.add_argument("--output", default="scan_results.jsonl")
+    add_scan_arguments(work)
+    commands.add_parser("status", help="Show the jobs by state and shard")
+    options = args.parse_args(argv)
+
+    configure()
+    session_store = SessionStore()
+    queue = JobQueue(options.queue, shards=options.shards, session_store=session_store,
+                     shared_storage=options.shared_storage,
+                     lease=getattr(options, "lease", 300))
+    try:
+        if options.command == "enqueue":
+            accounts = load_credentials(options.accounts)
+            print(f"Queued {queue.enqueue(accounts)} of {len(accounts)} accounts.")
+            return 0
+        if options.command == "status":
+            print(json.dumps(queue.status(), indent=2))
+            return 0
+        sink = open_sink(options.output)
+        worker = QueueWorker(
+            queue, options.worker_id, parse_shards(options.worker_shards),
+            concurrency=options.concurrency, pool=BrowserPool(size=options.browsers),
+            sink=sink, options=scan_options(options, options.concurrency)._replace(
+                session_store=None if options.no_session_cache else session_store),
+            steal_after=options.steal_after)
+        try:
+            asyncio.run(worker.run(options.max_jobs, options.until_empty))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
+            for path in METRICS.export():
+                print(f"Metrics written to {path}")
+        print(f"Worker {options.worker_id}: {worker.done} done, {worker.failed} failed.")
+        return 0 if worker.failed == 0 else 1
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+End-to-end load test of the scanner against the local replay server.
+
+    python load_test.py --accounts 20 --concurrency 4 --browsers 1 --output load.json
+
+Reports the successful scans per minute, the latency of every scan step and the
+memory (RSS) of the browser processes, sampled from /proc while the scans run.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from async_scanner import Credentials, ScanOptions, scan_accounts
+from metrics import METRICS, child_pids, rss_bytes
+from output_sink import NullSink
+from replay_server import ReplayServer
+
+
+class MemorySampler:
+    """
+    Samples the summed RSS of the child processes (the playwright driver and the
+    browsers) until it is stopped. The replay server process is left out.
+    """
+
+    def __init__(self, interval: float = 0.5, exclude: tuple = ()) -> None:
+        self.interval = interval
+        self.exclude = set(exclude)
+        self.samples = []
+        self.task = None
+
+    def sample(self) -> int:
+        return sum(rss_bytes(pid) for pid in child_pids(os.getpid())
+                   if pid not in self.exclude)
+
+    async def run(self):
+        while True:
+            self.samples.append(self.sample())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> dict:
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        samples = self.samples or [0]
+        return {"peak": max(samples), "mean": int(sum(samples) / len(samples)),
+                "samples": len(self.samples)}
+
+
+def serve(urls, options: dict):
+    server = ReplayServer(**options)
+    urls.put(server.url)
+    server.httpd.serve_forever()
+
+
+def start_server(**options):
+    """
+    Start the replay server in its own process, so serving the pages does not
+    compete with the scanner for the GIL.
+    """
+    context = multiprocessing.get_context("spawn")
+    urls = context.Queue()
+    process = context.Process(target=serve, args=(urls, options), daemon=True)
+    process.start()
+    return process, urls.get(timeout=30)
+
+
+async def load_test(base_url: str, accounts: int, concurrency: int, browsers: int = 1,
+                    headless: bool = True, extraction: str = "html", fetch_mode: bool = False,
+                    password: str = "password", secret: str = "answer",
+                    exclude: tuple = ()) -> dict:
+    """
+    Scan the accounts against the server and collect the load test report.
+    """
+    METRICS.enabled = True
+    METRICS.reset()
+    credentials = [Credentials(f"load-test-{index}", password, secret)
+                   for index in range(accounts)]
+    sampler = MemorySampler(exclude=exclude)
+    sampler.start()
+    start = time.perf_counter()
+    options = ScanOptions(base_url=base_url, extraction=extraction, fetch_mode=fetch_mode)
+    results = await scan_accounts(credentials, concurrency=concurrency, browsers=browsers,
+                                  headless=headless, sink=NullSink(), options=options)
+    elapsed = time.perf_counter() - start
+    memory = await sampler.stop()
+
+    succeeded = sum(1 for result in results if result.data)
+    summary = METRICS.summary()
+    steps = {item["labels"]["step"]: item for item in summary["histograms"]
+             if item["name"] == "argyle_scan_step_seconds"}
+    operations = sorted((item for item in summary["histograms"]
+                         if item["name"] == "argyle_page_operation_seconds"),
+                        key=lambda item: item["sum"], reverse=True)
+    return {
+        "accounts": accounts,
+        "concurrency": concurrency,
+        "browsers": browsers,
+        "extraction": extraction,
+        "succeeded": succeeded,
+        "failed": accounts - succeeded,
+        "errors": sorted({result.error for result in results if result.error}),
+        "elapsed_seconds": round(elapsed, 3),
+        "scans_per_minute": round(succeeded / elapsed * 60, 2) if elapsed else 0.0,
+        "steps": {step: {key: item[key] for key in ("count", "mean", "p50", "p90", "p99", "max")}
+                  for step, item in steps.items()},
+        "slowest_page_operations": [
+            {"operation": item["labels"]["operation"], "target": item["labels"]["target"],
+             "count": item["count"], "sum": item["sum"], "p90": item["p90"]}
+            for item in operations[:10]],
+        "browser_rss_bytes": memory,
+    }
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Load test the scanner on the replay server.")
+    args.add_argument("--accounts", type=int, default=8)
+    args.add_argument("--concurrency", type=int, default=4)
+    args.add_argument("--browsers", type=int, default=1)
+    args.add_argument("--headed", action="store_true")
+    args.add_argument("--extraction", choices=["html", "browser"], default="html")
+    args.add_argument("--fetch", action="store_true")
+    args.add_argument("--no-secret", action="store_true",
+                      help="Do not ask for the login secret, the scanner waits for it 10s")
+    args.add_argument("--no-device-auth", action="store_true",
+                      help="Skip the device authorization, the scanner waits for it 30s")
+    args.add_argument("--no-popup", action="store_true")
+    args.add_argument("--base-url", help="Use a running replay server instead of starting one")
+    args.add_argument("--output", help="Json file the report is written to")
+    options = args.parse_args(argv)
+
+    secret = None if options.no_secret else "answer"
+    process = None
+    base_url = options.base_url
+    if not base_url:
+        process, base_url = start_server(secret=secret,
+                                         device_auth=not options.no_device_auth,
+                                         popup=not options.no_popup)
+    try:
+        report = asyncio.run(load_test(base_url, options.accounts, options.concurrency,
+                                       options.browsers, not options.headed,
+                                       options.extraction, options.fetch, secret=secret,
+                                       exclude=(process.pid,) if process else ()))
+    finally:
+        if process:
+            process.terminate()
+    print(json.dumps(report, indent=2))
+    if options.output:
+        with open(options.output, "w") as outfile:
+            outfile.write(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,23 @@
-from upwork_scanner import UpworkScanner
-from upwork_parser import UpworkParser
-
-
 def run():
+    # The scanner and parser are imported here so "import main" stays cheap
+    from upwork_scanner import UpworkScanner
+    from upwork_parser import UpworkParser
+
     parse = UpworkParser()
     cls = UpworkScanner(parse)
-    cls.login()
-    cls.scan_homepage()
-    cls.scan_profile_page()
-    return cls.scan_contact_info_page()
+    return cls.scan()
 
 
 def main():
+    # The steps are already retried inside a scan, a new run resumes at the failed step
     max_retries = 2
     tries = 1
     x = run()
     while tries <= max_retries and x is None:
         print(f"Scanning Failed. Re-trying.... Attempt // {tries}")
         tries += 1
-        run()
+        x = run()
+    return x
 
 
 if __name__ == "__main__":
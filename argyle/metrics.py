@@ -0,0 +1,293 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Histogram buckets in seconds, from a cached parse up to the slowest page loads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+PAGE_OPERATIONS = {"goto", "wait_for_selector", "click", "fill", "inner_html",
+                   "get_attribute", "evaluate"}
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """
+    Cumulative bucket counts of the observed values, with their sum, min and max.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative(self) -> list:
+        total = 0
+        counts = []
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the quantile, the max past the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.cumulative()):
+            if count >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+                "min": self.min, "max": self.max, "p50": self.quantile(0.5),
+                "p90": self.quantile(0.9), "p99": self.quantile(0.99)}
+
+
+class _Span:
+    def __init__(self, metrics, name: str, labels: dict) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Metrics:
+    """
+    Registry of the timing histograms and counters of a run. When it is disabled
+    every call returns right away, spans are a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def span(self, name: str, **labels):
+        """
+        Method to time the body of a with block into the histogram.
+        """
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timed(self, name: str, **labels):
+        """
+        Decorator that times every call of the function, and counts the calls by
+        outcome: "failure" when it raised or returned None, "success" otherwise.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                outcome = "failure"
+                start = time.perf_counter()
+                try:
+                    result = function(*args, **kwargs)
+                    if result is not None:
+                        outcome = "success"
+                    return result
+                finally:
+                    self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+                    self.count(f"{name}_total", outcome=outcome, **labels)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def prometheus(self) -> str:
+        """
+        Method to render the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in zip(histogram.buckets, histogram.cumulative()):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """
+        Method to collect the metrics as a json friendly dict.
+        """
+        with self.lock:
+            return {
+                "histograms": [dict(name=name, labels=dict(labels), **histogram.summary())
+                               for (name, labels), histogram in sorted(self.histograms.items())],
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+            }
+
+    def export(self, directory: str = None) -> list:
+        """
+        Method to write argyle.prom and argyle_metrics.json, each one replaced atomically
+        so a textfile collector never reads half a file. Returns the written paths.
+        """
+        if not self.enabled:
+            return []
+        directory = directory or os.getenv("ARGYLE_METRICS_DIR", ".")
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for file_name, content in [("argyle.prom", self.prometheus()),
+                                   ("argyle_metrics.json",
+                                    json.dumps(self.summary(), indent=2))]:
+            path = os.path.join(directory, file_name)
+            with open(f"{path}.tmp", "w") as outfile:
+                outfile.write(content)
+            os.replace(f"{path}.tmp", path)
+            paths.append(path)
+        return paths
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class TimedPage:
+    """
+    Proxy of a playwright page that times the page operations, labeled with the
+    selector they waited on or clicked. Everything else goes to the page.
+    """
+
+    def __init__(self, page, metrics: Metrics) -> None:
+        self._page = page
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._page, name)
+        if name not in PAGE_OPERATIONS:
+            return attribute
+
+        async def operation(*args, **kwargs):
+            # goto is labeled without the url, profile urls are unique per account
+            target = "" if name in ("goto", "evaluate") or not args else str(args[0])
+            labels = {"operation": name, "target": target}
+            start = time.perf_counter()
+            try:
+                result = await attribute(*args, **kwargs)
+            except Exception:
+                self._metrics.count("argyle_page_operation_errors_total", **labels)
+                raise
+            finally:
+                self._metrics.observe("argyle_page_operation_seconds",
+                                      time.perf_counter() - start, **labels)
+            return result
+        return operation
+
+
+def instrument_page(page):
+    """
+    Wrap the page in a TimedPage when the metrics are enabled.
+    """
+    return TimedPage(page, METRICS) if METRICS.enabled and page is not None else page
+
+
+def child_pids(root: int) -> list:
+    """
+    All the descendants of the process, from the parent pids in /proc.
+    """
+    parents = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as infile:
+                # The command name may hold spaces, the fields start after its ")"
+                fields = infile.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(name))
+    pids = []
+    pending = [root]
+    while pending:
+        children = parents.get(pending.pop(), [])
+        pids.extend(children)
+        pending.extend(children)
+    return pids
+
+
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as infile:
+            for line in infile:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+METRICS = Metrics(enabled=os.getenv("ARGYLE_METRICS", "").lower() in ("1", "true", "yes"))
+span = METRICS.span
+count = METRICS.count
+timed = METRICS.timed
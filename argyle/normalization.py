@@ -0,0 +1,58 @@
+import re
+from functools import lru_cache
+from country_table import COUNTRY_ISO2, ISO2_CODES
+
+E164_PATTERN = re.compile(r"^\+[1-9]\d{1,14}$")
+
+
+@lru_cache(maxsize=1024)
+def normalize_country(name: str) -> str:
+    """
+    Convert a country name to ISO 3166-1 alpha-2, the same as
+    coco.convert(names=name, to='ISO2'). The precomputed table answers the known
+    names, country_converter is only loaded for the names that are not in it.
+    """
+    iso2 = COUNTRY_ISO2.get(name)
+    if iso2 is None:
+        import country_converter as coco
+        iso2 = coco.convert(names=name, to='ISO2')
+    return iso2
+
+
+@lru_cache(maxsize=1024)
+def normalize_phone(number: str, region: str = 'US') -> str:
+    """
+    Format a phone number to E.164 with phonenumberfmt, loaded on the first call.
+    """
+    from phonenumberfmt import format_phone_number
+    return format_phone_number(number, implied_phone_region=region)
+
+
+def normalize_countries(names: list) -> list:
+    """
+    Batch version of normalize_country, every distinct name is converted once.
+    """
+    converted = {name: normalize_country(name) for name in set(names)}
+    return [converted[name] for name in names]
+
+
+def normalize_phones(numbers: list, region: str = 'US') -> list:
+    """
+    Batch version of normalize_phone, every distinct number is formatted once.
+    """
+    formatted = {number: normalize_phone(number, region) for number in set(numbers)}
+    return [formatted[number] for number in numbers]
+
+
+def is_iso2(value: str) -> bool:
+    """
+    Check the value is an ISO 3166-1 alpha-2 code known to the country table.
+    """
+    return value in ISO2_CODES
+
+
+def is_e164(value: str) -> bool:
+    """
+    Check the phone number is in E.164 format.
+    """
+    return bool(E164_PATTERN.search(value))
@@ -0,0 +1,158 @@
+import fcntl
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+DEFAULT_PATHS = {
+    "level_1": "../level_1_task.json",
+    "level_2": "../level_2_task.json"
+}
+
+
+class OutputSink(ABC):
+    """
+    Destination of the parsed records. The kind says which task the record belongs to,
+    the account which scanned account it came from (None when unknown).
+    """
+
+    @abstractmethod
+    def write(self, kind: str, record: dict, account: str = None):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class NullSink(OutputSink):
+    """
+    Sink that drops the records, for callers that collect the returned data themselves.
+    """
+
+    def write(self, kind: str, record: dict, account: str = None):
+        pass
+
+
+class JsonFileSink(OutputSink):
+    """
+    Pretty-printed json file per kind, overwritten by every record. Kinds without
+    a file, like the "unchanged" events, are dropped.
+    """
+
+    def __init__(self, paths: dict = None) -> None:
+        self.paths = paths or DEFAULT_PATHS
+
+    def write(self, kind: str, record: dict, account: str = None):
+        # Only the task outputs have a file, other events are not kept
+        if kind not in self.paths:
+            return
+        # Serialize it to json and save it as the file of the task
+        data_str = json.dumps(record, indent=2)
+        with open(self.paths[kind], "w") as outfile:
+            outfile.write(data_str)
+
+
+class JsonLinesSink(OutputSink):
+    """
+    Buffered, append-only JSON Lines file. Records are flushed in batches with one
+    write under an exclusive file lock, so several threads and processes can share
+    the file. The file is rotated by size or age, rotation renames it atomically.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_bytes: int = None, max_age: float = None) -> None:
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.fd = None
+        # The lock file mtime marks when the current file was started
+        lock_fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        os.close(lock_fd)
+
+    def write(self, kind: str, record: dict, account: str = None):
+        line = json.dumps({"kind": kind, "account": account, "record": record},
+                          separators=(",", ":"))
+        with self.lock:
+            self.buffer.append(f"{line}\n")
+            due = (len(self.buffer) >= self.batch_size or
+                   time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Method to append the buffered lines to the file.
+        """
+        with self.lock:
+            if not self.buffer:
+                return
+            data = "".join(self.buffer).encode("utf-8")
+            self.buffer = []
+            self.last_flush = time.monotonic()
+            with open(self.lock_path, "r+") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.rotate_if_needed(len(data))
+                    self.open_current()
+                    while data:
+                        data = data[os.write(self.fd, data):]
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def open_current(self):
+        """
+        Method to (re)open the current file, another writer may have rotated it.
+        """
+        if self.fd is not None:
+            try:
+                if os.fstat(self.fd).st_ino == os.stat(self.path).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            os.close(self.fd)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def rotate_if_needed(self, incoming: int):
+        """
+        Method to rename the current file when it is too big or too old.
+        Must be called while holding the file lock.
+        """
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return
+        too_big = self.max_bytes and size and size + incoming > self.max_bytes
+        too_old = self.max_age and time.time() - os.stat(self.lock_path).st_mtime >= self.max_age
+        if too_big or too_old:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            os.rename(self.path, f"{self.path}.{stamp}")
+            os.utime(self.lock_path)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+
+def open_sink(path: str) -> OutputSink:
+    """
+    Sink of an --output path: the SQLite result store for .db/.sqlite files, an
+    append-only JSON Lines file otherwise.
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        from result_store import SqliteSink
+        return SqliteSink(path)
+    return JsonLinesSink(path)
@@ -0,0 +1,175 @@
+import asyncio
+import copy
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import NamedTuple, Optional
+from output_sink import JsonFileSink, NullSink, OutputSink
+from upwork_parser import UpworkParser
+
+# Task output written by the parse methods
+OUTPUT_KINDS = {
+    "parse_homepage": "level_1",
+    "parse_contact_info_data": "level_2"
+}
+
+_worker_parser = None
+_thread_state = threading.local()
+
+
+class ParseRecord(NamedTuple):
+    method: str
+    data: Optional[dict]
+    error: Optional[str] = None
+
+
+def _init_worker():
+    """
+    Create the parser of the worker process once. The records go back to the
+    parent process, which writes them to its sink.
+    """
+    global _worker_parser
+    _worker_parser = UpworkParser(NullSink())
+
+
+def _init_thread():
+    """
+    Same as _init_worker for the thread mode, one parser per thread.
+    """
+    _thread_state.parser = UpworkParser(NullSink())
+
+
+def _run(parser: UpworkParser, method: str, html_body, data: dict) -> ParseRecord:
+    parser.last_error = None
+    result = getattr(parser, method)(html_body, data)
+    return ParseRecord(method, result, parser.last_error)
+
+
+def _parse(method: str, html_body, data: dict) -> ParseRecord:
+    return _run(_worker_parser, method, html_body, data)
+
+
+def _parse_in_thread(method: str, html_body, data: dict) -> ParseRecord:
+    return _run(_thread_state.parser, method, html_body, data)
+
+
+def _wake(freed: asyncio.Future):
+    if not freed.done():
+        freed.set_result(None)
+
+
+class ParseStage:
+    """
+    Parses the captured page bodies in a pool of worker processes, so the browser
+    loop moves on to the next navigation. At most max_pending bodies wait for a
+    worker, submitting more blocks until one is done.
+    With threads, the bodies are parsed in worker threads of this process instead,
+    which is enough to overlap the parse of one account with its next navigation.
+    The data is copied on submit so the worker never shares it with the caller.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None,
+                 sink: OutputSink = None, threads: bool = False) -> None:
+        self.threads = threads
+        if threads:
+            self.executor = ThreadPoolExecutor(max_workers=workers or 1,
+                                               thread_name_prefix="argyle-parse",
+                                               initializer=_init_thread)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        self.max_pending = max_pending or 2 * self.executor._max_workers
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        # Event loop futures of the submit_async calls waiting for a slot
+        self.slot_waiters = []
+        self.waiters_lock = threading.Lock()
+        self.sink = sink or JsonFileSink()
+        self.futures = []
+
+    def submit(self, method: str, html_body, data: dict, block: bool = True,
+               timeout: float = None, account: str = None) -> Future:
+        """
+        Method to queue a body for parsing, the future resolves to a ParseRecord.
+        Raises queue.Full if no slot frees up in time.
+        """
+        if not self.slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise queue.Full(f"{self.max_pending} bodies are already waiting to be parsed")
+        return self.start(method, html_body, data, account=account)
+
+    async def submit_async(self, method: str, html_body, data: dict,
+                           account: str = None) -> asyncio.Future:
+        """
+        Method to queue a body from the event loop, waiting for a slot without blocking it
+        or a thread of the default executor (the http fetches and cache writes run there).
+        The caller awaits its own future, it is not part of results().
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            # Registered before trying, so a slot freed in between still wakes it up
+            freed = loop.create_future()
+            with self.waiters_lock:
+                self.slot_waiters.append((loop, freed))
+            try:
+                if self.slots.acquire(blocking=False):
+                    break
+                await freed
+            finally:
+                with self.waiters_lock:
+                    self.slot_waiters.remove((loop, freed))
+        return asyncio.wrap_future(self.start(method, html_body, data, track=False,
+                                              account=account), loop=loop)
+
+    def start(self, method: str, html_body, data: dict, track: bool = True,
+              account: str = None) -> Future:
+        """
+        Method to hand a body to the workers, once its slot has been taken. Its record
+        is written to the sink with the account.
+        """
+        try:
+            if self.threads:
+                future = self.executor.submit(_parse_in_thread, method, html_body,
+                                              copy.deepcopy(data))
+            else:
+                future = self.executor.submit(_parse, method, html_body, data)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda done: self.on_done(done, account))
+        if track:
+            self.futures.append((method, future))
+        return future
+
+    def on_done(self, future: Future, account: str = None):
+        """
+        Method to free the slot of a parsed body and write its record to the sink.
+        """
+        self.slots.release()
+        with self.waiters_lock:
+            waiters = list(self.slot_waiters)
+        for loop, freed in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, freed)
+            except RuntimeError:
+                # The loop of the waiter is already closed
+                pass
+        if future.cancelled() or future.exception():
+            return
+        record = future.result()
+        if record.data is not None and record.method in OUTPUT_KINDS:
+            self.sink.write(OUTPUT_KINDS[record.method], record.data, account=account)
+
+    def results(self) -> list:
+        """
+        Method to wait for every submitted body, the records come back in submission order.
+        """
+        records = []
+        for method, future in self.futures:
+            try:
+                records.append(future.result())
+            except Exception as err:
+                records.append(ParseRecord(method, None, f"worker: {err}"))
+        self.futures = []
+        return records
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.sink.flush()
@@ -0,0 +1,301 @@
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Optional
+from urllib.parse import urlparse
+from metrics import METRICS
+
+# Page operations paced by the controller, by the kind of latency they measure
+PACED_OPERATIONS = {"goto": "navigation", "reload": "navigation",
+                    "wait_for_selector": "selector"}
+THROTTLED_STATUSES = {429, 503}
+# Urls of the bot challenges served in place of the pages
+CAPTCHA_MARKERS = ("captcha", "/challenge", "cdn-cgi/challenge-platform")
+
+
+class TokenBucket:
+    """
+    Requests per second allowed to one host, with bursts of up to burst requests.
+    A reservation may take the tokens below zero, the caller sleeps the returned
+    delay until its token is there.
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float("-inf")
+
+    def reserve(self, now: float = None) -> float:
+        """
+        Method to take a token, returns how long to wait before using it.
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+    def pause(self, seconds: float, now: float = None):
+        """
+        Method to hold every request to the host for a while, after a Retry-After.
+        """
+        now = time.monotonic() if now is None else now
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+def classify(response, url: str) -> tuple:
+    """
+    Outcome of a page operation that did not raise, with the Retry-After of the
+    throttled responses: "throttled" for 429/503, "captcha" when a bot challenge was
+    served, "ok" otherwise.
+    """
+    status = getattr(response, "status", None)
+    if isinstance(status, int) and status in THROTTLED_STATUSES:
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("retry-after", ""))
+        except ValueError:
+            retry_after = None
+        return "throttled", retry_after
+    urls = [url or "", getattr(response, "url", "") if status is not None else ""]
+    if any(marker in str(value).lower() for value in urls for marker in CAPTCHA_MARKERS):
+        return "captcha", None
+    return "ok", None
+
+
+def is_timeout(err: Exception) -> bool:
+    # playwright raises its own TimeoutError, it is not imported for the check
+    return (isinstance(err, asyncio.TimeoutError) or
+            type(err).__name__.endswith(("TimeoutError", "Timeout")))
+
+
+class RateController:
+    """
+    Paces the page operations of every session sharing it (one event loop):
+    a token bucket per host, and an AIMD limit of the navigations in flight. The
+    limit grows by one per limit successes and is cut by backoff, at most once per
+    cooldown, on errors, throttled responses, captchas and on page-ready latencies
+    past latency_tolerance times the usual one. A 429 also slows the bucket of the
+    host down (once per cooldown too) and holds it for the Retry-After, successful
+    navigations speed it up again by rate_increase. The timeouts of the operations
+    are timeout_multiplier times the p99 of the recent latencies of their kind, and
+    double after every timeout until an operation of the kind succeeds again, so
+    they catch up with a site that got slower than them. A timeout the caller
+    passed is never shortened.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4, min_rate: float = 0.2,
+                 max_rate: float = 20.0, rate_increase: float = 0.05, concurrency: int = 4,
+                 min_concurrency: int = 1, max_concurrency: int = 16, backoff: float = 0.5,
+                 cooldown: float = 2.0, latency_tolerance: float = 3.0,
+                 timeout_multiplier: float = 3.0, min_timeout: float = 2.0,
+                 max_timeout: float = 60.0, default_timeout: float = 30.0,
+                 window: int = 200, min_samples: int = 10) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = rate_increase
+        self.limit = float(concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.latency_tolerance = latency_tolerance
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+        self.window = window
+        self.min_samples = min_samples
+        self.buckets = {}
+        self.latencies = {}
+        # Usual latency of each kind, the lowest p50 seen, drifting up slowly so a
+        # lasting change of the site becomes the new usual
+        self.baselines = {}
+        # Factor of the timeouts of each kind, doubled by every timeout in a row
+        self.stretch = {}
+        self.in_flight = 0
+        self.waiters = []
+        self.last_decrease = float("-inf")
+        self.counts = Counter()
+        self.delayed_seconds = 0.0
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    def concurrency(self) -> int:
+        return max(self.min_concurrency, int(self.limit))
+
+    async def acquire(self, host: str):
+        """
+        Method to wait for a token of the host, then for a free slot. Only the
+        navigations take them, a selector wait sends no request and may run to its
+        timeout on an optional element.
+        """
+        delay = self.bucket(host).reserve()
+        if delay:
+            self.counts["delayed"] += 1
+            self.delayed_seconds += delay
+            await asyncio.sleep(delay)
+        while self.in_flight >= self.concurrency():
+            waiter = asyncio.get_event_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                self.waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self, host: str, kind: str, latency: float, outcome: str,
+                retry_after: float = None):
+        """
+        Method to free the slot of a navigation and adjust the limits to the outcome
+        of an operation. A cancelled operation says nothing about the site.
+        """
+        if kind == "navigation":
+            self.in_flight -= 1
+        if outcome != "cancelled":
+            self.record(host, kind, latency, outcome, retry_after)
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def record(self, host: str, kind: str, latency: float, outcome: str,
+               retry_after: float = None, now: float = None):
+        now = time.monotonic() if now is None else now
+        self.counts[outcome] += 1
+        METRICS.count("argyle_rate_control_operations_total", kind=kind, outcome=outcome)
+        if outcome == "ok":
+            self.stretch.pop(kind, None)
+            samples = self.latencies.setdefault(kind, deque(maxlen=self.window))
+            samples.append(latency)
+            target = self.target_latency(kind)
+            if target is not None and latency > target:
+                self.decrease("slow", now)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                if kind == "navigation":
+                    bucket = self.bucket(host)
+                    bucket.rate = min(self.max_rate, bucket.rate + self.rate_increase)
+        elif outcome in ("throttled", "captcha"):
+            bucket = self.bucket(host)
+            if now - bucket.last_decrease >= self.cooldown:
+                bucket.last_decrease = now
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff)
+                print(f"{host} answered {outcome}, slowing down to {bucket.rate:.2f} "
+                      f"requests/s.")
+            bucket.pause(retry_after if retry_after is not None else 1 / bucket.rate, now)
+            self.decrease(outcome, now)
+        elif outcome == "timeout":
+            limit = self.max_timeout / self.min_timeout
+            self.stretch[kind] = min(limit, self.stretch.get(kind, 1) * 2)
+            # Selector waits time out on the optional elements too, only the
+            # navigations that time out count against the site
+            if kind == "navigation":
+                self.decrease(outcome, now)
+        elif outcome == "error":
+            self.decrease(outcome, now)
+
+    def decrease(self, reason: str, now: float):
+        """
+        Method to cut the concurrency limit, once per cooldown: the operations in
+        flight when the site slowed down all report it.
+        """
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * self.backoff)
+        self.counts["decreases"] += 1
+        METRICS.count("argyle_rate_control_decreases_total", reason=reason)
+
+    def percentile(self, kind: str, q: float) -> Optional[float]:
+        samples = self.latencies.get(kind)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def target_latency(self, kind: str) -> Optional[float]:
+        p50 = self.percentile(kind, 0.5)
+        if p50 is None:
+            return None
+        baseline = self.baselines.get(kind, p50)
+        self.baselines[kind] = baseline = min(p50, baseline * 1.01)
+        return baseline * self.latency_tolerance
+
+    def timeout(self, kind: str, default: float = None) -> float:
+        """
+        Timeout in milliseconds of the next operation of the kind, the default one
+        (or default_timeout) until there are enough latencies. The default is also
+        the shortest timeout returned.
+        """
+        p99 = self.percentile(kind, 0.99)
+        if p99 is None:
+            return default if default is not None else self.default_timeout * 1000
+        seconds = max(self.min_timeout, p99 * self.timeout_multiplier)
+        timeout = round(min(self.max_timeout, seconds * self.stretch.get(kind, 1)) * 1000)
+        return max(timeout, default) if default is not None else timeout
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "rates": {host: round(bucket.rate, 3) for host, bucket in self.buckets.items()},
+            "timeouts_ms": {kind: self.timeout(kind) for kind in self.latencies},
+            "p50": {kind: self.percentile(kind, 0.5) for kind in self.latencies},
+            "outcomes": dict(self.counts),
+            "delayed_seconds": round(self.delayed_seconds, 3),
+        }
+
+
+class PacedPage:
+    """
+    Proxy of a playwright page whose navigations and selector waits get the adaptive
+    timeouts of the rate controller and report their outcome to it. Only the
+    navigations wait for a token and a slot. A timeout passed by the caller is the
+    shortest one used.
+    Everything else goes to the page.
+    """
+
+    def __init__(self, page, controller: RateController) -> None:
+        self._page = page
+        self._controller = controller
+
+    def __getattr__(self, name):
+        attribute = getattr(self._page, name)
+        if name not in PACED_OPERATIONS:
+            return attribute
+        kind = PACED_OPERATIONS[name]
+
+        async def operation(*args, **kwargs):
+            url = args[0] if name == "goto" and args else kwargs.get("url", self._page.url)
+            host = urlparse(url).netloc
+            kwargs["timeout"] = self._controller.timeout(kind, kwargs.get("timeout"))
+            if kind == "navigation":
+                await self._controller.acquire(host)
+            outcome, retry_after = "cancelled", None
+            start = time.monotonic()
+            try:
+                result = await attribute(*args, **kwargs)
+                outcome, retry_after = classify(result, self._page.url)
+                return result
+            except Exception as err:
+                outcome = "timeout" if is_timeout(err) else "error"
+                raise
+            finally:
+                self._controller.release(host, kind, time.monotonic() - start, outcome,
+                                         retry_after)
+        return operation
+
+
+def pace_page(page, controller: Optional[RateController]):
+    """
+    Wrap the page in a PacedPage when there is a rate controller.
+    """
+    return PacedPage(page, controller) if controller is not None and page is not None else page
@@ -0,0 +1,87 @@
+import argparse
+import copy
+import sys
+import time
+from output_sink import JsonLinesSink
+from snapshot_archive import SnapshotArchive
+from upwork_parser import UpworkParser
+from user_data_profile import user_data, data_dict
+
+
+def archived_profile(archive: SnapshotArchive, parser: UpworkParser, account: str,
+                     until: str) -> dict:
+    """
+    Parse the latest profile page of the account archived up to until (inclusive),
+    None when there is none or it does not parse. Profile pages write no record.
+    """
+    latest = None
+    for entry in archive.entries(account=account, page_type="parse_profile_data"):
+        if entry["captured_at"] <= until:
+            latest = entry
+    if latest is None:
+        return None
+    body = archive.get(latest["digest"], latest["codec"])
+    return parser.parse_profile_data(body, copy.deepcopy(user_data))
+
+
+def reparse(archive: SnapshotArchive, parser: UpworkParser, **filters) -> dict:
+    """
+    Run the current parser over the archived bodies, in capture order. The contact
+    info page of an account is validated against the last profile parsed for it,
+    or the latest one archived before it when the filters left the profile out.
+    The contact info pages without any profile are skipped.
+    """
+    profiles = {}
+    counts = {"parsed": 0, "failed": 0, "skipped": 0}
+    for entry in archive.entries(**filters):
+        body = archive.get(entry["digest"], entry["codec"])
+        page_type = entry["page_type"]
+        parser.account = entry["account"]
+        if page_type == "parse_homepage":
+            result = parser.parse_homepage(body, copy.deepcopy(data_dict))
+        elif page_type == "parse_profile_data":
+            result = parser.parse_profile_data(body, copy.deepcopy(user_data))
+            if result:
+                profiles[entry["account"]] = result
+        else:
+            profile = profiles.get(entry["account"])
+            if profile is None:
+                profile = archived_profile(archive, parser, entry["account"],
+                                           entry["captured_at"])
+            if profile is None:
+                counts["skipped"] += 1
+                continue
+            profiles[entry["account"]] = profile
+            result = parser.parse_contact_info_data(body, copy.deepcopy(profile))
+        counts["parsed" if result else "failed"] += 1
+    return counts
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Re-parse archived page snapshots.")
+    args.add_argument("--archive", required=True, help="Directory of the snapshot archive")
+    args.add_argument("--account")
+    args.add_argument("--page-type", choices=["parse_homepage", "parse_profile_data",
+                                              "parse_contact_info_data"])
+    args.add_argument("--since", help="ISO timestamp (UTC), inclusive")
+    args.add_argument("--until", help="ISO timestamp (UTC), exclusive")
+    args.add_argument("--output", default="reparsed.jsonl",
+                      help="JSON Lines file the records are appended to")
+    options = args.parse_args(argv)
+
+    sink = JsonLinesSink(options.output)
+    start = time.perf_counter()
+    counts = reparse(SnapshotArchive(options.archive), UpworkParser(sink),
+                     account=options.account, page_type=options.page_type,
+                     since=options.since, until=options.until)
+    sink.close()
+    elapsed = time.perf_counter() - start
+    total = counts["parsed"] + counts["failed"]
+    print(f"Re-parsed {total} pages in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.1f} pages/s), {counts['failed']} failed, "
+          f"{counts['skipped']} skipped without a profile.")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
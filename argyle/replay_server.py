@@ -0,0 +1,244 @@
+"""
+Local stand-in for upwork.com that serves the recorded pages of test_constants,
+so the scanner can run (and be load tested) without live accounts.
+
+    python replay_server.py --port 8321
+    UPWORK_BASE_URL=http://127.0.0.1:8321 python async_scanner.py accounts.json
+
+Any username is accepted with the configured password. The login secret prompt,
+the device authorization step of the contact info page and the homepage popup
+can each be turned off. A latency can be added to every response, and past a
+rate limit the requests are answered 429 Too Many Requests like a throttling site.
+"""
+import argparse
+import html
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from async_scanner import CONTACT_INFO_PATH, HOME_PATH, LOGIN_PATH
+from test_constants import map_html_body
+
+SCRIPT_PATTERN = re.compile(r"<script\b.*?</script>", re.S | re.I)
+RECORDED_POPUP = 'data-cy="close-button"'
+
+LOGIN_PAGE = """<!DOCTYPE html><html><body>
+<form method="post" action="{login_path}">
+  <div id="username_step">
+    <input id="login_username" name="username">
+    <button id="login_password_continue" type="button" onclick="
+      document.getElementById('username_step').style.display = 'none';
+      document.getElementById('password_step').style.display = 'block';">Continue</button>
+  </div>
+  <div id="password_step" style="display: none">
+    <input id="login_password" name="password" type="password">
+    <button id="login_control_continue" type="submit">Log in</button>
+  </div>
+</form></body></html>"""
+
+SECRET_PAGE = """<!DOCTYPE html><html><body>
+<form method="post" action="{login_path}">
+  <input type="hidden" name="username" value="{username}">
+  <input type="hidden" name="password" value="{password}">
+  <input id="login_answer" name="answer">
+  <button id="login_control_continue" type="submit">Continue</button>
+</form></body></html>"""
+
+DEVICE_AUTH_PAGE = """<!DOCTYPE html><html><body>
+<form method="post" action="{contact_info_path}">
+  <input id="deviceAuth_answer" name="answer">
+  <button id="control_save" type="submit">Save</button>
+</form></body></html>"""
+
+POPUP = """<div id="replay-popup" style="position: fixed; top: 40%; left: 40%; z-index: 1000">
+<button data-cy="close-button" onclick="document.getElementById('replay-popup').remove()">
+<div><svg width="24" height="24"><rect width="24" height="24"></rect></svg></div>
+</button></div>"""
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serves the login flow and the recorded pages, the session is a random cookie.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def cookie(self, name: str):
+        morsel = SimpleCookie(self.headers.get("Cookie", "")).get(name)
+        return morsel.value if morsel else None
+
+    def logged_in(self) -> bool:
+        return self.cookie("replay_session") in self.server.sessions
+
+    def throttled(self) -> bool:
+        """
+        Method to delay the response by the injected latency, and answer 429 to the
+        requests past the rate limit of the last second.
+        """
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not self.server.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.server.lock:
+            recent = self.server.recent
+            while recent and recent[0] <= now - 1:
+                recent.popleft()
+            if len(recent) < self.server.rate_limit:
+                recent.append(now)
+                return False
+            self.server.throttled += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def do_GET(self):
+        if self.throttled():
+            return
+        path = self.path.split("?")[0]
+        if path == LOGIN_PATH:
+            return self.send_page(LOGIN_PAGE.format(login_path=LOGIN_PATH))
+        if not self.logged_in():
+            return self.redirect(LOGIN_PATH)
+        if path == HOME_PATH:
+            return self.send_page(self.server.pages["parse_homepage"])
+        if path.startswith("/freelancers/~"):
+            return self.send_page(self.server.pages["parse_profile_data"])
+        if path == CONTACT_INFO_PATH:
+            if self.server.device_auth and self.cookie("replay_device") != "ok":
+                return self.send_page(DEVICE_AUTH_PAGE.format(
+                    contact_info_path=CONTACT_INFO_PATH))
+            return self.send_page(self.server.pages["parse_contact_info_data"])
+        self.send_page("<html><body>Not found</body></html>", status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.throttled():
+            return
+        form = {key: values[0] for key, values in
+                parse_qs(body.decode("utf-8")).items()}
+        if self.path == LOGIN_PATH:
+            if form.get("password") != self.server.password:
+                return self.send_page(LOGIN_PAGE.format(login_path=LOGIN_PATH), status=401)
+            if self.server.secret and form.get("answer") != self.server.secret:
+                return self.send_page(SECRET_PAGE.format(
+                    login_path=LOGIN_PATH, username=html.escape(form.get("username", "")),
+                    password=html.escape(form["password"])))
+            token = secrets.token_hex(16)
+            self.server.sessions.add(token)
+            return self.redirect(HOME_PATH, {"replay_session": token})
+        if self.path == CONTACT_INFO_PATH and self.logged_in():
+            if form.get("answer") != self.server.secret:
+                return self.send_page(DEVICE_AUTH_PAGE.format(
+                    contact_info_path=CONTACT_INFO_PATH), status=401)
+            return self.redirect(CONTACT_INFO_PATH, {"replay_device": "ok"})
+        self.send_page("<html><body>Not found</body></html>", status=404)
+
+    def redirect(self, location: str, cookies: dict = None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        for name, value in (cookies or {}).items():
+            self.send_header("Set-Cookie", f"{name}={value}; Path=/; HttpOnly")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_page(self, page: str, status: int = 200):
+        body = page.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ReplayServer:
+    """
+    Threaded http server for the replayed site, started on a background thread.
+    Port 0 picks a free port, the url says which one.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: str = "password",
+                 secret: str = "answer", device_auth: bool = True, popup: bool = True,
+                 latency: float = 0.0, rate_limit: int = 0) -> None:
+        self.httpd = ThreadingHTTPServer((host, port), ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.password = password
+        self.httpd.secret = secret
+        self.httpd.device_auth = device_auth and bool(secret)
+        self.httpd.sessions = set()
+        # Seconds added to every response, and requests per second served before 429s
+        self.httpd.latency = latency
+        self.httpd.rate_limit = rate_limit
+        self.httpd.recent = deque()
+        self.httpd.throttled = 0
+        self.httpd.lock = threading.Lock()
+        self.httpd.pages = {page: self.render(page, body, popup)
+                            for page, body in map_html_body.items()}
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def render(self, page: str, body: str, popup: bool) -> str:
+        """
+        Method to make the recorded body self contained: the scripts are dropped, the
+        links to upwork.com point here and only the replayed popup can be closed.
+        """
+        body = SCRIPT_PATTERN.sub("", body).replace('href="https://www.upwork.com',
+                                                    f'href="{self.url}')
+        body = body.replace(RECORDED_POPUP, 'data-cy="recorded-close-button"')
+        if popup and page == "parse_homepage":
+            body = POPUP + body
+        return f"<!DOCTYPE html><html><body>{body}</body></html>"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv: list = None):
+    args = argparse.ArgumentParser(description="Serve the recorded Upwork pages locally.")
+    args.add_argument("--host", default="127.0.0.1")
+    args.add_argument("--port", type=int, default=8321)
+    args.add_argument("--password", default="password")
+    args.add_argument("--secret", default="answer",
+                      help="Answer of the login secret and device authorization prompts")
+    args.add_argument("--no-secret", action="store_true", help="Do not ask for the secret")
+    args.add_argument("--no-device-auth", action="store_true",
+                      help="Show the contact info page without the device authorization")
+    args.add_argument("--no-popup", action="store_true")
+    args.add_argument("--latency", type=float, default=0.0,
+                      help="Seconds added to every response")
+    args.add_argument("--rate-limit", type=int, default=0,
+                      help="Requests per second served before answering 429")
+    options = args.parse_args(argv)
+
+    server = ReplayServer(options.host, options.port, options.password,
+                          None if options.no_secret else options.secret,
+                          device_auth=not options.no_device_auth, popup=not options.no_popup,
+                          latency=options.latency, rate_limit=options.rate_limit)
+    print(f"Serving the recorded pages on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
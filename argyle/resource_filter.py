@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+
+# Resources the parser never reads: the picture_url only needs the src attribute
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+
+# Analytics, trackers and the usabilla live feedback widget
+DEFAULT_BLOCKED_URLS = (
+    r"usabilla\.com",
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"facebook\.(com|net)",
+    r"hotjar\.com",
+    r"bing\.com",
+    r"linkedin\.com/(px|li)",
+    r"segment\.(com|io)",
+    r"optimizely\.com",
+    r"newrelic\.com|nr-data\.net",
+)
+
+
+class ResourceFilter:
+    """
+    Route handler that aborts the requests the parser does not need.
+    Allow rules win over the deny rules, the counters are kept per scan.
+    """
+
+    def __init__(self, blocked_types=DEFAULT_BLOCKED_TYPES,
+                 blocked_urls=DEFAULT_BLOCKED_URLS, allowed_urls=()) -> None:
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_urls = re.compile("|".join(blocked_urls)) if blocked_urls else None
+        self.allowed_urls = re.compile("|".join(allowed_urls)) if allowed_urls else None
+        self.blocked = Counter()
+        self.allowed = Counter()
+        self.allowed_bytes = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """
+        Method to decide if a request is blocked by its resource type and url.
+        """
+        if self.allowed_urls and self.allowed_urls.search(url):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return bool(self.blocked_urls and self.blocked_urls.search(url))
+
+    async def handle(self, route):
+        """
+        Abort the blocked requests, let the rest fall through to the next handler.
+        """
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed[request.resource_type] += 1
+            await route.fallback()
+
+    async def attach(self, context):
+        """
+        Install the filter on every page of the context.
+        """
+        await context.route("**/*", self.handle)
+        context.on("requestfinished", self.count_transfer)
+
+    async def count_transfer(self, request):
+        """
+        Add the transferred size of an allowed request to the counters.
+        """
+        try:
+            sizes = await request.sizes()
+            self.allowed_bytes += sizes["responseHeadersSize"] + sizes["responseBodySize"]
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "allowed_requests": sum(self.allowed.values()),
+            "allowed_bytes": self.allowed_bytes
+        }
@@ -0,0 +1,452 @@
+"""
+SQLite store of the scanned UpworkUser records, one row per profile with the
+address in its own columns and the metadata as json, plus the history of every
+field that changed between scans. A profile is keyed by its id, its account when
+the id is missing, and the username it was scanned with when both are (the parser
+does not find them on the pages). The email is masked on the pages, it never
+identifies a profile.
+
+    python result_store.py [--db results.db] import scan_results.jsonl
+    python result_store.py query --country US --changed-since 2026-10-17
+    python result_store.py history username:bobby@example.com
+
+The queries are iterators over the rows of an open cursor, the records are built
+one at a time instead of loading the whole result.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Iterable, Iterator, NamedTuple, Optional
+from output_sink import OutputSink
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "results.db")
+# Placeholder the parser writes in the fields it did not find
+MISSING = "No available information."
+ADDRESS_FIELDS = ["line1", "line2", "city", "state", "postal_code", "country"]
+PROFILE_FIELDS = ["id", "account", "employer", "first_name", "last_name", "full_name",
+                  "email", "phone_number", "birth_date", "picture_url", "ssn",
+                  "martial_status", "gender", "created_at", "updated_at"]
+COLUMNS = PROFILE_FIELDS + ADDRESS_FIELDS + ["metadata"]
+# Identifying fields, the first one the record has is its key
+KEY_FIELDS = ["id", "account"]
+# Fields stored as UTC ISO 8601 text, like the filters compare them
+TIMESTAMP_FIELDS = ["created_at", "updated_at"]
+# Rows read per fetch by the iterators, and keys per "IN (...)" lookup
+FETCH_SIZE = 500
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    profile_key TEXT PRIMARY KEY,
+    {", ".join(f"{column} TEXT" for column in COLUMNS)},
+    first_seen_at TEXT NOT NULL,
+    scanned_at TEXT NOT NULL,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_id ON profiles (id);
+CREATE INDEX IF NOT EXISTS profiles_email ON profiles (email);
+CREATE INDEX IF NOT EXISTS profiles_country ON profiles (country);
+CREATE INDEX IF NOT EXISTS profiles_updated_at ON profiles (updated_at);
+CREATE INDEX IF NOT EXISTS profiles_changed_at ON profiles (changed_at);
+CREATE TABLE IF NOT EXISTS profile_history (
+    profile_key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profile_history_profile ON profile_history (profile_key, changed_at);
+CREATE INDEX IF NOT EXISTS profile_history_changed_at ON profile_history (changed_at);
+"""
+
+UPSERT = f"""
+INSERT INTO profiles (profile_key, {", ".join(COLUMNS)},
+                      first_seen_at, scanned_at, changed_at)
+VALUES (?, {", ".join("?" for _ in COLUMNS)}, ?, ?, ?)
+ON CONFLICT (profile_key) DO UPDATE SET
+    {", ".join(f"{column} = excluded.{column}" for column in COLUMNS)},
+    scanned_at = excluded.scanned_at,
+    changed_at = excluded.changed_at
+"""
+
+
+class UpsertResult(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+    skipped: int
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def to_iso(value) -> Optional[str]:
+    """
+    Timestamps are stored as UTC ISO 8601 text, so they compare as strings.
+    Naive datetimes and dates are taken as UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def to_row(record: dict) -> tuple:
+    """
+    Flatten a user record into the values of the profile columns.
+    """
+    address = record.get("address")
+    if not isinstance(address, dict):
+        address = {}
+    metadata = record.get("metadata")
+    if isinstance(metadata, dict):
+        metadata = json.dumps(metadata, sort_keys=True, separators=(",", ":"))
+    elif metadata is not None:
+        metadata = json.dumps(metadata)
+    values = [_text(record.get(field)) if field not in TIMESTAMP_FIELDS
+              else _timestamp(record.get(field)) for field in PROFILE_FIELDS]
+    return tuple(values + [_text(address.get(field)) for field in ADDRESS_FIELDS] +
+                 [metadata])
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _timestamp(value) -> Optional[str]:
+    """
+    Timestamp fields in the ISO form of to_iso, the values that are not a date
+    (like MISSING) as they are.
+    """
+    try:
+        return to_iso(value)
+    except (AttributeError, TypeError, ValueError):
+        return _text(value)
+
+
+def profile_key(record: dict, account: str = None) -> Optional[str]:
+    """
+    Key of the record, from the first identifying field that is not missing,
+    otherwise from the username of the account it was scanned with.
+    """
+    for field in KEY_FIELDS:
+        value = record.get(field)
+        if value and value != MISSING:
+            return f"{field}:{value}"
+    return f"username:{account}" if account else None
+
+
+def from_row(row: sqlite3.Row) -> dict:
+    """
+    Build the user record back from a row, in the shape of user_data_profile.user_data.
+    """
+    record = {field: row[field] for field in PROFILE_FIELDS}
+    record["address"] = {field: row[field] for field in ADDRESS_FIELDS}
+    record["metadata"] = json.loads(row["metadata"]) if row["metadata"] else None
+    return record
+
+
+class ResultStore:
+    """
+    SQLite database of the scanned profiles in WAL mode, so readers are not blocked
+    while a scan writes. Every upsert call is one transaction. A connection is shared
+    between threads behind a lock, other processes open their own store.
+    """
+
+    def __init__(self, path: str = None, timeout: float = 30.0) -> None:
+        self.path = path or os.getenv("RESULT_STORE", DEFAULT_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(self.path, timeout=timeout,
+                                          check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def existing(self, keys: list) -> dict:
+        """
+        Method to read the stored rows of the keys, as column tuples.
+        """
+        rows = {}
+        for start in range(0, len(keys), FETCH_SIZE):
+            chunk = keys[start:start + FETCH_SIZE]
+            cursor = self.connection.execute(
+                f"SELECT profile_key, {', '.join(COLUMNS)} FROM profiles "
+                f"WHERE profile_key IN ({', '.join('?' for _ in chunk)})", chunk)
+            rows.update((row[0], tuple(row)[1:]) for row in cursor)
+        return rows
+
+    def upsert(self, records: Iterable[dict], scanned_at=None,
+               accounts: Iterable[str] = None) -> UpsertResult:
+        """
+        Method to insert or update the records in one transaction. The fields that
+        changed are added to the history, unchanged profiles only get a new scanned_at.
+        accounts are the usernames the records were scanned with, in the same order,
+        they key the records without id and account. Records without a key are
+        skipped, the last record of a key wins.
+        """
+        scanned_at = to_iso(scanned_at) or now_iso()
+        rows = {}
+        skipped = 0
+        for record, account in zip(records, repeat(None) if accounts is None else accounts):
+            key = profile_key(record, account)
+            if key is None:
+                skipped += 1
+                continue
+            rows[key] = to_row(record)
+        inserted = updated = unchanged = 0
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                stored = self.existing(list(rows))
+                values = []
+                history = []
+                touched = []
+                for key, row in rows.items():
+                    old = stored.get(key)
+                    if old is None:
+                        inserted += 1
+                        values.append((key,) + row + (scanned_at, scanned_at, scanned_at))
+                    elif old == row:
+                        unchanged += 1
+                        touched.append((scanned_at, key))
+                    else:
+                        updated += 1
+                        history.extend((key, column, before, after, scanned_at)
+                                       for column, before, after in zip(COLUMNS, old, row)
+                                       if before != after)
+                        values.append((key,) + row + (scanned_at, scanned_at, scanned_at))
+                self.connection.executemany(UPSERT, values)
+                self.connection.executemany(
+                    "UPDATE profiles SET scanned_at = ? WHERE profile_key = ?", touched)
+                self.connection.executemany(
+                    "INSERT INTO profile_history VALUES (?, ?, ?, ?, ?)", history)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        return UpsertResult(inserted, updated, unchanged, skipped)
+
+    def iterate(self, sql: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """
+        Method to stream the rows of a query in batches of FETCH_SIZE. The rows are
+        read on a cursor of their own, a write in between does not disturb it.
+        """
+        cursor = self.connection.cursor()
+        with self.lock:
+            cursor.execute(sql, params)
+        try:
+            while True:
+                with self.lock:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def conditions(profile_id: str = None, country: str = None, email: str = None,
+                   account: str = None, changed_since=None,
+                   updated_since=None) -> (str, tuple):
+        clauses = []
+        params = []
+        for column, value in (("id", profile_id), ("country", country), ("email", email),
+                              ("account", account)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if changed_since is not None:
+            clauses.append("changed_at >= ?")
+            params.append(to_iso(changed_since))
+        if updated_since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(to_iso(updated_since))
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), tuple(params)
+
+    def query(self, profile_id: str = None, country: str = None, email: str = None,
+              account: str = None, changed_since=None, updated_since=None,
+              limit: int = None) -> Iterator[dict]:
+        """
+        Stream the records matching all the given filters, the most recently changed
+        first. changed_since is when the store saw a change, updated_since compares
+        the updated_at of the records themselves.
+        """
+        where, params = self.conditions(profile_id, country, email, account, changed_since,
+                                        updated_since)
+        sql = f"SELECT * FROM profiles{where} ORDER BY changed_at DESC, profile_key"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        for row in self.iterate(sql, params):
+            yield from_row(row)
+
+    def count(self, **filters) -> int:
+        where, params = self.conditions(**filters)
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT COUNT(*) FROM profiles{where}", params).fetchone()[0]
+
+    def get(self, record_or_key, account: str = None) -> Optional[dict]:
+        """
+        Stored version of a record, by the record itself (and the account it was
+        scanned with) or its key.
+        """
+        key = (record_or_key if isinstance(record_or_key, str)
+               else profile_key(record_or_key, account))
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM profiles WHERE profile_key = ?",
+                                          (key,)).fetchone()
+        return from_row(row) if row else None
+
+    def history(self, record_or_key=None, since=None, account: str = None) -> Iterator[dict]:
+        """
+        Stream the field changes of a profile (the record, with the account it was
+        scanned with, or its key), or of every profile, oldest first.
+        """
+        clauses = []
+        params = []
+        if record_or_key is not None:
+            clauses.append("profile_key = ?")
+            params.append(record_or_key if isinstance(record_or_key, str)
+                          else profile_key(record_or_key, account))
+        if since is not None:
+            clauses.append("changed_at >= ?")
+            params.append(to_iso(since))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        for row in self.iterate(f"SELECT * FROM profile_history{where} "
+                                f"ORDER BY changed_at, rowid", tuple(params)):
+            yield dict(row)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class SqliteSink(OutputSink):
+    """
+    Sink that upserts the level_2 records into a ResultStore, in batches of
+    batch_size or every flush_interval seconds, keyed with the account they were
+    scanned with when they have no id. The other kinds are dropped.
+    """
+
+    def __init__(self, path: str = None, batch_size: int = 100,
+                 flush_interval: float = 1.0) -> None:
+        self.store = ResultStore(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def write(self, kind: str, record: dict, account: str = None):
+        if kind != "level_2":
+            return
+        with self.lock:
+            # The parser keeps working on its dict, the copy is what was validated
+            self.buffer.append((json.loads(json.dumps(record)), account))
+            due = (len(self.buffer) >= self.batch_size or
+                   time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Method to upsert the buffered records in one transaction.
+        """
+        with self.lock:
+            entries, self.buffer = self.buffer, []
+            self.last_flush = time.monotonic()
+        if entries:
+            records, accounts = zip(*entries)
+            self.store.upsert(records, accounts=accounts)
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Store and query the scanned profiles.")
+    args.add_argument("--db", help="Database file (default: RESULT_STORE or "
+                                   "~/.cache/argyle/results.db)")
+    commands = args.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Validate and upsert records from output files")
+    load.add_argument("paths", nargs="+", help="JSON Lines output files or json files")
+    load.add_argument("--chunk-size", type=int, default=1000)
+    query = commands.add_parser("query", help="Print the matching records as JSON Lines")
+    query.add_argument("--id", dest="profile_id")
+    query.add_argument("--country")
+    query.add_argument("--email")
+    query.add_argument("--account")
+    query.add_argument("--changed-since", help="ISO date or datetime, UTC if naive")
+    query.add_argument("--updated-since", help="ISO date or datetime, UTC if naive")
+    query.add_argument("--limit", type=int)
+    query.add_argument("--count", action="store_true", help="Only print the number of records")
+    history = commands.add_parser("history", help="Print the field changes of a profile")
+    history.add_argument("profile_key", nargs="?", help="Like id:<id> or username:<username>")
+    history.add_argument("--since")
+    options = args.parse_args(argv)
+
+    store = ResultStore(options.db)
+    try:
+        if options.command == "import":
+            # pydantic is only needed to import, not to query
+            from batch_validation import read_entries, validate_stream
+            # Accounts of the records read and not validated yet
+            accounts = []
+
+            def records():
+                for path in options.paths:
+                    for account, record in read_entries(path):
+                        accounts.append(account)
+                        yield record
+
+            totals = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "invalid": 0}
+            for result in validate_stream(records(), options.chunk_size):
+                chunk = accounts[:len(result.models)]
+                del accounts[:len(result.models)]
+                valid = [(model.dict(), account) for model, account in zip(result.models, chunk)
+                         if model is not None]
+                stored = store.upsert([record for record, _ in valid],
+                                      accounts=[account for _, account in valid])
+                for field, value in stored._asdict().items():
+                    totals[field] += value
+                totals["invalid"] += len(result.invalid_indexes)
+            print(json.dumps(totals))
+            return 0
+        if options.command == "query":
+            filters = {"profile_id": options.profile_id, "country": options.country,
+                       "email": options.email, "account": options.account, "changed_since": options.changed_since,
+                       "updated_since": options.updated_since}
+            if options.count:
+                print(store.count(**filters))
+                return 0
+            for record in store.query(limit=options.limit, **filters):
+                print(json.dumps(record))
+            return 0
+        for change in store.history(options.profile_key, options.since):
+            print(json.dumps(change))
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
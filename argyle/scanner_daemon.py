@@ -0,0 +1,387 @@
+"""
+Long-lived scanner: keeps warm headless browsers and scans the accounts sent to it
+over a local Unix socket, each job in a fresh context of an already running browser.
+
+    python scanner_daemon.py serve --browsers 1 --concurrency 4 --max-jobs 200
+    python scanner_daemon.py scan accounts.json [--wait]
+    python scanner_daemon.py status
+    python scanner_daemon.py shutdown
+
+The protocol is one json object per line in each direction, {"command": ...}:
+"scan" queues an account ({"username", "password", "secret", "wait"}), "job" returns
+the state of a job ({"job_id", "wait"}), "status" the health and queue depth of the daemon
+and "shutdown" stops it once the running jobs are done.
+A browser is replaced by a fresh process after it served max_jobs contexts, when it
+crashed, and all of them when their RSS grew by more than max_rss_growth bytes.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+from collections import OrderedDict
+from async_scanner import (AsyncUpworkScanner, BrowserPool, Credentials, ScanOptions,
+                           ScanResult, add_scan_arguments, load_credentials, scan_options)
+from config import configure
+from metrics import METRICS, child_pids, rss_bytes
+from output_sink import OutputSink, open_sink
+from upwork_parser import UpworkParser
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "scanner.sock")
+# Finished jobs kept for the "job" command, the oldest are forgotten first
+JOB_HISTORY = 1000
+
+
+class ScannerDaemon:
+    """
+    Job queue served on a Unix socket, with concurrency workers scanning the jobs on a
+    shared pool of warm browsers. The records go to the sink and every job is scanned
+    with the options, like in scan_accounts.
+    """
+
+    def __init__(self, socket_path: str = None, browsers: int = 1, concurrency: int = 4,
+                 max_jobs: int = 200, max_rss_growth: int = 512 * 1024 * 1024,
+                 sink: OutputSink = None, pool: BrowserPool = None,
+                 options: ScanOptions = None) -> None:
+        self.socket_path = socket_path or os.getenv("ARGYLE_DAEMON_SOCKET", DEFAULT_SOCKET)
+        self.concurrency = concurrency
+        self.max_jobs = max_jobs
+        self.max_rss_growth = max_rss_growth
+        self.sink = sink
+        self.options = options or ScanOptions()
+        self.pool = pool or BrowserPool(size=browsers, headless=True)
+        self.ids = itertools.count(1)
+        self.jobs = OrderedDict()
+        self.finished = {}
+        self.queue = None
+        self.stopping = None
+        self.recycle_lock = None
+        self.workers = []
+        self.server = None
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = {"jobs": 0, "memory": 0, "crashed": 0}
+        self.rss_baseline = None
+        self.started_at = None
+
+    async def start(self):
+        """
+        Launch the browsers and the workers, then listen on the socket.
+        """
+        self.queue = asyncio.Queue()
+        self.stopping = asyncio.Event()
+        self.recycle_lock = asyncio.Lock()
+        await self.pool.start()
+        self.started_at = time.monotonic()
+        self.workers = [asyncio.ensure_future(self.worker()) for _ in range(self.concurrency)]
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.remove_stale_socket()
+        self.server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        # The credentials of the jobs go over the socket
+        os.chmod(self.socket_path, 0o600)
+        print(f"Scanner daemon listening on {self.socket_path}")
+
+    async def serve(self):
+        """
+        Run until a shutdown command, then stop.
+        """
+        await self.start()
+        try:
+            await self.stopping.wait()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Stop listening, wait for the running jobs and close the browsers. The jobs
+        still queued are cancelled.
+        """
+        self.stopping.set()
+        self.server.close()
+        await self.server.wait_closed()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        while not self.queue.empty():
+            job_id, _ = self.queue.get_nowait()
+            self.finish(job_id, ScanResult(self.jobs[job_id]["username"], None, "cancelled"),
+                        status="cancelled")
+        await self.pool.stop()
+        if self.sink:
+            self.sink.flush()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        for path in METRICS.export():
+            print(f"Metrics written to {path}")
+
+    def remove_stale_socket(self):
+        """
+        Method to remove the socket left by a daemon that did not stop cleanly, and to
+        refuse to start next to one that is still running.
+        """
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+            return
+        raise RuntimeError(f"A scanner daemon is already listening on {self.socket_path}")
+
+    def submit(self, credentials: Credentials) -> dict:
+        """
+        Method to queue a scan job.
+        """
+        job_id = str(next(self.ids))
+        self.jobs[job_id] = {"job_id": job_id, "username": credentials.username,
+                             "status": "queued", "submitted_at": time.time()}
+        self.finished[job_id] = asyncio.Event()
+        self.queue.put_nowait((job_id, credentials))
+        while len(self.jobs) > JOB_HISTORY:
+            oldest = next(iter(self.jobs))
+            if self.jobs[oldest]["status"] in ("queued", "running"):
+                break
+            del self.jobs[oldest]
+        return self.jobs[job_id]
+
+    async def worker(self):
+        """
+        Method to take the jobs off the queue one at a time until the daemon stops.
+        """
+        stopped = asyncio.ensure_future(self.stopping.wait())
+        try:
+            while not self.stopping.is_set():
+                job = asyncio.ensure_future(self.queue.get())
+                await asyncio.wait({job, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if not job.done():
+                    job.cancel()
+                    break
+                job_id, credentials = job.result()
+                await self.run_job(job_id, credentials)
+        finally:
+            stopped.cancel()
+
+    async def run_job(self, job_id: str, credentials: Credentials):
+        """
+        Method to scan the account of a job in a fresh context, then check whether a
+        browser has to be replaced.
+        """
+        self.jobs[job_id]["status"] = "running"
+        self.running += 1
+        try:
+            result = await AsyncUpworkScanner(UpworkParser(self.sink), credentials, self.pool,
+                                              self.options).run()
+        except Exception as err:
+            result = ScanResult(credentials.username, None, f"daemon: {err}")
+        finally:
+            self.running -= 1
+        self.finish(job_id, result, "done" if result.data else "failed")
+        if self.sink:
+            self.sink.flush()
+        try:
+            await self.recycle()
+        except Exception as err:
+            print(f"Failed to recycle the browsers. Got err: {err}")
+
+    def finish(self, job_id: str, result: ScanResult, status: str):
+        """
+        Method to record the outcome of a job and wake up the clients waiting for it.
+        """
+        if status == "done":
+            self.completed += 1
+        else:
+            self.failed += 1
+        METRICS.count("argyle_daemon_jobs_total", outcome=status)
+        if job_id in self.jobs:
+            self.jobs[job_id].update({"status": status, "error": result.error,
+                                      "stats": result.stats, "data": result.data,
+                                      "finished_at": time.time()})
+        self.finished.pop(job_id).set()
+
+    async def recycle(self):
+        """
+        Method to replace the browsers that served max_jobs contexts or crashed, and all
+        of them when the browser processes grew past the RSS budget.
+        """
+        async with self.recycle_lock:
+            for browser in list(self.pool.browsers):
+                if not browser.is_connected():
+                    print("Browser disconnected, launching a new one.")
+                    self.restarts["crashed"] += 1
+                    await self.pool.restart(browser)
+                elif self.max_jobs and self.pool.jobs.get(browser, 0) >= self.max_jobs:
+                    print(f"Browser served {self.pool.jobs[browser]} jobs, restarting it.")
+                    self.restarts["jobs"] += 1
+                    await self.pool.restart(browser)
+            await self.pool.close_retired()
+            # The baseline is taken again once the replaced browsers are gone
+            if not self.max_rss_growth or self.pool.retired:
+                return
+            rss = self.browser_rss()
+            if self.rss_baseline is None:
+                self.rss_baseline = rss
+            elif rss - self.rss_baseline > self.max_rss_growth:
+                print(f"Browser memory grew by {(rss - self.rss_baseline) >> 20} MB, "
+                      f"restarting the browsers.")
+                self.restarts["memory"] += 1
+                self.rss_baseline = None
+                for browser in list(self.pool.browsers):
+                    await self.pool.restart(browser)
+
+    def browser_rss(self) -> int:
+        """
+        Method to sum the RSS of the playwright driver and browser processes.
+        """
+        return sum(rss_bytes(pid) for pid in child_pids(os.getpid()))
+
+    def status(self) -> dict:
+        """
+        Method to report the health, queue depth and browsers of the daemon.
+        """
+        browsers = [{"jobs": self.pool.jobs.get(browser, 0), "contexts": len(browser.contexts),
+                     "connected": browser.is_connected()} for browser in self.pool.browsers]
+        status = {
+            "healthy": bool(browsers) and all(item["connected"] for item in browsers)
+            and not self.stopping.is_set(),
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "queue_depth": self.queue.qsize(),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "browsers": browsers,
+            "retired_browsers": len(self.pool.retired),
+            "restarts": dict(self.restarts),
+            "browser_rss_bytes": self.browser_rss(),
+            "rss_baseline_bytes": self.rss_baseline,
+        }
+        if self.options.rate_controller:
+            status["rate"] = self.options.rate_controller.stats()
+        return status
+
+    async def command(self, request: dict) -> dict:
+        """
+        Method to answer one request of a client.
+        """
+        command = request.get("command")
+        if command == "status":
+            return self.status()
+        if command == "scan":
+            if self.stopping.is_set():
+                return {"error": "The daemon is shutting down"}
+            job = self.submit(Credentials(request["username"], request["password"],
+                                          request.get("secret")))
+            if request.get("wait"):
+                await self.finished[job["job_id"]].wait()
+            return dict(job, queue_depth=self.queue.qsize())
+        if command == "job":
+            job_id = str(request.get("job_id"))
+            if job_id not in self.jobs:
+                return {"error": f"Unknown job {job_id}"}
+            if request.get("wait") and job_id in self.finished:
+                await self.finished[job_id].wait()
+            return self.jobs[job_id]
+        if command == "shutdown":
+            self.stopping.set()
+            return {"status": "stopping", "running": self.running,
+                    "cancelled": self.queue.qsize()}
+        return {"error": f"Unknown command {command}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Method to serve a client connection, one json request per line.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.command(json.loads(line))
+                except (ValueError, KeyError, TypeError) as err:
+                    response = {"error": f"Bad request: {err}"}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def request(command: dict, socket_path: str = None, timeout: float = None) -> dict:
+    """
+    Send one request to the daemon and return its response.
+    """
+    path = socket_path or os.getenv("ARGYLE_DAEMON_SOCKET", DEFAULT_SOCKET)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path)
+        client.sendall(json.dumps(command).encode("utf-8") + b"\n")
+        with client.makefile("rb") as reader:
+            return json.loads(reader.readline())
+
+
+def main(argv: list = None) -> int:
+    args = argparse.ArgumentParser(description="Scan accounts on warm browsers kept alive.")
+    args.add_argument("--socket", help="Unix socket of the daemon (default: "
+                                       "ARGYLE_DAEMON_SOCKET or ~/.cache/argyle/scanner.sock)")
+    commands = args.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run the daemon")
+    serve.add_argument("--browsers", type=int, default=1)
+    serve.add_argument("--concurrency", type=int, default=4)
+    serve.add_argument("--max-jobs", type=int, default=200,
+                       help="Restart a browser after it served this many jobs")
+    serve.add_argument("--max-rss-growth-mb", type=int, default=512,
+                       help="Restart the browsers when their memory grew by this much")
+    serve.add_argument("--output", default="scan_results.jsonl",
+                       help="JSON Lines file the records are appended to, or a .db "
+                            "SQLite result store they are upserted into")
+    add_scan_arguments(serve)
+    scan = commands.add_parser("scan", help="Queue the accounts of a json file")
+    scan.add_argument("accounts", help="Json file with the account credentials")
+    scan.add_argument("--wait", action="store_true", help="Wait for the scans to finish")
+    job = commands.add_parser("job", help="Show a job")
+    job.add_argument("job_id")
+    commands.add_parser("status", help="Show the health and queue depth")
+    commands.add_parser("shutdown", help="Stop after the running jobs")
+    options = args.parse_args(argv)
+
+    if options.command == "serve":
+        configure()
+        sink = open_sink(options.output)
+        daemon = ScannerDaemon(
+            options.socket, browsers=options.browsers, concurrency=options.concurrency,
+            max_jobs=options.max_jobs, max_rss_growth=options.max_rss_growth_mb * 1024 * 1024,
+            sink=sink, options=scan_options(options, options.concurrency))
+        try:
+            asyncio.run(daemon.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
+        return 0
+
+    if options.command == "scan":
+        jobs = [request(dict(account._asdict(), command="scan"), options.socket)
+                for account in load_credentials(options.accounts)]
+        if options.wait:
+            jobs = [request({"command": "job", "job_id": job["job_id"], "wait": True},
+                            options.socket) if "job_id" in job else job for job in jobs]
+        for job in jobs:
+            job.pop("data", None)
+            print(json.dumps(job))
+        return 0 if not any(job.get("error") for job in jobs) else 1
+    if options.command == "job":
+        response = request({"command": "job", "job_id": options.job_id}, options.socket)
+    else:
+        response = request({"command": options.command}, options.socket)
+    print(json.dumps(response, indent=2))
+    return 0 if not response.get("error") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
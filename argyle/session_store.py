@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "argyle", "sessions")
+
+
+class SessionStore:
+    """
+    Encrypted at rest cache of the browser storage state (cookies and local storage)
+    of every account. The key is taken from the SESSION_KEY environment variable,
+    otherwise it is generated once and kept next to the sessions.
+    """
+
+    def __init__(self, cache_dir: str = None, key: bytes = None) -> None:
+        self.cache_dir = cache_dir or os.getenv("SESSION_CACHE_DIR", DEFAULT_CACHE_DIR)
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        # cryptography is only loaded when a store is created
+        from cryptography.fernet import Fernet
+        self.fernet = Fernet(key or os.getenv("SESSION_KEY") or self.load_key())
+
+    def load_key(self) -> bytes:
+        """
+        Method to read the local key, or create it readable only by the owner.
+        """
+        path = os.path.join(self.cache_dir, ".key")
+        try:
+            with open(path, "rb") as infile:
+                return infile.read()
+        except FileNotFoundError:
+            from cryptography.fernet import Fernet
+            key = Fernet.generate_key()
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as outfile:
+                outfile.write(key)
+            return key
+
+    def path_for(self, username: str) -> str:
+        """
+        The file name is a hash so the usernames are not visible on disk either.
+        """
+        digest = hashlib.sha256(username.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.session")
+
+    def load(self, username: str) -> Optional[dict]:
+        """
+        Method to get the saved storage state of the account, if there is a valid one.
+        """
+        from cryptography.fernet import InvalidToken
+        try:
+            with open(self.path_for(username), "rb") as infile:
+                return json.loads(self.fernet.decrypt(infile.read()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError):
+            print("Discarding unreadable session state.")
+            self.delete(username)
+            return None
+
+    def save(self, username: str, state: dict):
+        """
+        Method to encrypt and save the storage state of the account.
+        """
+        path = self.path_for(username)
+        token = self.fernet.encrypt(json.dumps(state).encode("utf-8"))
+        fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as outfile:
+            outfile.write(token)
+        os.replace(f"{path}.tmp", path)
+
+    def delete(self, username: str):
+        """
+        Method to forget the storage state of the account.
+        """
+        try:
+            os.remove(self.path_for(username))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,101 @@
+import fcntl
+import gzip
+import hashlib
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+
+class SnapshotArchive:
+    """
+    Content-addressed archive of the raw page bodies handed to the parser. Bodies are
+    keyed by their sha256 and compressed once (zstd when installed, gzip otherwise),
+    the same page captured again is only added to the index. The index is an
+    append-only JSON Lines file with the account, page type and time of every capture.
+    """
+
+    def __init__(self, root: str, codec: str = None) -> None:
+        self.root = root
+        self.codec = codec or ("zstd" if zstandard else "gzip")
+        self.index_path = os.path.join(root, "index.jsonl")
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def blob_path(self, digest: str, codec: str) -> str:
+        extension = "zst" if codec == "zstd" else "gz"
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{extension}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def put(self, body: str, account: str, page_type: str, captured_at: str = None) -> str:
+        """
+        Method to store a body and record the capture in the index, returns its digest.
+        """
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as outfile:
+                outfile.write(self.compress(data))
+            os.replace(tmp_path, path)
+
+        entry = {
+            "digest": digest,
+            "codec": self.codec,
+            "account": account,
+            "page_type": page_type,
+            "captured_at": captured_at or datetime.now(timezone.utc).isoformat(),
+            "size": len(data)
+        }
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        return digest
+
+    def get(self, digest: str, codec: str = None) -> str:
+        """
+        Method to read a body back, the compressed blob is memory-mapped.
+        """
+        codec = codec or self.codec
+        with open(self.blob_path(digest, codec), "rb") as infile:
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+                if codec == "zstd":
+                    data = zstandard.ZstdDecompressor().decompress(blob)
+                else:
+                    data = gzip.decompress(blob)
+        return data.decode("utf-8")
+
+    def entries(self, account: str = None, page_type: str = None,
+                since: str = None, until: str = None):
+        """
+        Iterate over the index entries matching the filters, in capture order.
+        since and until are ISO timestamps, until is exclusive.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path) as infile:
+            for line in infile:
+                entry = json.loads(line)
+                if account and entry["account"] != account:
+                    continue
+                if page_type and entry["page_type"] != page_type:
+                    continue
+                if since and entry["captured_at"] < since:
+                    continue
+                if until and entry["captured_at"] >= until:
+                    continue
+                yield entry
@@ -0,0 +1,253 @@
+import asyncio
+import multiprocessing
+import os
+import unittest
+from unittest import mock
+import pytest
+from asset_cache import AssetCache, AssetRouter, expiry
+from resource_filter import ResourceFilter
+
+BUNDLE_URL = "https://www.upwork.com/_nuxt/app.3f2a9c1b.js"
+STYLE_URL = "https://www.upwork.com/static/main.css"
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type="script", method="GET") -> None:
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+        self.headers = {"accept": "*/*"}
+
+
+class FakeResponse:
+    def __init__(self, request, status=200, headers=None, body=b"") -> None:
+        self.request = request
+        self.status = status
+        self.headers = headers or {}
+        self.content = body
+
+    async def body(self):
+        return self.content
+
+
+class FakeRoute:
+    """
+    Route of the fake server, which answers with the asset and 304 when it matches
+    the validators sent.
+    """
+
+    def __init__(self, request, server: dict) -> None:
+        self.request = request
+        self.server = server
+        self.outcome = None
+        self.fetched_headers = None
+
+    async def fetch(self, headers=None):
+        self.fetched_headers = headers
+        status, response_headers, body = self.server[self.request.url]
+        if headers and headers.get("if-none-match") == response_headers.get("etag"):
+            return FakeResponse(self.request, 304, {"etag": response_headers["etag"]})
+        return FakeResponse(self.request, status, response_headers, body)
+
+    async def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.outcome = ("fulfilled", response.status if response else status, body)
+
+    async def fallback(self):
+        self.outcome = ("fallback",)
+
+    async def abort(self, error_code=None):
+        self.outcome = ("aborted",)
+
+
+class LegacyRoute(FakeRoute):
+    """
+    Route of playwright before route.fetch.
+    """
+
+    def __getattribute__(self, name):
+        if name == "fetch":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+class FakeContext:
+    """
+    Runs the route handlers like playwright: the last one registered first, each
+    fallback goes to the next one.
+    """
+
+    def __init__(self) -> None:
+        self.handlers = []
+        self.listeners = {}
+
+    async def route(self, pattern, handler):
+        self.handlers.append(handler)
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    async def dispatch(self, route):
+        fallback = route.fallback
+        handlers = list(reversed(self.handlers))
+
+        async def next_handler():
+            if handlers:
+                await handlers.pop(0)(route)
+            else:
+                await fallback()
+
+        route.fallback = next_handler
+        await next_handler()
+
+
+def put_assets(path: str, start: int):
+    cache = AssetCache(path)
+    for index in range(start, start + 50):
+        cache.put(f"https://www.upwork.com/_nuxt/chunk.a{index:07x}.js", 200, {},
+                  bytes([index % 256]) * 1000)
+        assert cache.get(BUNDLE_URL).body == b"bundle"
+
+
+class AssetCacheTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.path = str(tmp_path / "assets")
+        self.cache = AssetCache(self.path)
+        self.server = {
+            BUNDLE_URL: (200, {"content-encoding": "br", "content-type": "text/javascript"},
+                         b"bundle"),
+            STYLE_URL: (200, {"etag": '"v1"', "cache-control": "no-cache"}, b"body{}"),
+            "https://www.upwork.com/api/profile": (200, {"cache-control": "max-age=60"},
+                                                   b"{}"),
+        }
+
+    def serve(self, router, url, resource_type="script", route_cls=FakeRoute):
+        route = route_cls(FakeRequest(url, resource_type), self.server)
+        asyncio.run(router.handle(route))
+        return route
+
+    def test_expiry_rules(self):
+        assert expiry(BUNDLE_URL, {}, 100) == float("inf")
+        assert expiry(STYLE_URL, {"cache-control": "public, max-age=60"}, 100) == 160
+        assert expiry(STYLE_URL, {"cache-control": "max-age=60, immutable"}, 100) == float("inf")
+        assert expiry(STYLE_URL, {"last-modified": "Mon, 05 Oct 2026 10:00:00 GMT"}, 100) == 100
+        assert expiry(STYLE_URL, {"cache-control": "no-store", "etag": '"v1"'}, 100) is None
+        assert expiry(BUNDLE_URL, {"cache-control": "private"}, 100) is None
+        assert expiry(STYLE_URL, {}, 100) is None
+
+    def test_store_and_read(self):
+        stored = self.cache.put(BUNDLE_URL, 200, {"Content-Encoding": "gzip", "ETag": '"a"'},
+                                b"bundle")
+        assert self.cache.get(BUNDLE_URL) == stored
+        assert stored.headers == {"etag": '"a"'} and stored.is_fresh()
+        assert self.cache.put(STYLE_URL, 200, {}, b"body{}") is None
+        assert self.cache.put(BUNDLE_URL + "?v=2", 404, {}, b"") is None
+        # A truncated entry is a miss
+        with open(self.cache.path_for(BUNDLE_URL), "r+b") as entry:
+            entry.truncate(os.path.getsize(self.cache.path_for(BUNDLE_URL)) - 1)
+        assert self.cache.get(BUNDLE_URL) is None
+
+    def test_least_recently_used_are_evicted(self):
+        cache = AssetCache(self.path, max_bytes=4500)
+        urls = [f"https://www.upwork.com/_nuxt/chunk.a{index:07x}.js" for index in range(4)]
+        for index, url in enumerate(urls[:3]):
+            cache.put(url, 200, {}, b"x" * 1000)
+            os.utime(cache.path_for(url), (1000 + index, 1000 + index))
+        assert cache.get(urls[0])
+        cache.put(urls[3], 200, {}, b"x" * 1000)
+        assert [cache.get(url) is not None for url in urls] == [True, False, True, True]
+
+    def test_size_is_tracked_between_scans(self):
+        cache = AssetCache(self.path, max_bytes=10 ** 6, scan_every=10)
+        scans = []
+        scandir = os.scandir
+
+        def counting_scandir(path):
+            scans.append(path)
+            return scandir(path)
+
+        with mock.patch("asset_cache.os.scandir", counting_scandir):
+            for index in range(25):
+                cache.put(f"https://www.upwork.com/_nuxt/chunk.a{index:07x}.js", 200, {},
+                          b"x" * 1000)
+            # Writing an entry again only counts the difference
+            cache.put("https://www.upwork.com/_nuxt/chunk.a0000000.js", 200, {}, b"x" * 500)
+        # The first write and every tenth one scan the directory
+        assert len(scans) == 3
+        on_disk = sum(entry.stat().st_size for entry in os.scandir(self.path)
+                      if entry.name.endswith(".asset"))
+        assert cache.size == on_disk
+
+    def test_hashed_names(self):
+        for url in [BUNDLE_URL, "https://www.upwork.com/_nuxt/3f2a9c1b.js",
+                    "https://www.upwork.com/fonts/inter-0123abcd4567.woff2?v=1"]:
+            assert expiry(url, {}, 100) == float("inf"), url
+        for url in ["https://www.upwork.com/_nuxt/app.js", STYLE_URL,
+                    "https://www.upwork.com/static/facade.css",
+                    "https://www.upwork.com/photos/20231015.jpg",
+                    "https://www.upwork.com/avatar/12345678.png"]:
+            assert expiry(url, {}, 100) is None, url
+
+    def test_shared_between_processes(self):
+        self.cache.put(BUNDLE_URL, 200, {}, b"bundle")
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=put_assets, args=(self.path, start))
+                   for start in (0, 25)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+        assert [worker.exitcode for worker in workers] == [0, 0]
+        assert all(self.cache.get(f"https://www.upwork.com/_nuxt/chunk.a{index:07x}.js")
+                   for index in range(75))
+        assert not [name for name in os.listdir(self.path) if name.endswith(".tmp")]
+
+    def test_router_hits_misses_and_revalidation(self):
+        first = AssetRouter(self.cache)
+        assert self.serve(first, BUNDLE_URL).outcome == ("fulfilled", 200, b"bundle")
+        assert self.serve(first, STYLE_URL, "stylesheet").outcome == (
+            "fulfilled", 200, b"body{}")
+        assert self.serve(first, "https://www.upwork.com/api/profile", "fetch").outcome == (
+            "fallback",)
+        assert self.serve(first, "https://www.upwork.com/nx/find-work/", "document").outcome == (
+            "fallback",)
+
+        second = AssetRouter(self.cache)
+        bundle = self.serve(second, BUNDLE_URL)
+        assert bundle.outcome == ("fulfilled", 200, b"bundle") and bundle.fetched_headers is None
+        style = self.serve(second, STYLE_URL, "stylesheet")
+        assert style.fetched_headers["if-none-match"] == '"v1"'
+        assert style.outcome == ("fulfilled", 200, b"body{}")
+        assert first.stats() == {"hits": 0, "revalidated": 0, "misses": 2, "stored": 2,
+                                 "hit_rate": 0.0, "bytes_saved": 0, "bytes_stored": 12}
+        assert second.stats() == {"hits": 1, "revalidated": 1, "misses": 0, "stored": 0,
+                                  "hit_rate": 1.0, "bytes_saved": 12, "bytes_stored": 0}
+
+    def test_router_without_route_fetch(self):
+        router = AssetRouter(self.cache)
+        route = self.serve(router, BUNDLE_URL, route_cls=LegacyRoute)
+        assert route.outcome == ("fallback",)
+        asyncio.run(router.on_response(FakeResponse(route.request, 200, {}, b"bundle")))
+        assert self.cache.get(BUNDLE_URL).body == b"bundle"
+        assert self.serve(router, BUNDLE_URL, route_cls=LegacyRoute).outcome == (
+            "fulfilled", 200, b"bundle")
+
+    def test_blocked_requests_never_reach_the_cache(self):
+        context = FakeContext()
+        router = AssetRouter(self.cache)
+        resource_filter = ResourceFilter()
+
+        async def scan():
+            await router.attach(context)
+            await resource_filter.attach(context)
+            requests = [FakeRequest(BUNDLE_URL, "script"),
+                        FakeRequest("https://www.upwork.com/avatar.3f2a9c1b.png", "image"),
+                        FakeRequest("https://www.upwork.com/nx/find-work/", "document")]
+            routes = [FakeRoute(request, self.server) for request in requests]
+            for route in routes:
+                await context.dispatch(route)
+            return [route.outcome[0] for route in routes]
+
+        assert asyncio.run(scan()) == ["fulfilled", "aborted", "fallback"]
+        assert router.stats()["misses"] == 1
+        assert resource_filter.stats()["blocked_requests"] == 1
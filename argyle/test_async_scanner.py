@@ -0,0 +1,457 @@
+import asyncio
+import copy
+import threading
+import unittest
+import pytest
+from async_scanner import (AsyncUpworkScanner, Credentials, HOME_PATH, SCAN_STEPS,
+                           ScanOptions, scan_accounts)
+import async_scanner
+from checkpoint import CheckpointStore, RetryPolicy
+from fingerprint import FingerprintStore
+from metrics import METRICS, TimedPage
+from parse_pool import ParseStage
+from parsel import Selector
+from rate_control import RateController
+from session_store import SessionStore
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+from user_data_profile import user_data
+
+PROFILE_URL = "/freelancers/~0100e1354146799c5e"
+CONTACT_INFO_URL = "/freelancers/settings/contactInfo"
+NO_DELAY = {step: RetryPolicy(retries=1, base_delay=0) for step in ["login"] + SCAN_STEPS}
+NO_RETRIES = {step: RetryPolicy(retries=0) for step in ["login"] + SCAN_STEPS}
+
+
+class FakePage:
+    """
+    Stand-in for a playwright page that serves the recorded bodies.
+    """
+
+    def __init__(self, context) -> None:
+        self.context = context
+        self.body = "<div></div>"
+        self.url = "about:blank"
+        self.closed = False
+        self.filled = {}
+        self.body_reads = 0
+
+    def once(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def goto(self, url, timeout=None):
+        self.context.visited.append(url)
+        self.url = url
+        if url.endswith(HOME_PATH):
+            self.body = map_html_body['parse_homepage'] if self.context.logged_in else ""
+        elif url.endswith(CONTACT_INFO_URL):
+            self.body = map_html_body['parse_contact_info_data']
+        elif url.endswith(PROFILE_URL):
+            self.body = map_html_body['parse_profile_data']
+        elif "/login" in url:
+            self.body = '<input id="login_username">'
+
+    async def wait_for_selector(self, selector, timeout=None):
+        self.context.waited.append(selector)
+        if selector in ('#login_answer', 'input[id="deviceAuth_answer"]'):
+            raise TimeoutError(f"Timeout waiting for {selector}")
+        if selector == 'a[class="profile-title"]' and not self.context.logged_in:
+            raise TimeoutError(f"Timeout waiting for {selector}")
+
+    async def fill(self, selector, value):
+        self.filled[selector] = value
+
+    async def click(self, selector):
+        if selector == '#login_control_continue':
+            self.context.logins += 1
+            self.context.logged_in = True
+            self.body = map_html_body['parse_homepage']
+        elif selector == 'a.profile-title':
+            await self.goto(PROFILE_URL)
+
+    async def inner_html(self, selector):
+        if self.closed:
+            raise RuntimeError("Target page has been closed")
+        self.body_reads += 1
+        return self.body
+
+    async def evaluate(self, script, spec=None):
+        """
+        Python version of the in-page extraction script, run over the current body.
+        """
+        if spec is None:
+            return "FakeBrowser/1.0"
+        document = Selector(text=self.body)
+        scopes = {name: document.xpath(xpath) for name, xpath in spec["anchors"].items()}
+        values = {}
+        for field in spec["fields"]:
+            scope = scopes[field["anchor"]] if field["anchor"] else document
+            matches = scope.xpath(field["xpath"]).getall()
+            values[field["name"]] = matches if field["many"] else matches[:1]
+        probes = {name: bool(document.xpath(xpath)) for name, xpath in spec["probes"].items()}
+        return {"values": values, "probes": probes}
+
+    async def get_attribute(self, selector, name):
+        return PROFILE_URL if selector == 'a.profile-title' else CONTACT_INFO_URL
+
+
+class FakeContext:
+    def __init__(self, pool, storage_state=None) -> None:
+        self.pool = pool
+        self.visited = []
+        self.pages = []
+        self.logins = 0
+        self.routes = []
+        self.waited = []
+        self.saved_after = None
+        self.logged_in = bool(storage_state) and pool.sessions_valid
+
+    async def storage_state(self):
+        self.saved_after = list(self.waited)
+        return {"cookies": [{"name": "session", "value": "token"}], "origins": []}
+
+    async def cookies(self):
+        return [{"name": "session", "value": "token"}] if self.logged_in else []
+
+    async def clear_cookies(self):
+        self.logged_in = False
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    def on(self, event, handler):
+        pass
+
+    async def new_page(self):
+        self.pages.append(FakePage(self))
+        return self.pages[-1]
+
+    async def close(self):
+        self.pool.open_contexts -= 1
+
+
+class FakePool:
+    def __init__(self, *args, **kwargs) -> None:
+        self.open_contexts = 0
+        self.max_open_contexts = 0
+        self.contexts = []
+        self.sessions_valid = True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def new_context(self, **kwargs):
+        self.open_contexts += 1
+        self.max_open_contexts = max(self.max_open_contexts, self.open_contexts)
+        context = FakeContext(self, kwargs.get("storage_state"))
+        self.contexts.append(context)
+        # Let the other accounts run while this context is open
+        await asyncio.sleep(0)
+        return context
+
+
+class FakeFetcher:
+    """
+    Stand-in for the http fetcher that serves the recorded profile and contact info pages.
+    """
+    fetched = []
+
+    def __init__(self, base_url, cookies, user_agent=None) -> None:
+        self.cookies = cookies
+
+    def fetch(self, path):
+        self.fetched.append(path)
+        if path == CONTACT_INFO_URL:
+            return map_html_body['parse_contact_info_data']
+        return map_html_body['parse_profile_data']
+
+    def close(self):
+        pass
+
+
+class AsyncScannerTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path, monkeypatch, memory_sink):
+        # The parser writes its output one directory up
+        workdir = tmp_path / "run"
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+        self.pool = FakePool()
+        monkeypatch.setattr(async_scanner, "BrowserPool", lambda *args, **kwargs: self.pool)
+        self.credentials = Credentials("bobby", "secret-password", "answer")
+        self.cache_dir = str(tmp_path / "sessions")
+        self.tmp_path = tmp_path
+        self.monkeypatch = monkeypatch
+        self.sink = memory_sink
+
+    def test_run_single_account(self):
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool)
+        result = asyncio.run(scanner.run())
+        assert result.error is None
+        assert result.data["last_name"] == 'Backupy'
+        assert scanner.data_dict["name"] == 'Bobby B.'
+        assert self.pool.open_contexts == 0
+
+    def test_failed_step_is_reported(self):
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool,
+                                     ScanOptions(retry_policies=NO_DELAY))
+        scanner.parser.parse_profile_data = lambda body, data: None
+        result = asyncio.run(scanner.run())
+        assert result.data is None
+        assert self.pool.contexts[0].visited[-1].endswith(PROFILE_URL)
+        assert result.stats["retries"] == {"scan_profile_page": 1}
+
+    def test_failed_step_is_retried_in_the_same_context(self):
+        parser = UpworkParser()
+        parse_contact_info_data = parser.parse_contact_info_data
+        calls = []
+
+        def flaky(body, data):
+            calls.append(body)
+            if len(calls) == 1:
+                raise RuntimeError("Target page has been closed")
+            return parse_contact_info_data(body, data)
+
+        parser.parse_contact_info_data = flaky
+        scanner = AsyncUpworkScanner(parser, self.credentials, self.pool,
+                                     ScanOptions(retry_policies=NO_DELAY))
+        result = asyncio.run(scanner.run())
+        assert result.error is None
+        assert result.data["last_name"] == 'Backupy'
+        assert result.stats["retries"] == {"scan_contact_info_page": 1}
+        context, = self.pool.contexts
+        assert context.logins == 1
+        # The retry only navigates to the contact info page, on a new page
+        assert len(context.pages) == 2
+        assert [url.endswith(CONTACT_INFO_URL) for url in context.visited[-3:]] == [
+            False, True, True]
+
+    def test_resume_from_checkpoint(self):
+        checkpoints = CheckpointStore(str(self.tmp_path / "checkpoints"))
+        failing = UpworkParser()
+        failing.parse_contact_info_data = lambda body, data: None
+        options = ScanOptions(checkpoints=checkpoints, retry_policies=NO_RETRIES)
+        scanner = AsyncUpworkScanner(failing, self.credentials, self.pool, options)
+        assert asyncio.run(scanner.run()).data is None
+        assert checkpoints.load("bobby")["completed"] == ["scan_homepage", "scan_profile_page"]
+
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool,
+                                     ScanOptions(checkpoints=checkpoints))
+        result = asyncio.run(scanner.run())
+        assert result.data["last_name"] == 'Backupy'
+        assert result.data["metadata"]["hourly_rate"] == '$500.00/hr'
+        assert scanner.data_dict["name"] == 'Bobby B.'
+        assert self.pool.contexts[1].visited[-1].endswith(CONTACT_INFO_URL)
+        assert not any(url.endswith(PROFILE_URL) for url in self.pool.contexts[1].visited)
+        assert checkpoints.load("bobby") is None
+
+    def test_scan_accounts_concurrency_limit(self):
+        accounts = [Credentials(f"user{index}", "password") for index in range(5)]
+        results = asyncio.run(scan_accounts(accounts, concurrency=2, sink=self.sink))
+        # The records of the accounts sharing the sink say which account they belong to
+        assert sorted(self.sink.accounts) == sorted([f"user{index}" for index in range(5)] * 2)
+        assert [result.username for result in results] == [f"user{index}" for index in range(5)]
+        assert all(result.data for result in results)
+        assert self.pool.max_open_contexts == 2
+        # Every account got its own copy of the user data
+        assert len({id(result.data) for result in results}) == 5
+        assert all(context.routes for context in self.pool.contexts)
+        assert "resources" in results[0].stats
+
+    def test_saved_session_skips_login(self):
+        store = SessionStore(cache_dir=self.cache_dir)
+        for _ in range(2):
+            scanner = AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                         self.pool, ScanOptions(session_store=store))
+            assert asyncio.run(scanner.run()).data
+        first, second = self.pool.contexts
+        assert first.logins == 1
+        assert second.logins == 0
+        assert second.visited[0].endswith(HOME_PATH)
+        # The session is saved once the logged in homepage shows, not right after the click
+        assert first.saved_after[-1] == 'a[class="profile-title"]'
+
+    def test_expired_session_logs_in_again(self):
+        store = SessionStore(cache_dir=self.cache_dir)
+        store.save(self.credentials.username, {"cookies": [], "origins": []})
+        self.pool.sessions_valid = False
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                     self.pool, ScanOptions(session_store=store))
+        assert asyncio.run(scanner.run()).data
+        assert self.pool.contexts[0].logins == 1
+
+    def test_browser_extraction_matches_html(self):
+        html_scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool)
+        html_result = asyncio.run(html_scanner.run())
+        browser_scanner = AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                             self.pool, ScanOptions(extraction="browser"))
+        browser_result = asyncio.run(browser_scanner.run())
+        assert browser_result.data == html_result.data
+        assert browser_scanner.data_dict == html_scanner.data_dict
+        assert self.pool.contexts[1].pages[0].body_reads == 0
+
+    def test_parse_stage_matches_inline_parsing(self):
+        inline = asyncio.run(AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                                self.pool).run())
+        stage = ParseStage(workers=2)
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool,
+                                     ScanOptions(parse_stage=stage))
+        result = asyncio.run(scanner.run())
+        stage.close()
+        assert result.error is None
+        assert result.data == inline.data
+        assert scanner.data_dict["name"] == 'Bobby B.'
+
+    def test_pipelined_parse_on_a_thread(self):
+        inline = asyncio.run(AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                                self.pool).run())
+        template = copy.deepcopy(user_data)
+        stage = ParseStage(threads=True, sink=self.sink)
+        scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials, self.pool,
+                                     ScanOptions(parse_stage=stage))
+        result = asyncio.run(scanner.run())
+        stage.close()
+        assert result.error is None
+        assert result.data == inline.data
+        assert scanner.data_dict["name"] == 'Bobby B.'
+        assert [kind for kind, _ in self.sink.records] == ["level_1", "level_2"]
+        assert self.sink.accounts == ["bobby", "bobby"]
+        # The records were merged into the copies of the account, not the templates
+        assert user_data == template
+
+    def test_failed_pipelined_parse_scans_the_page_again(self):
+        parse_profile_data = UpworkParser.parse_profile_data
+        calls = []
+
+        def flaky(parser, body, data):
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                return None
+            return parse_profile_data(parser, body, data)
+
+        self.monkeypatch.setattr(UpworkParser, "parse_profile_data", flaky)
+        stage = ParseStage(threads=True)
+        scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials, self.pool,
+                                     ScanOptions(parse_stage=stage, retry_policies=NO_DELAY))
+        result = asyncio.run(scanner.run())
+        stage.close()
+        assert result.error is None
+        assert result.data["last_name"] == 'Backupy'
+        # Parsed on the worker first, then in place after the page was scanned again
+        assert calls[0].startswith("argyle-parse") and len(calls) == 2
+        assert sum(url.endswith(PROFILE_URL) for url in self.pool.contexts[0].visited) == 2
+
+    def test_fetch_mode_merges_the_parse_stage(self):
+        self.monkeypatch.setattr(async_scanner, "HttpFetcher", FakeFetcher)
+        self.monkeypatch.setattr(FakeFetcher, "fetched", [])
+        inline = asyncio.run(AsyncUpworkScanner(UpworkParser(), self.credentials,
+                                                self.pool).run())
+        stage = ParseStage(threads=True, sink=self.sink)
+        scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials, self.pool,
+                                     ScanOptions(fetch_mode=True, parse_stage=stage))
+        result = asyncio.run(scanner.run())
+        stage.close()
+        assert result.error is None and result.data == inline.data
+        assert FakeFetcher.fetched == [PROFILE_URL, CONTACT_INFO_URL]
+        # The homepage parsed in the stage was merged, nothing is left pending
+        assert scanner.data_dict["name"] == 'Bobby B.' and scanner.pending == {}
+        assert [kind for kind, _ in self.sink.records] == ["level_1", "level_2"]
+        assert not any(url.endswith(PROFILE_URL) for url in self.pool.contexts[1].visited)
+
+    def test_fetch_mode_scans_a_failed_homepage_parse_again(self):
+        self.monkeypatch.setattr(async_scanner, "HttpFetcher", FakeFetcher)
+        parse_homepage = UpworkParser.parse_homepage
+        calls = []
+
+        def flaky(parser, body, data):
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                raise ValueError("homepage not loaded")
+            return parse_homepage(parser, body, data)
+
+        self.monkeypatch.setattr(UpworkParser, "parse_homepage", flaky)
+        stage = ParseStage(threads=True)
+        scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials, self.pool,
+                                     ScanOptions(fetch_mode=True, parse_stage=stage,
+                                                 retry_policies=NO_DELAY))
+        result = asyncio.run(scanner.run())
+        stage.close()
+        assert result.error is None and result.data["last_name"] == 'Backupy'
+        assert len(calls) == 2 and scanner.data_dict["name"] == 'Bobby B.'
+
+    def test_fetch_mode_skips_unchanged_pages(self):
+        self.monkeypatch.setattr(async_scanner, "HttpFetcher", FakeFetcher)
+        store = FingerprintStore(str(self.tmp_path / "fingerprints"))
+
+        def scan():
+            scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials, self.pool,
+                                         ScanOptions(fetch_mode=True, fingerprints=store))
+            return asyncio.run(scanner.run()).data
+
+        assert scan()["last_name"] == 'Backupy'
+        assert scan() == {"account": "bobby", "status": "unchanged"}
+        assert [kind for kind, _ in self.sink.records] == [
+            "level_1", "level_2", "unchanged", "unchanged", "unchanged"]
+
+    def test_incremental_rescan(self):
+        store = FingerprintStore(str(self.tmp_path / "fingerprints"))
+
+        def scan():
+            scanner = AsyncUpworkScanner(UpworkParser(self.sink), self.credentials,
+                                         self.pool, ScanOptions(fingerprints=store))
+            return asyncio.run(scanner.run()).data
+
+        assert scan()["last_name"] == 'Backupy'
+        assert scan() == {"account": "bobby", "status": "unchanged"}
+        assert [kind for kind, _ in self.sink.records] == [
+            "level_1", "level_2", "unchanged", "unchanged", "unchanged"]
+        # A changed contact info page parses the profile it is validated with again
+        self.monkeypatch.setitem(map_html_body, 'parse_contact_info_data',
+                                 map_html_body['parse_contact_info_data'].replace(
+                                     "123456", "654321"))
+        result = scan()
+        assert result["address"]["postal_code"] == '654321'
+        assert result["address"]["city"] == 'Miami'
+        assert store.load("bobby")["interval"] == store.min_interval
+
+    def test_metrics_cover_steps_and_page_operations(self):
+        self.monkeypatch.setattr(METRICS, "enabled", True)
+        METRICS.reset()
+        scanner = AsyncUpworkScanner(UpworkParser(), self.credentials, self.pool)
+        assert asyncio.run(scanner.run()).data
+        assert isinstance(scanner.page, TimedPage)
+        histograms = {(name, labels) for name, labels in METRICS.histograms}
+        assert ("argyle_scan_step_seconds", (("step", "scan_contact_info_page"),)) in histograms
+        assert ("argyle_parse_seconds", (("method", "parse_profile_data"),)) in histograms
+        phases = {dict(labels).get("phase") for name, labels in histograms}
+        assert {"extract", "normalize_country", "normalize_phone", "validate",
+                "write"} <= phases
+        operations = {dict(labels)["operation"] for name, labels in histograms
+                      if name == "argyle_page_operation_seconds"}
+        assert {"goto", "wait_for_selector", "click", "inner_html"} <= operations
+        errors = {dict(labels)["target"] for name, labels in METRICS.counters
+                  if name == "argyle_page_operation_errors_total"}
+        assert errors == {'#login_answer', 'input[id="deviceAuth_answer"]'}
+        assert METRICS.counters[("argyle_scan_steps_total",
+                                 (("outcome", "success"), ("step", "login")))] == 1
+        METRICS.reset()
+
+    def test_rate_controller_paces_the_page_operations(self):
+        controller = RateController(concurrency=2)
+        results = asyncio.run(scan_accounts(
+            [Credentials(f"user{index}", "secret-password", "answer") for index in range(3)],
+            concurrency=3, options=ScanOptions(rate_controller=controller)))
+        assert all(result.data for result in results)
+        assert controller.in_flight == 0
+        stats = results[-1].stats["rate"]
+        assert stats["outcomes"]["ok"] > 0 and stats["outcomes"]["timeout"] == 6
+        assert stats["concurrency"] > 2 and list(stats["rates"]) == ["www.upwork.com"]
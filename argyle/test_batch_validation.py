@@ -0,0 +1,90 @@
+import copy
+import json
+import unittest
+import uuid
+import pytest
+from batch_validation import main, validate_batch, validate_stream
+from data_model import InvalidUUID, UpworkUser
+
+USER = {
+    "id": "No available information.", "account": "No available information.",
+    "employer": "All Party No Work Company", "created_at": "No available information.",
+    "updated_at": "No available information.", "first_name": "Bobby",
+    "last_name": "Backupy", "full_name": "Bobby Backupy", "email": "b******nt@argyle.io",
+    "phone_number": "+19176987366", "birth_date": "No available information.",
+    "picture_url": "https://www.upwork.com/profile-portraits/c1mLLxjwmuM",
+    "address": {"line1": "Party street 100", "line2": "1", "city": "Miami", "state": "FL",
+                "postal_code": "123456", "country": "US"},
+    "ssn": "No available information.", "martial_status": "No available information.",
+    "gender": "No available information.",
+    "metadata": {"hourly_rate": "$500.00/hr"},
+}
+
+
+def user(**changes) -> dict:
+    record = copy.deepcopy(USER)
+    address = changes.pop("address", {})
+    record.update(changes)
+    record["address"].update(address)
+    return record
+
+
+class BatchValidationTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.records = [
+            user(),
+            user(phone_number="917 698 7366"),
+            user(address={"country": "United States"}),
+            user(id=str(uuid.uuid4()), account=str(uuid.uuid4())),
+            user(phone_number="12", address={"country": "XX"}),
+            {key: value for key, value in USER.items() if key != "email"},
+            user(address={"postal_code": 123456}, metadata=None),
+        ]
+
+    def test_report_without_stopping(self):
+        result = validate_batch(self.records)
+        assert result.invalid_indexes == [1, 2, 4, 5]
+        assert [(error.index, error.field) for error in result.errors] == [
+            (1, "phone_number"), (2, "address.country"), (4, "phone_number"),
+            (4, "address.country"), (5, "email")]
+        assert result.summary() == {
+            "records": 7, "valid": 3, "invalid": 4,
+            "errors_by_field": {"phone_number": 2, "address.country": 2, "email": 1}}
+
+    def test_models_match_pydantic(self):
+        result = validate_batch(self.records)
+        for index in [0, 3, 6]:
+            assert result.models[index].dict() == UpworkUser.parse_obj(
+                self.records[index]).dict()
+        assert isinstance(result.models[0], UpworkUser)
+        assert result.models[0].address.country == "US"
+
+    def test_strict_uuid(self):
+        result = validate_batch(self.records[:4], strict_uuid=True)
+        assert result.invalid_indexes == [0, 1, 2]
+        assert {error.field for error in result.errors if error.index == 0} == {"id", "account"}
+
+    def test_ids_that_are_not_uuids(self):
+        records = [user(id="12345"), user(account="acc-1"), user(id=12345)]
+        with pytest.raises(InvalidUUID):
+            UpworkUser.parse_obj(records[0])
+        result = validate_batch(records)
+        assert [(error.index, error.field, error.value) for error in result.errors] == [
+            (0, "id", "12345"), (1, "account", "acc-1"), (2, "id", "12345")]
+
+    def test_stream_in_chunks(self):
+        results = list(validate_stream(iter(self.records * 3), chunk_size=5))
+        assert [len(result.models) for result in results] == [5, 5, 5, 5, 1]
+        invalid = [index for result in results for index in result.invalid_indexes]
+        assert invalid == [index + 7 * repeat for repeat in range(3) for index in [1, 2, 4, 5]]
+
+    def test_cli_reads_json_lines(self):
+        path = self.tmp_path / "scan_results.jsonl"
+        with open(path, "w") as outfile:
+            for record in self.records[:4]:
+                outfile.write(json.dumps({"kind": "level_2", "record": record}) + "\n")
+            outfile.write(json.dumps({"kind": "level_1", "record": {"name": "x"}}) + "\n")
+        assert main([str(path), "--chunk-size", "2"]) == 1
+        assert main([str(path), "--show", "0"]) == 1
@@ -0,0 +1,33 @@
+import unittest
+import pytest
+from benchmark_parser import bench_method, find_regressions, inflate_body
+from test_constants import map_html_body
+
+
+class BenchmarkParserTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path, monkeypatch):
+        # The parser writes its output one directory up
+        workdir = tmp_path / "run"
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+
+    def test_inflate_body(self):
+        body = map_html_body['parse_profile_data']
+        inflated = inflate_body(body, 10)
+        assert inflated.startswith(body)
+        assert inflated.count('class="bench-copy"') == 9
+
+    def test_bench_contact_info_data(self):
+        result = bench_method("parse_contact_info_data",
+                              map_html_body['parse_contact_info_data'], 3)
+        assert result["complete"]
+        assert result["iterations"] == 3
+        assert result["p50_ms"] <= result["p99_ms"]
+
+    def test_find_regressions(self):
+        baseline = {"results": [{"method": "parse_homepage", "inflate": 1,
+                                 "p50_ms": 10.0}]}
+        results = [{"method": "parse_homepage", "inflate": 1, "p50_ms": 12.0}]
+        assert len(find_regressions(results, baseline, 0.10)) == 1
+        assert find_regressions(results, baseline, 0.25) == []
@@ -0,0 +1,35 @@
+import os
+import stat
+import unittest
+import pytest
+from checkpoint import CheckpointStore, RetryPolicy
+
+
+class CheckpointTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.store = CheckpointStore(str(tmp_path / "checkpoints"))
+        self.state = {"completed": ["scan_homepage"], "data_dict": {"name": "Bobby B."}}
+
+    def test_save_load_clear(self):
+        assert self.store.load("bobby") is None
+        self.store.save("bobby", self.state)
+        assert self.store.load("bobby")["completed"] == ["scan_homepage"]
+        assert stat.S_IMODE(os.stat(self.store.path_for("bobby")).st_mode) == 0o600
+        assert "bobby" not in os.listdir(self.store.path)[0]
+        self.store.clear("bobby")
+        self.store.clear("bobby")
+        assert self.store.load("bobby") is None
+
+    def test_old_checkpoints_are_ignored(self):
+        self.store.max_age = -1
+        self.store.save("bobby", self.state)
+        assert self.store.load("bobby") is None
+        assert not os.path.exists(self.store.path_for("bobby"))
+
+    def test_backoff_with_jitter(self):
+        policy = RetryPolicy(retries=5, base_delay=1.0, max_delay=4.0)
+        for attempt, cap in enumerate([1.0, 2.0, 4.0, 4.0, 4.0]):
+            delays = [policy.delay(attempt) for _ in range(50)]
+            assert all(0 <= delay <= cap for delay in delays)
+            assert len(set(delays)) > 1
@@ -0,0 +1,54 @@
+import unittest
+import pytest
+from field_spec import ExtractionPlan, FieldSpec, MissingFieldsError, strip_all
+from upwork_parser import UpworkParser, PROFILE_PLAN
+from test_constants import map_html_body
+
+
+class FieldSpecTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.html_body = """
+            <ul class="list-unstyled">
+                <li><div><strong> English </strong><span> Native </span></div></li>
+            </ul>
+            <p class="tag"> one </p><p class="tag"> two </p>
+        """
+        self.plan = ExtractionPlan("test_page", [
+            FieldSpec("language", "strong::text", anchor="list_item"),
+            FieldSpec("proficiency", "span::text", anchor="list_item"),
+            FieldSpec("tags", "p.tag::text", post=strip_all, many=True),
+            FieldSpec("phone", "div.phone::text", required=False),
+            FieldSpec("email", "div.email::text"),
+        ], anchors={"list_item": "ul.list-unstyled > li > div"})
+
+    def test_selectors_compiled_once(self):
+        assert self.plan.fields[0].xpath == "child::strong/text()"
+        assert self.plan.anchors["list_item"].startswith("descendant-or-self::ul")
+
+    def test_extracted_and_missing_fields(self):
+        result = self.plan.extract(self.html_body)
+        assert result.values["language"] == "English"
+        assert result.values["proficiency"] == "Native"
+        assert result.values["tags"] == ["one", "two"]
+        assert result.values["phone"] is None
+        assert result.missing == ["phone", "email"]
+        assert not result.complete
+
+    def test_missing_required_fields_raise(self):
+        result = self.plan.extract(self.html_body)
+        with pytest.raises(MissingFieldsError) as err:
+            result.raise_for_missing(self.plan.required)
+        assert err.value.value == ["email"]
+
+    def test_profile_plan_complete_on_fixture(self):
+        result = PROFILE_PLAN.extract(map_html_body['parse_profile_data'])
+        assert result.complete
+        assert result.values["job_employer"][-1].strip() == 'All Party No Work Company'
+
+    def test_parser_reports_missing_fields(self):
+        parser = UpworkParser()
+        parser.parse_profile_data("<div></div>", {"address": {}})
+        result = parser.extraction_results["parse_profile_data"]
+        assert result.extracted == []
+        assert "city" in result.missing
@@ -0,0 +1,43 @@
+import unittest
+import pytest
+from fingerprint import FingerprintStore, fingerprint
+from test_constants import map_html_body
+from upwork_parser import PROFILE_PLAN
+
+
+class FingerprintTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.store = FingerprintStore(str(tmp_path / "fingerprints"), min_interval=60,
+                                      max_interval=300)
+        self.profile_body = map_html_body['parse_profile_data']
+
+    def test_fingerprint_of_the_region(self):
+        value = fingerprint(self.profile_body, "parse_profile_data")
+        assert value == fingerprint(self.profile_body, "parse_profile_data")
+        # Changes outside of the profile card are ignored
+        assert value == fingerprint(f"<div>Ad banner</div>{self.profile_body}",
+                                    "parse_profile_data")
+        assert value != fingerprint(self.profile_body.replace("Miami", "Tampa"),
+                                    "parse_profile_data")
+        assert fingerprint("<div></div>", "parse_profile_data") is None
+
+    def test_fingerprint_of_extracted_values(self):
+        result = PROFILE_PLAN.extract(self.profile_body)
+        assert fingerprint(result, "parse_profile_data") == fingerprint(
+            PROFILE_PLAN.extract(self.profile_body), "parse_profile_data")
+
+    def test_matches_last_scan(self):
+        value = fingerprint(self.profile_body, "parse_profile_data")
+        assert not self.store.matches("bobby", "parse_profile_data", value)
+        self.store.record_scan("bobby", {"parse_profile_data": value}, changed=True)
+        assert self.store.matches("bobby", "parse_profile_data", value)
+        assert not self.store.matches("alice", "parse_profile_data", value)
+
+    def test_schedule_backs_off(self):
+        intervals = [self.store.record_scan("bobby", {}, changed=False, now=0)["interval"]
+                     for _ in range(4)]
+        assert intervals == [120, 240, 300, 300]
+        assert not self.store.is_due("bobby", now=299)
+        assert self.store.is_due("bobby", now=300)
+        assert self.store.record_scan("bobby", {}, changed=True, now=0)["interval"] == 60
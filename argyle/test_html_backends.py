@@ -0,0 +1,82 @@
+import copy
+import os
+import unittest
+from unittest import mock
+import pytest
+from benchmark_parser import inflate_body
+from html_backends import BACKENDS, HtmlBackend, get_backend
+from output_sink import NullSink
+from test_constants import map_html_body
+from upwork_parser import CONTACT_INFO_PLAN, HOMEPAGE_PLAN, PROFILE_PLAN, UpworkParser
+from user_data_profile import user_data
+
+PLANS = [HOMEPAGE_PLAN, PROFILE_PLAN, CONTACT_INFO_PLAN]
+
+# Edge cases: several text nodes in a match, missing fields and nested anchors
+SYNTHETIC_PROFILE = """
+<section class="up-card-section">
+  <div><ul><li><div><div><h4 role="presentation">Lead <b>x</b> Engineer | Acme</h4></div></div></li></ul></div>
+  <div class="mt-30"><div>skip</div><div><span>40 hrs</span><span>more</span></div></div>
+</section>
+<ul class="list-unstyled"><li><div><strong>English</strong><span>: Native</span>
+  <div>first<div>inner</div>second</div>
+  <ul class="list-unstyled"><li><div><strong>French</strong></div></li></ul>
+</div></li></ul>
+<span itemprop="locality">  Miami </span>
+<div class="up-presence-container"><img class="up-avatar" src="/a.png"><img class="up-avatar"></div>
+"""
+
+
+class HtmlBackendTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.reference = get_backend("parsel")
+        self.bodies = [(plan, map_html_body[plan.page]) for plan in PLANS]
+        self.bodies.append((PROFILE_PLAN, inflate_body(map_html_body['parse_profile_data'], 3)))
+        self.bodies.append((PROFILE_PLAN, SYNTHETIC_PROFILE))
+        self.bodies.append((CONTACT_INFO_PLAN, ""))
+
+    def assert_same_fields(self, name: str):
+        backend = get_backend(name)
+        for plan, body in self.bodies:
+            assert backend.raw_values(plan, body) == self.reference.raw_values(plan, body), (
+                name, plan.page)
+            assert (plan.extract(body, backend).values ==
+                    plan.extract(body).values), (name, plan.page)
+
+    def test_lxml_matches_parsel(self):
+        self.assert_same_fields("lxml")
+
+    def test_scrapy_matches_parsel(self):
+        pytest.importorskip("scrapy")
+        self.assert_same_fields("scrapy")
+
+    def test_selectolax_matches_parsel(self):
+        pytest.importorskip("selectolax")
+        self.assert_same_fields("selectolax")
+
+    def test_parser_output_is_the_same_with_every_backend(self):
+        outputs = []
+        for name in BACKENDS:
+            try:
+                parser = UpworkParser(NullSink(), backend=name)
+            except ImportError:
+                continue
+            profile = copy.deepcopy(user_data)
+            parser.parse_profile_data(map_html_body['parse_profile_data'], profile)
+            outputs.append(parser.parse_contact_info_data(
+                map_html_body['parse_contact_info_data'], profile))
+        assert outputs[0]["last_name"] == 'Backupy'
+        assert all(output == outputs[0] for output in outputs)
+
+    def test_backend_selection(self):
+        assert UpworkParser(NullSink(), backend="lxml").backend is get_backend("lxml")
+        with mock.patch.dict(os.environ):
+            os.environ.pop("ARGYLE_HTML_BACKEND", None)
+            assert get_backend().name == "lxml"
+            os.environ["ARGYLE_HTML_BACKEND"] = "parsel"
+            assert get_backend().name == "parsel"
+        with pytest.raises(ValueError):
+            get_backend("regex")
+        with pytest.raises(TypeError):
+            HtmlBackend()
@@ -0,0 +1,83 @@
+import copy
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_model import UpworkUser
+from http_fetch import AuthenticationRequired, HttpFetcher
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+from user_data_profile import user_data
+
+PROFILE_URL = "/freelancers/~0100e1354146799c5e"
+CONTACT_INFO_URL = "/freelancers/settings/contactInfo"
+LOGIN_URL = "/ab/account-security/login"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serves the recorded pages to requests that carry the session cookie.
+    """
+    protocol_version = "HTTP/1.1"
+    pages = {PROFILE_URL: map_html_body['parse_profile_data'],
+             CONTACT_INFO_URL: map_html_body['parse_contact_info_data'],
+             LOGIN_URL: '<input id="login_username">'}
+
+    def do_GET(self):
+        self.server.clients.add(self.client_address)
+        if self.path != LOGIN_URL and "session=token" not in self.headers.get("Cookie", ""):
+            self.send_response(302)
+            self.send_header("Location", LOGIN_URL)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = f"<html><body>{self.pages[self.path]}</body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpFetcherTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path, monkeypatch):
+        # The parser writes its output one directory up
+        workdir = tmp_path / "run"
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+        self.server.clients = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cookies = [{"name": "session", "value": "token", "domain": "127.0.0.1",
+                         "path": "/"}]
+        yield
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch_maps_into_user_data(self):
+        fetcher = HttpFetcher(self.base_url, self.cookies)
+        parser = UpworkParser()
+        profile = copy.deepcopy(user_data)
+        assert parser.parse_profile_data(fetcher.fetch(PROFILE_URL), profile)
+        result = parser.parse_contact_info_data(fetcher.fetch(CONTACT_INFO_URL), profile)
+        fetcher.close()
+        assert result["employer"] == 'All Party No Work Company'
+        assert result["last_name"] == 'Backupy'
+        UpworkUser.parse_obj(result)
+
+    def test_connection_is_reused(self):
+        fetcher = HttpFetcher(self.base_url, self.cookies)
+        for _ in range(3):
+            fetcher.fetch(PROFILE_URL)
+        fetcher.close()
+        assert len(self.server.clients) == 1
+
+    def test_rejected_cookies(self):
+        fetcher = HttpFetcher(self.base_url, [])
+        with pytest.raises(AuthenticationRequired):
+            fetcher.fetch(PROFILE_URL)
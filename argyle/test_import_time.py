@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import unittest
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budget of the entry points, from "python -X importtime", in
+# multiples of the import time of BASELINE_MODULE measured on the same machine, so the
+# budgets hold on slow and loaded machines too. ARGYLE_IMPORT_BUDGET_SCALE stretches them.
+BASELINE_MODULE = "asyncio"
+IMPORT_BUDGET = {
+    "main": 1,
+    "data_model": 4.5,
+    "upwork_parser": 5.5,
+    "async_scanner": 8,
+}
+
+# Modules that only the browser, the fallback country conversion or the cli need
+HEAVY_MODULES = ["playwright", "twisted", "scrapy", "pandas", "country_converter",
+                 "cryptography", "requests"]
+
+
+def import_time_ms(module: str) -> float:
+    """
+    Cumulative import time of the module in a fresh interpreter.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=HERE, capture_output=True, text=True, check=True).stderr
+    for line in output.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise AssertionError(f"{module} not found in the import time report")
+
+
+def loaded_modules(module: str) -> set:
+    """
+    Top level packages loaded by importing the module in a fresh interpreter.
+    """
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=HERE,
+                            capture_output=True, text=True, check=True).stdout
+    return {name.split(".")[0] for name in output.split()}
+
+
+class ImportTimeTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.scale = float(os.getenv("ARGYLE_IMPORT_BUDGET_SCALE", "1"))
+
+    def test_parser_and_data_model_skip_heavy_dependencies(self):
+        for module in ["upwork_parser", "data_model", "async_scanner"]:
+            loaded = loaded_modules(module)
+            assert not loaded & set(HEAVY_MODULES), (module, loaded & set(HEAVY_MODULES))
+        # pydantic is only needed once a contact info page is validated
+        assert "pydantic" not in loaded_modules("upwork_parser")
+
+    def test_main_imports_nothing_until_run(self):
+        loaded = loaded_modules("main")
+        assert not loaded & {"upwork_scanner", "upwork_parser", "parsel", "lxml"}
+
+    def test_cold_start_budget(self):
+        for module, budget in IMPORT_BUDGET.items():
+            # Best of three, the first run also pays for the bytecode cache. The
+            # baseline is measured in between, under the same load as the module.
+            elapsed, baseline = map(min, zip(*((import_time_ms(module),
+                                                import_time_ms(BASELINE_MODULE))
+                                               for _ in range(3))))
+            limit = budget * baseline * self.scale
+            assert elapsed <= limit, (module, elapsed, baseline, limit)
@@ -0,0 +1,191 @@
+import asyncio
+import multiprocessing
+import unittest
+import pytest
+from cryptography.fernet import Fernet
+from async_scanner import Credentials, ScanResult
+from checkpoint import RetryPolicy
+from job_queue import JobQueue, QueueWorker, parse_shards, shard_of
+from session_store import SessionStore
+from test_scanner_daemon import FakeBrowserPool
+
+
+def claim_all(path: str, key: bytes, owner: str, results) -> None:
+    queue = JobQueue(path, session_store=SessionStore(key=key))
+    claimed = []
+    while True:
+        jobs = queue.claim(owner, limit=3)
+        if not jobs:
+            break
+        claimed += [job.id for job in jobs]
+    queue.close()
+    results.put(claimed)
+
+
+class SlowWorker(QueueWorker):
+    """
+    Worker whose scans succeed after a delay, except the accounts named "bad".
+    """
+
+    def __init__(self, *args, delay: float = 0.01, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.cancelled = []
+
+    async def scan_account(self, credentials: Credentials) -> ScanResult:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(credentials.username)
+            raise
+        if credentials.username.startswith("bad"):
+            return ScanResult(credentials.username, None, "login failed", {"steps": 1})
+        return ScanResult(credentials.username, {"name": credentials.username}, None,
+                          {"steps": 3})
+
+
+class JobQueueTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.path = str(tmp_path / "jobs.db")
+        self.key = Fernet.generate_key()
+        self.queue = self.open_queue()
+        yield
+        self.queue.close()
+
+    def open_queue(self, **kwargs) -> JobQueue:
+        kwargs.setdefault("retry_policy", RetryPolicy(base_delay=10.0, max_delay=10.0))
+        return JobQueue(self.path, shards=4, session_store=SessionStore(key=self.key), **kwargs)
+
+    def accounts(self, count: int, prefix: str = "user") -> list:
+        return [Credentials(f"{prefix}{index}@example.com", "secret", "answer")
+                for index in range(count)]
+
+    def test_enqueue_skips_active_accounts_and_encrypts(self):
+        accounts = self.accounts(3)
+        assert self.queue.enqueue(accounts, now=100) == 3
+        assert self.queue.enqueue(accounts + self.accounts(1, "other"), now=100) == 1
+        stored = self.queue.connection.execute("SELECT credentials FROM jobs").fetchone()[0]
+        assert b"secret" not in stored
+        job, = self.queue.claim("a", shards=[shard_of("user0@example.com", 4)], now=100,
+                                steal_after=1000)
+        assert job.credentials == accounts[0]
+        assert self.queue.complete(job.id, "a", {"steps": 3}, now=101)
+        # A finished account can be queued again
+        assert self.queue.enqueue(accounts[:1], now=102) == 1
+        # The number of shards is the one of the queue file
+        assert JobQueue(self.path, shards=16, session_store=SessionStore(key=self.key)).shards == 4
+        assert parse_shards("0-2,5") == [0, 1, 2, 5] and parse_shards("") is None
+
+    def test_claim_prefers_own_shards_and_steals_old_jobs(self):
+        accounts = self.accounts(20)
+        self.queue.enqueue(accounts, now=100)
+        own = [account.username for account in accounts if shard_of(account.username, 4) == 0]
+        jobs = self.queue.claim("a", limit=20, shards=[0], steal_after=60, now=110)
+        assert [job.credentials.username for job in jobs] == own
+        assert self.queue.claim("a", shards=[0], steal_after=60, now=150) == []
+        stolen = self.queue.claim("a", limit=20, shards=[0], steal_after=60, now=170)
+        assert len(stolen) == 20 - len(own)
+        assert self.queue.status()["states"] == {"leased": 20}
+
+    def test_expired_leases_are_queued_again(self):
+        queue = self.open_queue(lease=30, max_attempts=2)
+        queue.enqueue(self.accounts(1), now=100)
+        job, = queue.claim("a", now=100)
+        assert queue.heartbeat(job.id, "a", now=120)
+        assert queue.claim("b", now=140) == []
+        # The worker a died, b takes the job over once the lease expired
+        job, = queue.claim("b", now=151)
+        assert job.attempts == 2
+        assert not queue.heartbeat(job.id, "a", now=152)
+        assert not queue.complete(job.id, "a", now=152)
+        assert queue.claim("c", now=200) == []
+        assert queue.status()["states"] == {"failed": 1}
+        queue.close()
+
+    def test_failed_scans_back_off_then_fail(self):
+        queue = self.open_queue(max_attempts=2)
+        queue.enqueue(self.accounts(1), now=100)
+        job, = queue.claim("a", now=100)
+        assert queue.fail(job.id, "a", "timeout", now=101) == "queued"
+        not_before, error = queue.connection.execute(
+            "SELECT not_before, error FROM jobs").fetchone()
+        assert 101 <= not_before <= 111 and error == "timeout"
+        job, = queue.claim("a", now=112)
+        assert queue.fail(job.id, "a", "timeout", now=113) == "failed"
+        assert queue.fail(job.id, "a", "timeout", now=114) is None
+        queue.enqueue(self.accounts(1), now=115)
+        job, = queue.claim("a", now=115)
+        assert queue.release(job.id, "a", now=116)
+        assert queue.claim("a", now=117)[0].attempts == 1
+        queue.close()
+
+    def test_processes_never_claim_the_same_job(self):
+        self.queue.enqueue(self.accounts(60))
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        workers = [context.Process(target=claim_all, args=(self.path, self.key, f"w{index}",
+                                                             results))
+                   for index in range(3)]
+        for worker in workers:
+            worker.start()
+        claimed = [results.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join(60)
+        ids = [job_id for jobs in claimed for job_id in jobs]
+        assert sorted(ids) == list(range(1, 61))
+
+    def test_worker_scans_retries_and_heartbeats(self):
+        queue = self.open_queue(lease=0.06, retry_policy=RetryPolicy(base_delay=0, max_delay=0))
+        queue.enqueue(self.accounts(5) + self.accounts(1, "bad"))
+        worker = SlowWorker(queue, "a", concurrency=2, pool=FakeBrowserPool(1),
+                            poll_interval=0.01, delay=0.05)
+        asyncio.run(worker.run(stop_when_idle=True))
+        assert (worker.done, worker.failed) == (5, 3)
+        assert queue.status()["states"] == {"done": 5, "failed": 1}
+        stats = queue.connection.execute(
+            "SELECT stats FROM jobs WHERE state = 'done'").fetchone()[0]
+        assert stats == '{"steps": 3}'
+        queue.close()
+
+    def test_worker_cancels_the_scan_when_the_lease_is_lost(self):
+        queue = self.open_queue(lease=0.03)
+        queue.enqueue(self.accounts(1))
+        worker = SlowWorker(queue, "a", pool=FakeBrowserPool(1), poll_interval=0.01, delay=1)
+
+        async def scenario():
+            task = asyncio.ensure_future(worker.run(max_jobs=1))
+            await asyncio.sleep(0.005)
+            # Another worker took the job over
+            queue.connection.execute("UPDATE jobs SET lease_owner = 'b'")
+            await task
+
+        asyncio.run(scenario())
+        assert worker.cancelled == ["user0@example.com"]
+        assert (worker.done, worker.failed) == (0, 0)
+        assert queue.status()["leased"][0]["lease_owner"] == "b"
+        queue.close()
+
+    def test_cancelled_worker_stops_its_scans_before_releasing(self):
+        self.queue.enqueue(self.accounts(1))
+        worker = SlowWorker(self.queue, "a", pool=FakeBrowserPool(1), poll_interval=0.01,
+                            delay=5)
+        states = []
+        release = self.queue.release
+
+        def record_release(job_id, owner, now=None):
+            states.append(list(worker.cancelled))
+            return release(job_id, owner, now)
+
+        self.queue.release = record_release
+
+        async def scenario():
+            task = asyncio.ensure_future(worker.run())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(scenario())
+        # The scan was cancelled before the job was given back
+        assert states == [["user0@example.com"]]
+        assert self.queue.status()["states"] == {"queued": 1}
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+import pytest
+from load_test import MemorySampler, child_pids, rss_bytes
+
+
+class LoadTestTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        yield
+        self.child.kill()
+        self.child.wait()
+
+    def test_child_processes_and_rss(self):
+        assert self.child.pid in child_pids(os.getpid())
+        assert rss_bytes(self.child.pid) > 0
+        assert rss_bytes(-1) == 0
+
+    def test_memory_sampler(self):
+        async def sample():
+            sampler = MemorySampler(interval=0.01)
+            sampler.start()
+            await asyncio.sleep(0.05)
+            return await sampler.stop()
+
+        memory = asyncio.run(sample())
+        assert memory["samples"] >= 2
+        assert memory["peak"] >= memory["mean"] > 0
+        excluded = MemorySampler(exclude=(self.child.pid,))
+        assert excluded.sample() < MemorySampler().sample()
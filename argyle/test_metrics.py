@@ -0,0 +1,67 @@
+import json
+import os
+import unittest
+import pytest
+from metrics import Histogram, Metrics
+
+
+class MetricsTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.metrics = Metrics(enabled=True)
+        self.tmp_path = tmp_path
+
+    def test_histogram_summary(self):
+        histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+        for value in [0.05, 0.2, 0.5, 3.0]:
+            histogram.observe(value)
+        assert histogram.cumulative() == [1, 3, 4]
+        summary = histogram.summary()
+        assert summary["count"] == 4
+        assert summary["p50"] == 1.0
+        assert summary["p99"] == 3.0
+        assert summary["min"] == 0.05
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = Metrics(enabled=False)
+        with metrics.span("argyle_scan_step_seconds", step="login"):
+            pass
+        metrics.count("argyle_scan_steps_total", step="login", outcome="success")
+        metrics.timed("argyle_parse", method="parse")(lambda: 1)()
+        assert metrics.histograms == {} and metrics.counters == {}
+        assert metrics.export(str(self.tmp_path)) == []
+
+    def test_timed_counts_outcomes(self):
+        @self.metrics.timed("argyle_parse", method="parse_homepage")
+        def parse(value):
+            return value
+
+        parse({"name": "Bobby B."})
+        parse(None)
+        parse(None)
+        counters = {dict(labels)["outcome"]: value
+                    for (name, labels), value in self.metrics.counters.items()}
+        assert counters == {"success": 1, "failure": 2}
+        histogram, = self.metrics.histograms.values()
+        assert histogram.count == 3
+
+    def test_prometheus_text(self):
+        with self.metrics.span("argyle_page_operation_seconds", operation="click",
+                               target='a[class="profile-title"]'):
+            pass
+        self.metrics.count("argyle_scan_steps_total", step="login", outcome="retry")
+        text = self.metrics.prometheus()
+        assert "# TYPE argyle_page_operation_seconds histogram" in text
+        assert ('argyle_page_operation_seconds_bucket{operation="click",'
+                'target="a[class=\\"profile-title\\"]",le="+Inf"} 1') in text
+        assert 'argyle_scan_steps_total{outcome="retry",step="login"} 1' in text
+
+    def test_export(self):
+        self.metrics.observe("argyle_browser_launch_seconds", 1.5)
+        paths = self.metrics.export(str(self.tmp_path / "metrics"))
+        assert [os.path.basename(path) for path in paths] == [
+            "argyle.prom", "argyle_metrics.json"]
+        with open(paths[1]) as infile:
+            summary = json.load(infile)
+        assert summary["histograms"][0]["name"] == "argyle_browser_launch_seconds"
+        assert summary["histograms"][0]["max"] == 1.5
@@ -0,0 +1,48 @@
+import random
+import unittest
+import pytest
+import country_converter as coco
+from phonenumberfmt import format_phone_number
+from country_table import COUNTRY_ISO2
+from data_model import Address, CountryFormatError
+from normalization import (is_e164, is_iso2, normalize_countries, normalize_country,
+                           normalize_phone, normalize_phones)
+
+
+class NormalizationTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.address = {"line1": "Party street 100", "line2": "1", "city": "Miami",
+                        "state": "FL", "postal_code": "123456", "country": "US"}
+
+    def test_table_matches_country_converter(self):
+        names = ["United States", "United Kingdom", "Romania", "Viet Nam", "USA"]
+        names += random.Random(7).sample(sorted(COUNTRY_ISO2), 20)
+        for name in names:
+            assert normalize_country(name) == coco.convert(names=name, to='ISO2')
+
+    def test_unknown_names_fall_back_to_country_converter(self):
+        assert "Nowhere Land" not in COUNTRY_ISO2
+        assert normalize_country("Nowhere Land") == coco.convert(names="Nowhere Land",
+                                                                 to='ISO2')
+
+    def test_batch_normalization(self):
+        assert normalize_countries(["United States", "Romania", "United States"]) == [
+            "US", "RO", "US"]
+        numbers = ["(917) 698-7366", "+1 917 698 7366"]
+        assert normalize_phones(numbers) == [
+            format_phone_number(number, implied_phone_region='US') for number in numbers]
+
+    def test_phone_cache(self):
+        normalize_phone.cache_clear()
+        expected = format_phone_number("+1 917 698 7366", implied_phone_region='US')
+        for _ in range(3):
+            assert normalize_phone("+1 917 698 7366") == expected
+        assert normalize_phone.cache_info().hits == 2
+
+    def test_validators(self):
+        assert is_iso2("US") and not is_iso2("XX") and not is_iso2("USA")
+        assert is_e164("+19176987366") and not is_e164("917 698 7366")
+        Address.parse_obj(self.address)
+        with pytest.raises(CountryFormatError):
+            Address.parse_obj(dict(self.address, country="XX"))
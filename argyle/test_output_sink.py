@@ -0,0 +1,93 @@
+import glob
+import json
+import multiprocessing
+import threading
+import unittest
+import pytest
+from output_sink import JsonFileSink, JsonLinesSink, OutputSink
+
+
+def write_records(path: str, writer: int, count: int, max_bytes: int = None):
+    sink = JsonLinesSink(path, batch_size=7, max_bytes=max_bytes)
+    for index in range(count):
+        sink.write("level_2", {"writer": writer, "index": index})
+    sink.close()
+
+
+def read_lines(pattern: str) -> list:
+    lines = []
+    for path in glob.glob(pattern):
+        if not path.endswith(".lock"):
+            with open(path) as infile:
+                lines.extend(json.loads(line) for line in infile)
+    return lines
+
+
+class OutputSinkTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.path = str(tmp_path / "results.jsonl")
+
+    def test_json_file_sink_overwrites(self):
+        path = str(self.tmp_path / "level_1_task.json")
+        sink = JsonFileSink({"level_1": path})
+        sink.write("level_1", {"name": "first"})
+        sink.write("level_1", {"name": "Bobby B."})
+        with open(path) as infile:
+            content = infile.read()
+        assert json.loads(content) == {"name": "Bobby B."}
+        assert "\n  " in content
+        # A sink has to say where the records go
+        with pytest.raises(TypeError):
+            OutputSink()
+
+    def test_batched_flush(self):
+        sink = JsonLinesSink(self.path, batch_size=3, flush_interval=60)
+        sink.write("level_1", {"name": "Bobby B."})
+        sink.write("level_1", {"name": "Bobby B."})
+        assert read_lines(self.path) == []
+        sink.write("level_2", {"last_name": "Backupy"}, account="bobby")
+        lines = read_lines(self.path)
+        assert len(lines) == 3
+        assert lines[-1] == {"kind": "level_2", "account": "bobby",
+                             "record": {"last_name": "Backupy"}}
+        sink.close()
+
+    def test_compact_lines(self):
+        sink = JsonLinesSink(self.path, batch_size=1)
+        sink.write("level_1", {"categories": ["a", "b"]})
+        sink.close()
+        with open(self.path) as infile:
+            assert infile.read() == ('{"kind":"level_1","account":null,'
+                                     '"record":{"categories":["a","b"]}}\n')
+
+    def test_rotation_by_size(self):
+        sink = JsonLinesSink(self.path, batch_size=1, max_bytes=200)
+        for index in range(20):
+            sink.write("level_2", {"index": index})
+        sink.close()
+        assert len(glob.glob(f"{self.path}.2*")) > 1
+        assert sorted(line["record"]["index"] for line in read_lines(f"{self.path}*")) == list(range(20))
+
+    def test_concurrent_threads(self):
+        threads = [threading.Thread(target=write_records, args=(self.path, writer, 50))
+                   for writer in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(read_lines(self.path)) == 200
+
+    def test_concurrent_processes_with_rotation(self):
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=write_records, args=(self.path, writer, 100, 2000))
+                   for writer in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        lines = read_lines(f"{self.path}*")
+        assert len(glob.glob(f"{self.path}.2*")) > 1
+        assert len(lines) == 300
+        assert len({(line["record"]["writer"], line["record"]["index"]) for line in lines}) == 300
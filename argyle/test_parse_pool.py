@@ -0,0 +1,88 @@
+import asyncio
+import copy
+import queue
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from parse_pool import ParseStage
+from test_constants import map_html_body
+from user_data_profile import user_data, data_dict
+
+
+class ParseStageTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, memory_sink):
+        self.sink = memory_sink
+        self.stage = ParseStage(workers=2, max_pending=2, sink=self.sink)
+        yield
+        self.stage.close()
+
+    def test_results_in_order(self):
+        self.stage.submit("parse_homepage", map_html_body['parse_homepage'],
+                          copy.deepcopy(data_dict))
+        self.stage.submit("parse_profile_data", "<div></div>", copy.deepcopy(user_data))
+        self.stage.submit("parse_profile_data", map_html_body['parse_profile_data'],
+                          copy.deepcopy(user_data))
+        homepage, broken, profile = self.stage.results()
+        assert homepage.data['name'] == 'Bobby B.'
+        assert broken.data is None
+        assert broken.error.startswith("parse_pofile_data: Missing fields")
+        assert profile.data['address']['country'] == 'US'
+        # Only the homepage is a task output
+        assert self.sink.records == [("level_1", homepage.data)]
+
+    def test_contact_info_with_parsed_profile(self):
+        profile = self.stage.submit("parse_profile_data", map_html_body['parse_profile_data'],
+                                    copy.deepcopy(user_data)).result()
+        record = self.stage.submit("parse_contact_info_data",
+                                   map_html_body['parse_contact_info_data'],
+                                   profile.data).result()
+        assert record.error is None
+        assert record.data['last_name'] == 'Backupy'
+        assert self.sink.records[-1][0] == "level_2"
+
+    def test_backpressure(self):
+        for _ in range(2):
+            self.stage.submit("parse_homepage", map_html_body['parse_homepage'],
+                              copy.deepcopy(data_dict))
+        with pytest.raises(queue.Full):
+            self.stage.submit("parse_homepage", map_html_body['parse_homepage'],
+                              copy.deepcopy(data_dict), block=False)
+        assert len(self.stage.results()) == 2
+
+    def test_async_backpressure_keeps_the_default_executor_free(self):
+        class NoExecutor(ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                raise AssertionError("the default executor was used")
+
+        async def submit_all():
+            asyncio.get_event_loop().set_default_executor(NoExecutor())
+            futures = [await self.stage.submit_async("parse_homepage",
+                                                     map_html_body['parse_homepage'],
+                                                     copy.deepcopy(data_dict), account="bobby")
+                       for _ in range(5)]
+            return [record.data['name'] for record in await asyncio.gather(*futures)]
+
+        assert asyncio.run(submit_all()) == ['Bobby B.'] * 5
+        assert self.stage.slot_waiters == []
+
+
+class ThreadParseStageTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, memory_sink):
+        self.sink = memory_sink
+        self.stage = ParseStage(threads=True, sink=self.sink)
+        yield
+        self.stage.close()
+
+    def test_data_is_copied_for_the_worker(self):
+        profile = copy.deepcopy(user_data)
+        record = self.stage.submit("parse_profile_data", map_html_body['parse_profile_data'],
+                                   profile).result()
+        assert record.data['address']['country'] == 'US'
+        assert profile == user_data
+        record = self.stage.submit("parse_contact_info_data",
+                                   map_html_body['parse_contact_info_data'],
+                                   record.data).result()
+        assert record.data['last_name'] == 'Backupy'
+        assert self.sink.records == [("level_2", record.data)]
@@ -0,0 +1,218 @@
+import asyncio
+import functools
+import unittest
+from typing import NamedTuple
+import pytest
+import requests
+from parsel import Selector
+from async_scanner import LOGIN_PATH
+from rate_control import PacedPage, RateController, TokenBucket, classify
+from replay_server import ReplayServer
+
+
+class Response(NamedTuple):
+    status: int
+    headers: dict
+    url: str
+
+
+class TimeoutError(Exception):
+    pass
+
+
+class HttpPage:
+    """
+    Page that loads the urls over http, enough of playwright for the paced operations.
+    """
+
+    def __init__(self) -> None:
+        self.session = requests.Session()
+        self.url = "about:blank"
+        self.body = ""
+        self.timeouts = []
+
+    async def goto(self, url, timeout=None):
+        self.timeouts.append(timeout)
+        response = await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(self.session.get, url, timeout=timeout / 1000))
+        self.url = response.url
+        self.body = response.text
+        return Response(response.status_code, response.headers, response.url)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        self.timeouts.append(timeout)
+        if not Selector(text=self.body or "<html></html>").css(selector):
+            raise TimeoutError(f"Timeout {timeout}ms exceeded waiting for {selector}")
+        return True
+
+    def is_closed(self):
+        return False
+
+
+class RateControlTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.servers = []
+        yield
+        for server in self.servers:
+            server.stop()
+
+    def server(self, **kwargs) -> ReplayServer:
+        self.servers.append(ReplayServer(secret=None, **kwargs).start())
+        return self.servers[-1]
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        assert [bucket.reserve(now=bucket.updated) for _ in range(4)] == [0, 0, 0.5, 1.0]
+        bucket = TokenBucket(rate=2, burst=2)
+        bucket.pause(3, now=bucket.updated)
+        assert bucket.reserve(now=bucket.updated + 1) == 2
+
+    def test_classify(self):
+        assert classify(Response(429, {"retry-after": "7"}, "http://a/x"), "http://a/x") == (
+            "throttled", 7.0)
+        assert classify(Response(503, {}, "http://a/x"), "http://a/x") == ("throttled", None)
+        assert classify(Response(200, {}, "http://a/cdn-cgi/challenge-platform/h"),
+                        "http://a/") == ("captcha", None)
+        assert classify(True, "http://a/captcha?next=/") == ("captcha", None)
+        assert classify(None, "http://a/nx/find-work/") == ("ok", None)
+
+    def test_aimd_limits_and_adaptive_timeouts(self):
+        controller = RateController(concurrency=4, max_concurrency=6, cooldown=10,
+                                    min_samples=5, min_timeout=0.1)
+        assert controller.timeout("selector", 10000) == 10000
+        for index in range(20):
+            controller.record("a", "navigation", 0.1, "ok", now=index)
+        assert controller.concurrency() == 6
+        assert controller.timeout("navigation") == 300
+        # A caller's timeout is a lower bound of the adaptive one
+        assert controller.timeout("navigation", 10000) == 10000
+        assert controller.timeout("navigation", 100) == 300
+        controller.record("a", "navigation", 0.1, "throttled", retry_after=5, now=100)
+        # The other operations in flight report the same throttling
+        controller.record("a", "navigation", 0.1, "throttled", now=101)
+        assert controller.concurrency() == 3 and controller.counts["decreases"] == 1
+        assert controller.bucket("a").rate < 2.0 and controller.bucket("b").rate == 2.0
+        controller.record("a", "navigation", 2.0, "ok", now=120)
+        assert controller.concurrency() == 1
+        controller.record("a", "selector", 0.1, "timeout", now=140)
+        assert controller.concurrency() == 1 and controller.counts["timeout"] == 1
+
+    def test_timeouts_grow_past_a_site_slower_than_them(self):
+        controller = RateController(min_samples=5, cooldown=0)
+        for index in range(50):
+            controller.record("a", "navigation", 0.3, "ok", now=index)
+        assert controller.timeout("navigation") == 2000
+        timeouts = []
+        for index in range(6):
+            timeouts.append(controller.timeout("navigation"))
+            controller.record("a", "navigation", timeouts[-1] / 1000, "timeout", now=100 + index)
+        assert timeouts == [2000, 4000, 8000, 16000, 32000, 60000]
+        assert controller.concurrency() == 1
+        # Once the slower site answers, its latencies set the timeouts
+        for index in range(5):
+            controller.record("a", "navigation", 5.0, "ok", now=200 + index)
+        assert controller.timeout("navigation") == 15000
+
+    def test_paced_page_limits_navigations_in_flight(self):
+        controller = RateController(rate=100, burst=100, concurrency=2)
+        in_flight = []
+
+        class SlowPage(HttpPage):
+            async def goto(self, url, timeout=None):
+                in_flight.append(controller.in_flight)
+                await asyncio.sleep(0.01)
+                return Response(200, {}, url)
+
+        async def scan():
+            pages = [PacedPage(SlowPage(), controller) for _ in range(6)]
+            await asyncio.gather(*(page.goto("http://a/", timeout=500) for page in pages))
+
+        asyncio.run(scan())
+        assert max(in_flight) <= 3 and controller.in_flight == 0
+        assert controller.counts["ok"] == 6
+
+    def test_selector_waits_hold_no_slot(self):
+        controller = RateController(rate=100, burst=100, concurrency=1, max_concurrency=1)
+        navigated = []
+
+        class WaitingPage(HttpPage):
+            async def goto(self, url, timeout=None):
+                navigated.append(url)
+                return Response(200, {}, url)
+
+            async def wait_for_selector(self, selector, timeout=None):
+                await asyncio.sleep(0.5)
+                raise TimeoutError(f"Timeout {timeout}ms exceeded waiting for {selector}")
+
+        async def scan():
+            waiting = asyncio.ensure_future(
+                PacedPage(WaitingPage(), controller).wait_for_selector("#login_answer"))
+            await asyncio.sleep(0.01)
+            # The other session navigates while the optional element is awaited
+            await asyncio.wait_for(PacedPage(WaitingPage(), controller).goto("http://a/"), 0.2)
+            assert not waiting.done()
+            with pytest.raises(TimeoutError):
+                await waiting
+
+        asyncio.run(scan())
+        assert navigated == ["http://a/"] and controller.in_flight == 0
+        assert controller.counts["timeout"] == 1
+
+    def test_backs_off_a_throttling_server(self):
+        server = self.server(rate_limit=10)
+        controller = RateController(rate=50, burst=10, concurrency=8, cooldown=0.5)
+        url = f"{server.url}{LOGIN_PATH}"
+
+        async def session(statuses):
+            page = PacedPage(HttpPage(), controller)
+            for _ in range(4):
+                # Throttled pages are loaded again, like a retried scan step
+                while True:
+                    statuses.append((await page.goto(url)).status)
+                    if statuses[-1] != 429:
+                        break
+                await page.wait_for_selector("#login_username")
+
+        async def scan(statuses):
+            await asyncio.gather(*(session(statuses) for _ in range(8)))
+
+        statuses = []
+        asyncio.run(asyncio.wait_for(scan(statuses), 30))
+        host = server.url.split("//")[1]
+        assert statuses.count(429) == server.httpd.throttled > 0
+        assert controller.bucket(host).rate < 50 and controller.counts["decreases"] >= 1
+        # Paced, the retries of the throttled pages stay well below one per page
+        assert statuses.count(200) == 32 and statuses.count(429) < 16
+        assert controller.counts["delayed"] > 0
+
+    def test_timeouts_follow_the_latency_of_the_server(self):
+        server = self.server(latency=0.05)
+        controller = RateController(rate=100, burst=100, min_samples=5, min_timeout=0.1,
+                                    latency_tolerance=2.0, cooldown=0)
+        page = HttpPage()
+        paced = PacedPage(page, controller)
+        url = f"{server.url}{LOGIN_PATH}"
+
+        async def scan(count):
+            for _ in range(count):
+                await paced.goto(url)
+                with pytest.raises(TimeoutError):
+                    await paced.wait_for_selector("#missing", timeout=10000)
+
+        asyncio.run(scan(8))
+        assert page.timeouts[0] == 30000 and page.timeouts[1] == 10000
+        # The last navigations got timeouts of three times the p99 latency
+        assert 150 <= page.timeouts[-2] <= 1000
+        assert 150 <= controller.timeout("navigation") <= 1000
+        # Missing optional elements do not count against the site
+        assert controller.counts["timeout"] == 8 and controller.counts["decreases"] == 0
+        # A navigation ten times slower than usual times out and cuts the limit
+        limit = controller.limit
+        timeout = controller.timeout("navigation")
+        server.httpd.latency = 0.5
+        with pytest.raises(requests.exceptions.Timeout):
+            asyncio.run(scan(1))
+        assert controller.limit < limit and controller.counts["timeout"] == 9
+        assert controller.counts["decreases"] == 1
+        assert abs(controller.timeout("navigation") - 2 * timeout) <= 1
@@ -0,0 +1,92 @@
+import asyncio
+import copy
+import unittest
+import pytest
+import requests
+from async_scanner import (AsyncUpworkScanner, BrowserPool, Credentials, CONTACT_INFO_PATH,
+                           ScanOptions)
+from output_sink import NullSink
+from replay_server import ReplayServer
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+from user_data_profile import user_data
+
+PROFILE_URL = "/freelancers/~0100e1354146799c5e"
+LOGIN_URL = "/ab/account-security/login"
+
+
+class ReplayServerTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.server = ReplayServer().start()
+        self.session = requests.Session()
+        self.parser = UpworkParser(NullSink())
+        yield
+        self.session.close()
+        self.server.stop()
+
+    def login(self, **form):
+        return self.session.post(f"{self.server.url}{LOGIN_URL}",
+                                 data=dict({"username": "bobby", "password": "password"}, **form))
+
+    def test_login_flow_with_secret(self):
+        home = self.session.get(f"{self.server.url}/nx/find-work/")
+        assert home.url.endswith(LOGIN_URL)
+        assert 'id="login_password_continue"' in home.text
+        assert self.login(password="wrong").status_code == 401
+        assert 'id="login_answer"' in self.login().text
+        home = self.login(answer="answer")
+        assert home.url.endswith("/nx/find-work/")
+        assert 'class="profile-title"' in home.text
+        assert "<script" not in home.text
+        # Only the replayed popup matches the close button selector
+        assert home.text.count('data-cy="close-button"') == 1
+
+    def test_pages_parse_like_the_recordings(self):
+        self.login(answer="answer")
+        contact_info = self.session.get(f"{self.server.url}{CONTACT_INFO_PATH}")
+        assert 'id="deviceAuth_answer"' in contact_info.text
+        contact_info = self.session.post(f"{self.server.url}{CONTACT_INFO_PATH}",
+                                         data={"answer": "answer"})
+        profile = self.session.get(f"{self.server.url}{PROFILE_URL}")
+
+        served = copy.deepcopy(user_data)
+        recorded = copy.deepcopy(user_data)
+        assert self.parser.parse_profile_data(profile.text, served)
+        assert self.parser.parse_contact_info_data(contact_info.text, served)
+        self.parser.parse_profile_data(map_html_body['parse_profile_data'], recorded)
+        self.parser.parse_contact_info_data(map_html_body['parse_contact_info_data'], recorded)
+        assert served == recorded
+
+    def test_options(self):
+        self.server.stop()
+        self.server = ReplayServer(secret=None, popup=False).start()
+        home = self.login()
+        assert home.url.endswith("/nx/find-work/")
+        assert 'data-cy="close-button"' not in home.text
+        contact_info = self.session.get(f"{self.server.url}{CONTACT_INFO_PATH}")
+        assert 'data-test="userId"' in contact_info.text
+
+    def test_scanner_against_replay_server(self):
+        pool = BrowserPool()
+
+        async def scan():
+            try:
+                await pool.start()
+            except Exception as err:
+                await pool.stop()
+                return err
+            scanner = AsyncUpworkScanner(UpworkParser(NullSink()),
+                                         Credentials("bobby", "password", "answer"), pool,
+                                         ScanOptions(base_url=self.server.url))
+            try:
+                return await scanner.run()
+            finally:
+                await pool.stop()
+
+        result = asyncio.run(scan())
+        if isinstance(result, Exception):
+            pytest.skip(f"No browser available: {result}")
+        assert result.error is None
+        assert result.data["last_name"] == 'Backupy'
+        assert result.data["address"]["country"] == 'US'
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+import pytest
+from resource_filter import ResourceFilter
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url) -> None:
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url) -> None:
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def fallback(self):
+        self.outcome = "fallback"
+
+
+class ResourceFilterTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self):
+        self.resource_filter = ResourceFilter()
+
+    def test_default_profile(self):
+        assert self.resource_filter.should_block(
+            "image", "https://www.upwork.com/profile-portraits/c1mLLxjwmuM")
+        assert self.resource_filter.should_block(
+            "font", "https://www.upwork.com/static/fonts/font.woff2")
+        assert self.resource_filter.should_block(
+            "script", "https://w.usabilla.com/5e2b5b3c0c31.js")
+        assert not self.resource_filter.should_block(
+            "document", "https://www.upwork.com/nx/find-work/")
+        assert not self.resource_filter.should_block(
+            "script", "https://www.upwork.com/static/app.js")
+
+    def test_allow_rules_win(self):
+        resource_filter = ResourceFilter(allowed_urls=[r"/static/logo\.svg$"])
+        assert not resource_filter.should_block(
+            "image", "https://www.upwork.com/static/logo.svg")
+
+    def test_handle_counts_requests(self):
+        routes = [FakeRoute("image", "https://www.upwork.com/avatar.png"),
+                  FakeRoute("script", "https://www.google-analytics.com/analytics.js"),
+                  FakeRoute("document", "https://www.upwork.com/nx/find-work/")]
+
+        async def handle_all():
+            for route in routes:
+                await self.resource_filter.handle(route)
+
+        asyncio.run(handle_all())
+        assert [route.outcome for route in routes] == ["aborted", "aborted", "fallback"]
+        stats = self.resource_filter.stats()
+        assert stats["blocked_requests"] == 2
+        assert stats["blocked_by_type"] == {"image": 1, "script": 1}
+        assert stats["allowed_requests"] == 1
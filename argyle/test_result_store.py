@@ -0,0 +1,131 @@
+import copy
+import json
+import threading
+from datetime import date, datetime
+import unittest
+import pytest
+from output_sink import NullSink, open_sink
+from result_store import MISSING, ResultStore, SqliteSink, main
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+from user_data_profile import user_data
+
+
+def parsed_record() -> dict:
+    parser = UpworkParser(NullSink())
+    profile = copy.deepcopy(user_data)
+    parser.parse_profile_data(map_html_body['parse_profile_data'], profile)
+    return parser.parse_contact_info_data(map_html_body['parse_contact_info_data'], profile)
+
+
+def profile_id(index: int) -> str:
+    return f"00000000-0000-4000-8000-{index:012d}"
+
+
+class ResultStoreTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path):
+        self.path = str(tmp_path / "results.db")
+        self.store = ResultStore(self.path)
+        self.record = parsed_record()
+        yield
+        self.store.close()
+
+    def profile(self, index: int, country: str = "US", **fields) -> dict:
+        record = copy.deepcopy(self.record)
+        record.update(id=profile_id(index), email=f"user{index}@example.com", **fields)
+        record["address"]["country"] = country
+        return record
+
+    def test_round_trip_and_indexes(self):
+        assert self.store.upsert([self.record], accounts=["bobby@example.com"]).inserted == 1
+        assert self.store.get(self.record, "bobby@example.com") == self.record
+        # The parser does not find the id and account, the scanned username identifies
+        # the record, never the masked email other accounts share
+        assert self.store.get("username:bobby@example.com") == self.record
+        assert self.store.upsert([self.record, self.record],
+                                 accounts=["bob@example.com", None]) == (1, 0, 0, 1)
+        assert self.store.count(email="b******nt@argyle.io") == 2
+        mode, = self.store.connection.execute("PRAGMA journal_mode").fetchone()
+        assert mode == "wal"
+        indexes = {row["name"] for row in self.store.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"profiles_id", "profiles_email", "profiles_country",
+                "profiles_updated_at"} <= indexes
+        plan = " ".join(row["detail"] for row in self.store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM profiles WHERE country = 'US'"))
+        assert "profiles_country" in plan
+
+    def test_upsert_counts_and_history(self):
+        records = [self.profile(index) for index in range(3)]
+        assert self.store.upsert(records, scanned_at="2026-10-01") == (3, 0, 0, 0)
+        changed = self.profile(1, country="RO")
+        changed["metadata"]["hourly_rate"] = "$10.00/hr"
+        result = self.store.upsert([records[0], changed, self.profile(3),
+                                    dict(self.record, email=MISSING)],
+                                   scanned_at="2026-10-02")
+        assert result == (1, 1, 1, 1)
+        fields = {change["field"]: change for change in self.store.history(f"id:{profile_id(1)}")}
+        assert set(fields) == {"country", "metadata"}
+        assert (fields["country"]["old_value"], fields["country"]["new_value"]) == ("US", "RO")
+        assert fields["country"]["changed_at"].startswith("2026-10-02")
+        assert list(self.store.history(records[0])) == []
+
+    def test_streamed_queries(self):
+        self.store.upsert([self.profile(index, "US" if index % 2 else "RO")
+                           for index in range(10)], scanned_at="2026-10-01")
+        self.store.upsert([self.profile(4, "US")], scanned_at="2026-10-03T12:00:00+02:00")
+        us = self.store.query(country="US")
+        assert iter(us) is us
+        assert [record["id"] for record in us] == [profile_id(index)
+                                                   for index in [4, 1, 3, 5, 7, 9]]
+        assert self.store.count(country="RO") == 4
+        changed = list(self.store.query(changed_since="2026-10-02"))
+        assert [record["id"] for record in changed] == [profile_id(4)]
+        assert [record["email"] for record in self.store.query(email="user7@example.com")] == [
+            "user7@example.com"]
+        assert len(list(self.store.query(limit=3))) == 3
+
+    def test_timestamps_are_stored_in_iso_form(self):
+        self.store.upsert([self.profile(0, updated_at="2026-10-17 12:00:00"),
+                           self.profile(1, updated_at=datetime(2026, 10, 17, 9, 30),
+                                        created_at=date(2026, 1, 2)),
+                           self.profile(2, updated_at="2026-10-16 23:59:59")])
+        # Same day records are not filtered out by the "T" of the filter
+        updated = self.store.query(updated_since="2026-10-17")
+        assert sorted(record["id"] for record in updated) == [profile_id(0), profile_id(1)]
+        stored = self.store.get(f"id:{profile_id(1)}")
+        assert stored["updated_at"] == "2026-10-17T09:30:00+00:00"
+        assert stored["created_at"] == "2026-01-02T00:00:00+00:00"
+        assert self.store.get(f"id:{profile_id(0)}")["created_at"] == MISSING
+
+    def test_sink_batches_level_2_records(self):
+        sink = SqliteSink(str(self.path), batch_size=2, flush_interval=60)
+        sink.write("level_1", {"name": "Bobby B."})
+        sink.write("level_2", self.profile(0))
+        assert self.store.count() == 0
+        threads = [threading.Thread(target=sink.write, args=("level_2", self.profile(index)))
+                   for index in range(1, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sink.write("level_2", self.record, account="bobby@example.com")
+        sink.close()
+        assert self.store.count() == 5
+        assert self.store.get(self.record, "bobby@example.com") == self.record
+        sink = open_sink(str(self.path))
+        assert isinstance(sink, SqliteSink)
+        sink.close()
+
+    def test_import_and_query_cli(self):
+        output = self.path.replace("results.db", "scan_results.jsonl")
+        with open(output, "w") as outfile:
+            for record in [self.profile(0), dict(self.record, phone_number="123"),
+                           self.profile(1, "RO"), self.record]:
+                outfile.write(json.dumps({"kind": "level_2", "account": "bobby@example.com",
+                                          "record": record}) + "\n")
+        assert main(["--db", self.path, "import", output, "--chunk-size", "3"]) == 0
+        assert self.store.count() == 3
+        assert self.store.get("username:bobby@example.com") == self.record
+        assert [record["id"] for record in self.store.query(country="RO")] == [profile_id(1)]
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+from async_scanner import BrowserPool
+from scanner_daemon import ScannerDaemon, request
+from test_async_scanner import FakeContext
+
+
+class BrowserContext(FakeContext):
+    async def close(self):
+        self.pool.contexts.remove(self)
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.contexts = []
+        self.sessions_valid = True
+        self.closed = False
+
+    async def new_context(self, **kwargs):
+        self.contexts.append(BrowserContext(self, kwargs.get("storage_state")))
+        await asyncio.sleep(0)
+        return self.contexts[-1]
+
+    def is_connected(self):
+        return not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self) -> None:
+        self.launched = []
+
+    async def launch(self, **kwargs):
+        self.launched.append(FakeBrowser())
+        return self.launched[-1]
+
+
+class FakePlaywright:
+    def __init__(self) -> None:
+        self.chromium = FakeChromium()
+
+    async def stop(self):
+        pass
+
+
+class FakeBrowserPool(BrowserPool):
+    async def start(self):
+        self.pw = FakePlaywright()
+        self.launched = self.pw.chromium.launched
+        for _ in range(self.size):
+            self.browsers.append(await self.launch())
+
+
+class ScannerDaemonTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, memory_sink):
+        # Unix socket paths are limited to about a hundred characters
+        self.directory = tempfile.mkdtemp(prefix="argyle-")
+        self.socket_path = os.path.join(self.directory, "scanner.sock")
+        self.sink = memory_sink
+        yield
+        shutil.rmtree(self.directory)
+
+    def daemon(self, **kwargs) -> ScannerDaemon:
+        return ScannerDaemon(self.socket_path, pool=FakeBrowserPool(kwargs.pop("browsers", 1)),
+                             sink=self.sink, **kwargs)
+
+    def run_daemon(self, daemon: ScannerDaemon, client):
+        """
+        Start the daemon, run the blocking client on a thread and stop the daemon.
+        """
+        async def scenario():
+            await daemon.start()
+            try:
+                return await asyncio.get_event_loop().run_in_executor(None, client)
+            finally:
+                await daemon.stop()
+
+        return asyncio.run(scenario())
+
+    def scan(self, username: str, wait: bool = True) -> dict:
+        return request({"command": "scan", "username": username, "password": "password",
+                        "secret": "answer", "wait": wait}, self.socket_path, timeout=10)
+
+    def test_jobs_over_the_socket(self):
+        daemon = self.daemon(concurrency=2)
+
+        def client():
+            queued = [self.scan(f"user{index}", wait=False) for index in range(3)]
+            done = [request({"command": "job", "job_id": job["job_id"], "wait": True},
+                            self.socket_path, timeout=10) for job in queued]
+            return queued, done, request({"command": "status"}, self.socket_path)
+
+        queued, done, status = self.run_daemon(daemon, client)
+        assert [job["status"] for job in queued] == ["queued"] * 3
+        assert [job["status"] for job in done] == ["done"] * 3
+        assert [job["data"]["last_name"] for job in done] == ['Backupy'] * 3
+        assert status["healthy"] and status["completed"] == 3 and status["queue_depth"] == 0
+        # One warm browser served every job in its own context
+        browser, = daemon.pool.launched
+        assert status["browsers"] == [{"jobs": 3, "contexts": 0, "connected": True}]
+        assert browser.closed
+        assert not os.path.exists(self.socket_path)
+
+    def test_browser_restarted_after_max_jobs(self):
+        daemon = self.daemon(concurrency=1, max_jobs=2, max_rss_growth=0)
+        jobs = self.run_daemon(daemon, lambda: [self.scan(f"user{index}") for index in range(5)])
+        assert all(job["status"] == "done" for job in jobs)
+        assert daemon.restarts == {"jobs": 2, "memory": 0, "crashed": 0}
+        first, second, third = daemon.pool.launched
+        assert first.closed and second.closed
+        assert daemon.pool.retired == []
+
+    def test_memory_growth_and_crash_restart_the_browsers(self):
+        daemon = self.daemon(browsers=2, concurrency=1, max_rss_growth=100)
+        sizes = iter([1000, 1050, 1200, 1000])
+        daemon.browser_rss = lambda: next(sizes, 1000)
+
+        def client():
+            jobs = [self.scan(f"user{index}") for index in range(3)]
+            # The restarted browsers get a new baseline
+            assert daemon.rss_baseline is None
+            daemon.pool.browsers[0].closed = True
+            jobs.append(self.scan("user3"))
+            return jobs
+
+        jobs = self.run_daemon(daemon, client)
+        assert all(job["status"] == "done" for job in jobs)
+        assert daemon.restarts == {"jobs": 0, "memory": 1, "crashed": 1}
+        assert len(daemon.pool.launched) == 5
+
+    def test_status_and_shutdown_cancel_the_queue(self):
+        daemon = self.daemon(concurrency=0)
+
+        def client():
+            queued = [self.scan(f"user{index}", wait=False) for index in range(2)]
+            status = request({"command": "status"}, self.socket_path)
+            assert request({"command": "nope"}, self.socket_path)["error"]
+            return queued, status, request({"command": "shutdown"}, self.socket_path)
+
+        async def scenario():
+            await daemon.start()
+            loop = asyncio.get_event_loop()
+            answers = loop.run_in_executor(None, client)
+            await daemon.stopping.wait()
+            await daemon.stop()
+            return await answers
+
+        queued, status, stopping = asyncio.run(scenario())
+        assert status["queue_depth"] == 2 and status["running"] == 0
+        assert stopping == {"status": "stopping", "running": 0, "cancelled": 2}
+        assert [daemon.jobs[job["job_id"]]["status"] for job in queued] == ["cancelled"] * 2
+
+    def test_refuses_to_start_next_to_a_running_daemon(self):
+        daemon = self.daemon()
+
+        def client():
+            with pytest.raises(RuntimeError):
+                self.daemon().remove_stale_socket()
+
+        self.run_daemon(daemon, client)
+        # A socket left behind by a dead daemon is removed
+        open(self.socket_path, "w").close()
+        self.daemon().remove_stale_socket()
+        assert not os.path.exists(self.socket_path)
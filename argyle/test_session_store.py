@@ -0,0 +1,34 @@
+import unittest
+import os
+import pytest
+from cryptography.fernet import Fernet
+from session_store import SessionStore
+
+
+class SessionStoreTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("SESSION_KEY", raising=False)
+        self.cache_dir = str(tmp_path / "sessions")
+        self.state = {"cookies": [{"name": "master_access_token", "value": "abc123"}],
+                      "origins": []}
+
+    def test_save_and_load(self):
+        store = SessionStore(cache_dir=self.cache_dir)
+        store.save("bobby", self.state)
+        assert SessionStore(cache_dir=self.cache_dir).load("bobby") == self.state
+        assert store.load("someone-else") is None
+
+    def test_encrypted_at_rest(self):
+        store = SessionStore(cache_dir=self.cache_dir)
+        store.save("bobby", self.state)
+        with open(store.path_for("bobby"), "rb") as infile:
+            content = infile.read()
+        assert b"abc123" not in content
+        assert "bobby" not in os.path.basename(store.path_for("bobby"))
+
+    def test_wrong_key_discards_session(self):
+        SessionStore(cache_dir=self.cache_dir).save("bobby", self.state)
+        store = SessionStore(cache_dir=self.cache_dir, key=Fernet.generate_key())
+        assert store.load("bobby") is None
+        assert not os.path.exists(store.path_for("bobby"))
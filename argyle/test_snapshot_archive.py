@@ -0,0 +1,57 @@
+import os
+import unittest
+import pytest
+from reparse_archive import reparse
+from snapshot_archive import SnapshotArchive
+from test_constants import map_html_body
+from upwork_parser import UpworkParser
+
+
+class SnapshotArchiveTests(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def create_test_context(self, tmp_path, memory_sink):
+        self.archive = SnapshotArchive(str(tmp_path / "archive"), codec="gzip")
+        self.sink = memory_sink
+
+    def test_identical_pages_stored_once(self):
+        body = map_html_body['parse_profile_data']
+        first = self.archive.put(body, "bobby", "parse_profile_data")
+        second = self.archive.put(body, "alice", "parse_profile_data")
+        assert first == second
+        path = self.archive.blob_path(first, "gzip")
+        assert os.path.getsize(path) < len(body) / 4
+        assert len(os.listdir(os.path.dirname(path))) == 1
+        assert len(list(self.archive.entries())) == 2
+        assert self.archive.get(first) == body
+
+    def test_entries_filters(self):
+        self.archive.put("<p>1</p>", "bobby", "parse_homepage", "2026-10-01T10:00:00+00:00")
+        self.archive.put("<p>2</p>", "bobby", "parse_profile_data", "2026-10-02T10:00:00+00:00")
+        self.archive.put("<p>3</p>", "alice", "parse_homepage", "2026-10-03T10:00:00+00:00")
+        assert len(list(self.archive.entries(account="bobby"))) == 2
+        assert len(list(self.archive.entries(page_type="parse_homepage"))) == 2
+        entries = list(self.archive.entries(since="2026-10-02", until="2026-10-03"))
+        assert [entry["page_type"] for entry in entries] == ["parse_profile_data"]
+
+    def test_reparse(self):
+        for page_type in ["parse_homepage", "parse_profile_data", "parse_contact_info_data"]:
+            self.archive.put(map_html_body[page_type], "bobby", page_type)
+        counts = reparse(self.archive, UpworkParser(self.sink))
+        assert counts == {"parsed": 3, "failed": 0, "skipped": 0}
+        assert [kind for kind, _ in self.sink.records] == ["level_1", "level_2"]
+        assert self.sink.records[-1][1]["address"]["city"] == 'Miami'
+
+    def test_reparse_contact_info_without_its_profile(self):
+        contact_info = map_html_body["parse_contact_info_data"]
+        self.archive.put(map_html_body["parse_profile_data"], "bobby", "parse_profile_data",
+                         "2026-10-01T10:00:00+00:00")
+        self.archive.put(contact_info, "bobby", "parse_contact_info_data",
+                         "2026-10-02T10:00:00+00:00")
+        self.archive.put(contact_info, "alice", "parse_contact_info_data",
+                         "2026-10-02T10:00:00+00:00")
+        # The archived profile of bobby is loaded, alice has none
+        counts = reparse(self.archive, UpworkParser(self.sink), page_type="parse_contact_info_data")
+        assert counts == {"parsed": 1, "failed": 0, "skipped": 1}
+        assert self.sink.records[-1][1]["address"]["country"] == 'US'
+        counts = reparse(self.archive, UpworkParser(self.sink), since="2026-10-02")
+        assert counts == {"parsed": 1, "failed": 0, "skipped": 1}
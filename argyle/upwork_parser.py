@@ -1,179 +1,218 @@
-from scrapy import Selector
-import json
-import country_converter as coco
-from phonenumberfmt import format_phone_number
-from data_model import UpworkUser
+from field_spec import ExtractionPlan, ExtractionResult, FieldSpec, keep_raw, strip_all
+from html_backends import HtmlBackend, get_backend
+from metrics import span, timed
+from output_sink import JsonFileSink, OutputSink
+from normalization import normalize_country, normalize_phone
+
+
+def split_title(value: str) -> list:
+    """
+    Split the job title from the employer, they are separated by '|'.
+    """
+    return value.split("|")
+
+
+def split_name(value: str) -> list:
+    """
+    Split the full name of the user in its parts.
+    """
+    return value.strip().replace("\n", "").split(" ")
+
+
+HOMEPAGE_PLAN = ExtractionPlan("parse_homepage", [
+    FieldSpec("name", 'a[class="profile-title"]::text'),
+    FieldSpec("available_connects",
+              'section[data-test="sidebar-available-connects"] > a::text'),
+    FieldSpec("hours_per_week",
+              'div[data-test="freelancer-sidebar-availability"] > div:nth-child(2) > span > span::text'),
+    FieldSpec("specialization", 'div.text-center > p::text'),
+    FieldSpec("categories",
+              'section[data-test="sidebar-categories"] > div:nth-child(2) > *::text',
+              post=strip_all, many=True, required=False),
+    FieldSpec("profile_completeness",
+              'div.profile-completeness-nudges-tiles-alternative > div > div > small::text'),
+])
+
+PROFILE_PLAN = ExtractionPlan("parse_profile_data", [
+    # Address related data
+    FieldSpec("city", 'span[itemprop="locality"]::text'),
+    FieldSpec("state", 'span[itemprop="state-name"]::text'),
+    FieldSpec("country", 'span[itemprop="country-name"]::text'),
+    # Other data related to the profile object
+    FieldSpec("picture_url",
+              'div.up-presence-container > img.up-avatar::attr(src)'),
+    FieldSpec("job_employer",
+              'div > ul > li > div > div > h4[role="presentation"]::text',
+              post=split_title, anchor="card"),
+    # Freelance work related data
+    FieldSpec("specialization", 'div > div > div > h2::text', anchor="card"),
+    FieldSpec("hourly_rate", 'h3[role="presentation"] > span::text'),
+    FieldSpec("hours_per_week", 'div:nth-child(2) > span::text',
+              anchor="card_details"),
+    # Languages and military status data
+    FieldSpec("languages", 'strong::text', anchor="list_item"),
+    FieldSpec("proficiency", 'span::text', anchor="list_item"),
+    FieldSpec("military_status", 'div > div > span > strong::text',
+              anchor="card_details"),
+    # Education related data
+    FieldSpec("university", 'h5[role="presentation"]::text',
+              anchor="list_item"),
+    FieldSpec("degree", 'div::text', anchor="list_item"),
+    FieldSpec("university_years", 'div.text-muted::text', anchor="list_item"),
+], anchors={
+    "card": 'section.up-card-section',
+    "card_details": 'section.up-card-section > div.mt-30',
+    "list_item": 'ul.list-unstyled > li > div',
+})
+
+CONTACT_INFO_PLAN = ExtractionPlan("parse_contact_info_data", [
+    FieldSpec("full_name", 'div[data-test="userName"]::text', post=split_name),
+    FieldSpec("street_address", 'span[data-test="addressStreet"]::text'),
+    FieldSpec("ap_number", 'span[data-test="addressStreet2"]::text'),
+    FieldSpec("postal_code", 'span[data-test="addressZip"]::text'),
+    FieldSpec("phone_number", 'div[data-test="phone"]::text', post=keep_raw,
+              required=False),
+    FieldSpec("email", 'div[data-test="userEmail"]::text'),
+])
 
 
 class UpworkParser:
+    """
+    Every parse method takes either the html body of the page or the
+    ExtractionResult of the page plan, when the fields were extracted in the browser.
+    The records are written to the sink, by default the level_1/level_2 json files.
+    The html bodies are read with an html backend, by name or instance, by default
+    lxml (see html_backends.py). The records are written with
+    the account they belong to, the scanner sets it.
+    """
+
+    def __init__(self, sink: OutputSink = None, backend=None, account: str = None):
+        # Fields extracted / missing for the last page parsed by each method
+        self.extraction_results = {}
+        self.sink = sink or JsonFileSink()
+        self.backend = backend if isinstance(backend, HtmlBackend) else get_backend(backend)
+        self.last_error = None
+        self.account = account
+
+    def extract(self, plan: ExtractionPlan, html_body: str) -> dict:
+        """
+        Run the extraction plan over the html body, record which fields were found
+        and fail with the names of the required fields that are missing.
+        """
+        if isinstance(html_body, ExtractionResult):
+            result = html_body
+        else:
+            with span("argyle_parse_phase_seconds", phase="extract"):
+                result = plan.extract(html_body, self.backend)
+        self.extraction_results[plan.page] = result
+        result.raise_for_missing(plan.required)
+        return result.values
+
+    @timed("argyle_parse", method="parse_homepage")
     def parse_homepage(self, html_body: str, data_dict: dict):
         """
         Collect all data scraped from the homepage and save it to a json file.
         """
         try:
             print("Parsing homepage data and saving it to JSON file...")
-            # Load the html body
-            html_body = Selector(text=html_body)
-
             # Get valuable data
-            name = html_body.css('a[class="profile-title"]::text').get().strip()
-            available_connects = html_body.css(
-                'section[data-test="sidebar-available-connects"] > '
-                'a::text').get().strip()
-            hours_per_week = html_body.css(
-                'div[data-test="freelancer-sidebar-availability"] > div:nth-child(2) > span > span::text').get().strip()
-            specialization = html_body.css(
-                'div.text-center > p::text').get().strip()
-            categories = [x.strip() for x in html_body.css(
-                'section[data-test="sidebar-categories"] > div:nth-child(2) > *::text').getall()]
-            profile_completeness = html_body.css(
-                'div.profile-completeness-nudges-tiles-alternative > div > div > small::text').get().strip()
-
-            data_dict['name'] = name
-            data_dict['available_connects'] = available_connects
-            data_dict['hours_per_week'] = hours_per_week
-            data_dict['specialization'] = specialization
-            data_dict['categories'] = categories
-            data_dict['profile_completeness'] = profile_completeness
-
-            # Serialize it to json
-            data_str = json.dumps(data_dict, indent=2)
-
-            # Create the json file with the content
-            with open("../level_1_task.json", "w") as outfile:
-                outfile.write(data_str)
+            fields = self.extract(HOMEPAGE_PLAN, html_body)
+
+            data_dict['name'] = fields["name"]
+            data_dict['available_connects'] = fields["available_connects"]
+            data_dict['hours_per_week'] = fields["hours_per_week"]
+            data_dict['specialization'] = fields["specialization"]
+            data_dict['categories'] = fields["categories"]
+            data_dict['profile_completeness'] = fields["profile_completeness"]
+
+            # Save the level 1 task output
+            with span("argyle_parse_phase_seconds", phase="write"):
+                self.sink.write("level_1", data_dict, account=self.account)
+
+            return data_dict
 
         except Exception as err:
             self.handle_error(err, "parse_homepage")
 
+    @timed("argyle_parse", method="parse_profile_data")
     def parse_profile_data(self, html_body: str, user_profile_data: dict):
         """
         Collect all data scraped from the profile page for the user profile.
         """
         try:
             print("Parsing profile page data...")
-            # Load the HTML body
-            html_body = Selector(text=html_body)
-
-            # Get data related to address
-            city = html_body.css(
-                'span[itemprop="locality"]::text').get().strip()
-            state = html_body.css(
-                'span[itemprop="state-name"]::text').get().strip()
-            country = html_body.css(
-                'span[itemprop="country-name"]::text').get().strip()
-            country_format = coco.convert(names=country,
-                                          to='ISO2')  # Format the country name
-
-            # Other data related to the profile object
-            picture_url = html_body.css(
-                'div.up-presence-container > img.up-avatar::attr(src)').get().strip()
-            job_employer = html_body.css(
-                'section.up-card-section > div > ul > li > div > div > h4[role="presentation"]::text').get().split(
-                "|")
-            employer = job_employer[-1].strip() if len(job_employer) > 1 else ""
+            fields = self.extract(PROFILE_PLAN, html_body)
+
+            # Format the country name
+            with span("argyle_parse_phase_seconds", phase="normalize_country"):
+                country_format = normalize_country(fields["country"])
 
-            # Get rest of data available on the page and save it to metadata in the profile object
-            # Freelance work related data
-            specialization = html_body.css(
-                'section.up-card-section > div > div > div > h2::text').get().strip()
-            hourly_rate = html_body.css(
-                'h3[role="presentation"] > span::text').get().strip()
-            hours_per_week = html_body.css(
-                'section.up-card-section > div.mt-30 > div:nth-child(2) > span::text').get().strip()
-
-            # Languages and military status data
-            languages = html_body.css(
-                'ul.list-unstyled > li > div > strong::text').get().strip()
-            proficiency = html_body.css(
-                'ul.list-unstyled > li > div > span::text').get().strip()
-            language = f"{languages} {proficiency}"
-            military_status = html_body.css(
-                'section.up-card-section > div.mt-30 > div > div > span > strong::text').get().strip()
-
-            # Education related data
-            university = html_body.css(
-                'ul.list-unstyled > li > div > h5[role="presentation"]::text').get().strip()
-            degree = html_body.css(
-                'ul.list-unstyled > li > div > div::text').get().strip()
-            university_years = html_body.css(
-                'ul.list-unstyled > li > div > div.text-muted::text').get().strip()
+            job_employer = fields["job_employer"]
+            employer = job_employer[-1].strip() if len(job_employer) > 1 else ""
+            language = f"{fields['languages']} {fields['proficiency']}"
 
             # Set data in the user data profile
             user_profile_data["employer"] = employer
-            user_profile_data["picture_url"] = picture_url
-            user_profile_data["address"]["city"] = city
-            user_profile_data["address"]["state"] = state
+            user_profile_data["picture_url"] = fields["picture_url"]
+            user_profile_data["address"]["city"] = fields["city"]
+            user_profile_data["address"]["state"] = fields["state"]
             user_profile_data["address"]["country"] = country_format
             user_profile_data["metadata"] = {
-                "specialization": specialization,
-                "hourly_rate": hourly_rate,
-                "hours_per_week": hours_per_week,
+                "specialization": fields["specialization"],
+                "hourly_rate": fields["hourly_rate"],
+                "hours_per_week": fields["hours_per_week"],
                 "language": language,
-                "military_status": military_status,
+                "military_status": fields["military_status"],
                 "education": {
-                    "university": university,
-                    "degree": degree,
-                    "university_years": university_years
+                    "university": fields["university"],
+                    "degree": fields["degree"],
+                    "university_years": fields["university_years"]
                 }}
 
+            return user_profile_data
+
         except Exception as err:
             self.handle_error(err, "parse_pofile_data")
 
+    @timed("argyle_parse", method="parse_contact_info_data")
     def parse_contact_info_data(self, html_body: str, user_profile_data: dict):
         """
         Collect all data scraped from the profile contact info page for the user profile.
         """
         try:
             print("Parsing contact info page data and validating final data...")
-            # Load the html body of the page
-            info_html = Selector(text=html_body)
+            fields = self.extract(CONTACT_INFO_PLAN, html_body)
 
             # Get name related data
-            full_name = info_html.css(
-                'div[data-test="userName"]::text').get().strip().replace("\n",
-                                                                         "").split(
-                " ")
+            full_name = fields["full_name"]
             first_name = full_name[0] if len(full_name) > 0 else ""
             last_name = full_name[-1] if len(full_name) > 1 else ""
 
-            # Get address related data
-            street_address = info_html.css(
-                'span[data-test="addressStreet"]::text').get().strip()
-            ap_number = info_html.css(
-                'span[data-test="addressStreet2"]::text').get().strip()
-            postal_code = info_html.css(
-                'span[data-test="addressZip"]::text').get().strip()
-
-            # Get email and phone data
-            phone_number = info_html.css('div[data-test="phone"]::text').get()
-            phone_number_format = format_phone_number(phone_number,
-                                                      implied_phone_region='US')  # Format the phone data
-            e_mail = info_html.css(
-                'div[data-test="userEmail"]::text').get().strip()
+            # Format the phone data
+            with span("argyle_parse_phase_seconds", phase="normalize_phone"):
+                phone_number_format = normalize_phone(fields["phone_number"], 'US')
 
             # Set it in the user data profile
             user_profile_data["first_name"] = first_name
             user_profile_data["last_name"] = last_name
             user_profile_data["full_name"] = f"{first_name} {last_name}"
-            user_profile_data["email"] = e_mail
+            user_profile_data["email"] = fields["email"]
             user_profile_data["phone_number"] = phone_number_format
-            user_profile_data["address"]["line1"] = street_address
-            user_profile_data["address"]["line2"] = ap_number
-            user_profile_data["address"]["postal_code"] = postal_code
+            user_profile_data["address"]["line1"] = fields["street_address"]
+            user_profile_data["address"]["line2"] = fields["ap_number"]
+            user_profile_data["address"]["postal_code"] = fields["postal_code"]
 
             # Check if all fields have been completed
             self.check_empty_fields(user_profile_data)
 
-            # Serialize the fields to a pydantic data model
-            UpworkUser.parse_obj(user_profile_data)
-
-            # Serialize it to json
-            data_str = json.dumps(user_profile_data, indent=2)
+            # Serialize the fields to a pydantic data model, pydantic is loaded on first use
+            from data_model import UpworkUser
+            with span("argyle_parse_phase_seconds", phase="validate"):
+                UpworkUser.parse_obj(user_profile_data)
 
-            # Save output as a json file
-            with open("../level_2_task.json", "w") as outfile:
-                outfile.write(data_str)
+            # Save the level 2 task output
+            with span("argyle_parse_phase_seconds", phase="write"):
+                self.sink.write("level_2", user_profile_data, account=self.account)
 
             return user_profile_data
 
@@ -192,4 +231,5 @@ class UpworkParser:
         """
         Method to handle errors that may appear.
         """
+        self.last_error = f"{method_name}: {err}"
         print(f"Fail to parse data in {method_name}. Got err: {err}")